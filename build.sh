@@ -5,8 +5,12 @@ set -o errexit
 # Modify this line as needed for your package manager (pip, poetry, etc.)
 pip install -r requirements.txt
 
-# Convert static asset files
+# Vendor, trim and bundle the CSS/JS, then collect hashed, compressed copies
+python manage.py build_static
 python manage.py collectstatic --no-input
 
 # Apply any outstanding database migrations
 python manage.py migrate
+
+# Rebuild the price summaries behind /api/v1/analytics/
+python manage.py refresh_analytics
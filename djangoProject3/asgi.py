@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoProject3.settings')
+# Async requests don't stay on one thread, so persistent connections are
+# off by default here (see DATABASES in settings).
+os.environ.setdefault('KITCHEN_DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
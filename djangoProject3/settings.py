@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'kitchen',
     'crispy_forms',
     'crispy_bootstrap4',
@@ -50,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'kitchen.middleware.PerformanceMiddleware',
+    'kitchen.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -84,20 +87,90 @@ WSGI_APPLICATION = 'djangoProject3.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+# Without PGDATABASE (local runs, the test suite and bench_kitchen) the
+# project falls back to SQLite.
+
+if os.getenv('PGDATABASE'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('PGDATABASE'),
+            'USER': os.getenv('PGUSER'),
+            'PASSWORD': os.getenv('PGPASSWORD'),
+            'HOST': os.getenv('PGHOST'),
+            'PORT': os.getenv('PGPORT', 5432),
+            'CONN_MAX_AGE': int(os.getenv('KITCHEN_DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'sslmode': 'require',
+            },
+        }
+    }
+
+    # Persistent connections are reused by each worker thread for
+    # KITCHEN_DB_CONN_MAX_AGE seconds; djangoProject3.asgi defaults it to 0,
+    # since async requests don't stay on one thread. KITCHEN_DB_POOL=True switches to
+    # Django's psycopg connection pool instead (needs psycopg[pool] installed
+    # in place of psycopg2). Pools are per worker process, so keep
+    # workers * KITCHEN_DB_POOL_MAX_SIZE below the server's max_connections.
+    if os.getenv('KITCHEN_DB_POOL', 'False') == 'True':
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('KITCHEN_DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('KITCHEN_DB_POOL_MAX_SIZE', 4)),
+            'timeout': float(os.getenv('KITCHEN_DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+# Read replicas for the read-only kitchen pages: replica hosts for PostgreSQL,
+# or database files for SQLite, comma-separated. They become
+# DATABASES['replica'], ['replica_2'], ... and kitchen.routers.ReplicaRouter
+# spreads those pages' reads across them. A client that writes is pinned to
+# the primary for KITCHEN_DB_REPLICA_PIN_SECONDS. To try it locally, copy
+# db.sqlite3 to replica.sqlite3 and set KITCHEN_DB_REPLICAS=replica.sqlite3.
+
+KITCHEN_DB_REPLICAS = []
+for number, location in enumerate(filter(None, os.getenv('KITCHEN_DB_REPLICAS', '').split(',')), 1):
+    alias = 'replica' if number == 1 else f'replica_{number}'
+    replica = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        replica['NAME'] = BASE_DIR / location.strip()
+    else:
+        replica['HOST'] = location.strip()
+    DATABASES[alias] = replica
+    KITCHEN_DB_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['kitchen.routers.ReplicaRouter'] if KITCHEN_DB_REPLICAS else []
+
+KITCHEN_DB_REPLICA_PIN_SECONDS = int(os.getenv('KITCHEN_DB_REPLICA_PIN_SECONDS', 10))
+
+# Cache used for the home page, dish-type sidebar and analytics ETag. A
+# write only invalidates the menu in the process that made it while the
+# default is the per-process LocMemCache, so menu caching is off by default
+# there (KITCHEN_CACHE_TIMEOUT=0). Deployments with several gunicorn workers
+# should point KITCHEN_CACHE_BACKEND at a shared backend, e.g.
+# django.core.cache.backends.filebased.FileBasedCache with a directory as
+# KITCHEN_CACHE_LOCATION, or Redis, to turn it on.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('PGDATABASE'),
-        'USER': os.getenv('PGUSER'),
-        'PASSWORD': os.getenv('PGPASSWORD'),
-        'HOST': os.getenv('PGHOST'),
-        'PORT': os.getenv('PGPORT', 5432),
-        'OPTIONS': {
-            'sslmode': 'require',
-        },
+        'BACKEND': os.getenv('KITCHEN_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('KITCHEN_CACHE_LOCATION', 'kitchen'),
     }
 }
 
+KITCHEN_CACHE_TIMEOUT = int(os.getenv(
+    'KITCHEN_CACHE_TIMEOUT', 0 if CACHES['default']['BACKEND'].endswith('.LocMemCache') else 300
+))
+
+KITCHEN_SIDEBAR_LIMIT = int(os.getenv('KITCHEN_SIDEBAR_LIMIT', 20))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -137,6 +210,25 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
+
+# `manage.py build_static` (run by build.sh before collectstatic) vendors
+# Bootstrap and jQuery and writes the trimmed static/dist/ bundles. Outside
+# DEBUG, WhiteNoise serves content-hashed copies, pre-compressed with gzip
+# and (with the brotli package installed) brotli, with a far-future
+# immutable Cache-Control.
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': os.getenv(
+            'KITCHEN_STATICFILES_STORAGE',
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+        ),
+    },
+}
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -144,9 +236,151 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'kitchen.Cook'
 
+# Cooks resolved for each request are kept per process for this many
+# seconds (0 turns it off); see kitchen.auth.CachedModelBackend. The plain
+# ModelBackend stays listed so sessions created before it keep working.
+# Other workers only learn that a cook changed through the default cache,
+# so the cache is off by default while that is the per-process LocMemCache.
+
+AUTHENTICATION_BACKENDS = [
+    'kitchen.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+KITCHEN_USER_CACHE_SECONDS = int(os.getenv(
+    'KITCHEN_USER_CACHE_SECONDS', 0 if CACHES['default']['BACKEND'].endswith('.LocMemCache') else 30
+))
+
+KITCHEN_USER_CACHE_MAX_ENTRIES = int(os.getenv('KITCHEN_USER_CACHE_MAX_ENTRIES', 10_000))
+
+# Session storage: 'cached_db' reads sessions from the cache above and falls
+# back to django_session, 'signed_cookies' keeps them in the browser, 'db'
+# is Django's default. Expired rows are removed by `manage.py purge_sessions`.
+
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[os.getenv('KITCHEN_SESSION_ENGINE', 'cached_db')]
+
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
 LOGIN_URL = '/accounts/login/'
 
 LOGIN_REDIRECT_URL = 'kitchen:home'
 LOGOUT_REDIRECT_URL = 'home'
+
+# Pagination for the kitchen list views: 'offset' (page numbers) or
+# 'keyset' (opaque cursors). In keyset mode the total is 'cached',
+# 'approximate' (PostgreSQL planner statistics) or 'none'.
+
+KITCHEN_PAGINATION_MODE = os.getenv('KITCHEN_PAGINATION_MODE', 'offset')
+
+KITCHEN_PAGINATION_COUNT = os.getenv('KITCHEN_PAGINATION_COUNT', 'cached')
+
+KITCHEN_PAGINATION_COUNT_TIMEOUT = int(os.getenv('KITCHEN_PAGINATION_COUNT_TIMEOUT', 60))
+
+# Per-request SQL/template/wall-time histograms, scraped in Prometheus text
+# format from /metrics/ by the listed addresses only. Behind a reverse proxy
+# every request comes from the proxy's address, so set KITCHEN_METRICS_TOKEN
+# there instead: scrapers then need "Authorization: Bearer <token>", and the
+# address list is ignored.
+
+KITCHEN_METRICS_ENABLED = os.getenv('KITCHEN_METRICS_ENABLED', 'True') != 'False'
+
+KITCHEN_METRICS_ALLOWED_IPS = os.getenv('KITCHEN_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
+KITCHEN_METRICS_TOKEN = os.getenv('KITCHEN_METRICS_TOKEN', '')
+
+KITCHEN_SERVER_TIMING = os.getenv('KITCHEN_SERVER_TIMING', 'False') == 'True'
+
+# Read-only JSON API under /api/v1/.
+
+KITCHEN_API_PAGE_SIZE = int(os.getenv('KITCHEN_API_PAGE_SIZE', 100))
+
+KITCHEN_API_MAX_PAGE_SIZE = int(os.getenv('KITCHEN_API_MAX_PAGE_SIZE', 5000))
+
+KITCHEN_API_CHUNK_SIZE = int(os.getenv('KITCHEN_API_CHUNK_SIZE', 500))
+
+# Rows fetched per query (with their prefetched cooks) by the CSV/JSONL
+# exports under /kitchen/export/ and the export_kitchen command.
+
+KITCHEN_EXPORT_CHUNK_SIZE = int(os.getenv('KITCHEN_EXPORT_CHUNK_SIZE', 2000))
+
+# Page size of the /kitchen/lookup/ endpoints behind the cook and dish type
+# pickers on the dish form.
+
+KITCHEN_LOOKUP_PAGE_SIZE = int(os.getenv('KITCHEN_LOOKUP_PAGE_SIZE', 20))
+
+KITCHEN_LOOKUP_MAX_PAGE_SIZE = int(os.getenv('KITCHEN_LOOKUP_MAX_PAGE_SIZE', 100))
+
+# Deleting a dish type or cook hides it at once and removes its dishes or
+# dish assignments in batches of this size on a background thread of the
+# same process. `manage.py purge_deleted` runs leftover jobs (e.g. after a
+# restart) and can run from cron.
+
+KITCHEN_DELETION_BATCH_SIZE = int(os.getenv('KITCHEN_DELETION_BATCH_SIZE', 500))
+
+KITCHEN_DELETION_BACKGROUND = os.getenv('KITCHEN_DELETION_BACKGROUND', 'True') == 'True'
+
+# Ticket dispatch (kitchen.dispatch), run by one `manage.py dispatch_tickets`
+# process: it polls every INTERVAL seconds and rebuilds its state from the
+# database every RESYNC_SECONDS or when the menu changes. A cook holds at
+# most MAX_LOAD open lines (0: no limit); an experienced cook counts as
+# 1 + EXPERIENCE_WEIGHT * years cooks when comparing loads.
+
+KITCHEN_DISPATCH_MAX_LOAD = int(os.getenv('KITCHEN_DISPATCH_MAX_LOAD', 5)) or None
+
+KITCHEN_DISPATCH_EXPERIENCE_WEIGHT = float(os.getenv('KITCHEN_DISPATCH_EXPERIENCE_WEIGHT', 0.1))
+
+KITCHEN_DISPATCH_INTERVAL = float(os.getenv('KITCHEN_DISPATCH_INTERVAL', 0.5))
+
+KITCHEN_DISPATCH_RESYNC_SECONDS = int(os.getenv('KITCHEN_DISPATCH_RESYNC_SECONDS', 60))
+
+# In-process prefix index behind /kitchen/autocomplete/. Each worker builds
+# it on first use (in a background thread; the database answers meanwhile),
+# keeps it current from model signals, and rebuilds it once it is MAX_AGE
+# seconds old if other processes changed the menu. Tables with more than
+# MAX_ENTRIES rows are always served from the database.
+
+KITCHEN_AUTOCOMPLETE_MAX_ENTRIES = int(os.getenv('KITCHEN_AUTOCOMPLETE_MAX_ENTRIES', 200_000))
+
+KITCHEN_AUTOCOMPLETE_MAX_AGE = int(os.getenv('KITCHEN_AUTOCOMPLETE_MAX_AGE', 300))
+
+KITCHEN_AUTOCOMPLETE_BACKGROUND_BUILD = os.getenv('KITCHEN_AUTOCOMPLETE_BACKGROUND_BUILD', 'True') == 'True'
+
+KITCHEN_AUTOCOMPLETE_LIMIT = int(os.getenv('KITCHEN_AUTOCOMPLETE_LIMIT', 10))
+
+KITCHEN_AUTOCOMPLETE_MAX_LIMIT = int(os.getenv('KITCHEN_AUTOCOMPLETE_MAX_LIMIT', 50))
+
+# Equal-width price buckets per dish type in the /api/v1/analytics/
+# histograms. Run refresh_analytics after changing it.
+
+KITCHEN_ANALYTICS_HISTOGRAM_BINS = int(os.getenv('KITCHEN_ANALYTICS_HISTOGRAM_BINS', 10))
+
+# Live board events (kitchen.events), streamed by /kitchen/events/ under
+# ASGI. The local backend only reaches connections of the publishing
+# process; with several workers or a dispatch_tickets process use
+# 'kitchen.events.CacheBackend' with a shared KITCHEN_CACHE_BACKEND. A
+# client more than QUEUE_SIZE events behind is disconnected and catches up
+# from the last REPLAY events when it reconnects.
+
+KITCHEN_EVENTS_BACKEND = os.getenv('KITCHEN_EVENTS_BACKEND', 'kitchen.events.LocalBackend')
+
+KITCHEN_EVENTS_QUEUE_SIZE = int(os.getenv('KITCHEN_EVENTS_QUEUE_SIZE', 100))
+
+KITCHEN_EVENTS_REPLAY = int(os.getenv('KITCHEN_EVENTS_REPLAY', 200))
+
+KITCHEN_EVENTS_HEARTBEAT = float(os.getenv('KITCHEN_EVENTS_HEARTBEAT', 15))
+
+KITCHEN_EVENTS_RETRY_MS = int(os.getenv('KITCHEN_EVENTS_RETRY_MS', 3000))
+
+KITCHEN_EVENTS_POLL_INTERVAL = float(os.getenv('KITCHEN_EVENTS_POLL_INTERVAL', 0.5))
+
+KITCHEN_EVENTS_CACHE_TIMEOUT = int(os.getenv('KITCHEN_EVENTS_CACHE_TIMEOUT', 300))
+
+# Serve the read-only kitchen pages from kitchen.async_views. Opt-in, also
+# under ASGI: measured with the loadtest command they served about 0.6x the
+# requests per second of the sync views under WSGI.
+
+KITCHEN_ASYNC_VIEWS = os.getenv('KITCHEN_ASYNC_VIEWS', 'False') == 'True'
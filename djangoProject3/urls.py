@@ -14,17 +14,23 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 
-from kitchen.views import HomeView, UserRegistrationView
+from kitchen.async_views import AsyncHomeView
+from kitchen.views import HomeView, MetricsView, UserRegistrationView
+
+home_view = AsyncHomeView if settings.KITCHEN_ASYNC_VIEWS else HomeView
 
 urlpatterns = [
-    path('', HomeView.as_view(), name='home'),
+    path('', home_view.as_view(), name='home'),
     path('admin/', admin.site.urls),
     path('accounts/login/', auth_views.LoginView.as_view(), name='login'),
     path('accounts/logout/', auth_views.LogoutView.as_view(), name='logout'),
     path('register/', UserRegistrationView.as_view(), name='register'),
     path('kitchen/', include('kitchen.urls')),
+    path('api/v1/', include('kitchen.api_urls')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -0,0 +1,44 @@
+# Gunicorn deployment profiles, picked up automatically from the working
+# directory.
+#
+#   WSGI, threaded sync workers (the default):
+#       gunicorn
+#   ASGI, one uvicorn event loop per worker; KITCHEN_ASYNC_VIEWS=True also
+#   serves the read-only kitchen pages from kitchen.async_views:
+#       KITCHEN_SERVER_PROFILE=asgi gunicorn
+#   ASGI without gunicorn (single host, no worker supervision):
+#       uvicorn djangoProject3.asgi:application --workers 4 --lifespan off
+#
+# Compare the two profiles by starting both on different ports and running
+#       python manage.py loadtest http://127.0.0.1:8000/kitchen/dish/ http://127.0.0.1:8001/kitchen/dish/
+#
+# Every worker holds its own database connections: up to one per thread with
+# persistent connections, or KITCHEN_DB_POOL_MAX_SIZE with KITCHEN_DB_POOL=True
+# (see DATABASES in settings). Keep workers times that below the database's
+# max_connections, and watch kitchen_db_pool_saturation on /metrics/.
+#
+# Workers share nothing else unless KITCHEN_CACHE_BACKEND points at a shared
+# cache (file-based or Redis); the menu and user caches stay off until it does.
+
+import multiprocessing
+import os
+
+profile = os.getenv('KITCHEN_SERVER_PROFILE', 'wsgi')
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+keepalive = 5
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+max_requests = 5000
+max_requests_jitter = 500
+
+if profile == 'asgi':
+    wsgi_app = 'djangoProject3.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() + 1))
+else:
+    wsgi_app = 'djangoProject3.wsgi:application'
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
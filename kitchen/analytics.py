@@ -0,0 +1,170 @@
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import groupby
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Count
+
+from kitchen.models import Cook, Dish, PriceSummary
+
+CENT = Decimal('0.01')
+
+SUMMARY_FIELDS = ('dishes', 'min_price', 'max_price', 'avg_price', 'median_price', 'histogram')
+
+
+def _money(value):
+    return Decimal(repr(float(value))).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _bucket(price, low, high, bins):
+    # Equal-width buckets with the top edge included in the last one, the
+    # same rule the vectorized path below applies.
+    if high == low:
+        return 0
+    return min(int((price - low) / (high - low) * bins), bins - 1)
+
+
+def price_summary(dish_type_id, prices, bins):
+    """
+    PriceSummary for one dish type from its prices in ascending order.
+    """
+    prices = [float(price) for price in prices]
+    count = len(prices)
+    low, high = prices[0], prices[-1]
+    histogram = [0] * bins
+    for price in prices:
+        histogram[_bucket(price, low, high, bins)] += 1
+    return PriceSummary(
+        dish_type_id=dish_type_id,
+        dishes=count,
+        min_price=_money(low),
+        max_price=_money(high),
+        avg_price=_money(sum(prices) / count),
+        median_price=_money((prices[(count - 1) // 2] + prices[count // 2]) / 2),
+        histogram=histogram,
+    )
+
+
+def price_summaries_numpy(rows, bins):
+    """
+    The same summaries as price_summary() for every dish type at once.
+    rows are (dish_type_id, price) ordered by both; each statistic is one
+    array operation over all groups instead of a Python loop per dish.
+    """
+    import numpy as np
+
+    if not rows:
+        return []
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    prices = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+    type_ids, starts, counts = np.unique(ids, return_index=True, return_counts=True)
+    ends = starts + counts - 1
+
+    low = prices[starts]
+    high = prices[ends]
+    avg = np.add.reduceat(prices, starts) / counts
+    median = (prices[starts + (counts - 1) // 2] + prices[starts + counts // 2]) / 2
+
+    group = np.repeat(np.arange(len(type_ids)), counts)
+    span = (high - low)[group]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bucket = np.where(span > 0, (prices - low[group]) / span * bins, 0).astype(np.int64)
+    bucket = np.minimum(bucket, bins - 1)
+    histograms = np.bincount(group * bins + bucket, minlength=len(type_ids) * bins).reshape(-1, bins)
+
+    return [
+        PriceSummary(
+            dish_type_id=int(type_ids[i]),
+            dishes=int(counts[i]),
+            min_price=_money(low[i]),
+            max_price=_money(high[i]),
+            avg_price=_money(avg[i]),
+            median_price=_money(median[i]),
+            histogram=histograms[i].tolist(),
+        )
+        for i in range(len(type_ids))
+    ]
+
+
+def _save(summaries, stale):
+    db = router.db_for_write(PriceSummary)
+    with transaction.atomic(using=db):
+        stale.delete()
+        PriceSummary.objects.using(db).bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['dish_type'],
+            update_fields=SUMMARY_FIELDS + ('refreshed_at',),
+        )
+
+
+def refresh_price_summaries(dish_type_ids=None):
+    """
+    Recompute the PriceSummary rows of the given dish types from one
+    (dish_type, price) index scan, or rebuild the whole table with NumPy
+    when dish_type_ids is None. Returns the number of rows written.
+    """
+    bins = settings.KITCHEN_ANALYTICS_HISTOGRAM_BINS
+    rows = Dish.objects.order_by('dish_type_id', 'price').values_list('dish_type_id', 'price')
+    if dish_type_ids is None:
+        summaries = price_summaries_numpy(list(rows), bins)
+        stale = PriceSummary.objects.exclude(dish_type_id__in=[s.dish_type_id for s in summaries])
+    else:
+        dish_type_ids = set(dish_type_ids)
+        if not dish_type_ids:
+            return 0
+        summaries = [
+            price_summary(dish_type_id, [price for _, price in group], bins)
+            for dish_type_id, group in groupby(rows.filter(dish_type_id__in=dish_type_ids), key=lambda row: row[0])
+        ]
+        stale = PriceSummary.objects.filter(dish_type_id__in=dish_type_ids - {s.dish_type_id for s in summaries})
+    _save(summaries, stale)
+    return len(summaries)
+
+
+def cook_workload():
+    """
+    How many cooks have each number of dishes, read from the denormalized
+    Cook.dish_count (see kitchen.counters) with one grouped query.
+    """
+    distribution = list(
+        Cook.objects.order_by('dish_count').values('dish_count').annotate(cooks=Count('id')).values_list(
+            'dish_count', 'cooks'
+        )
+    )
+    total = sum(cooks for _, cooks in distribution)
+
+    def percentile(fraction):
+        seen = 0
+        for dishes, cooks in distribution:
+            seen += cooks
+            if seen >= fraction * total:
+                return dishes
+        return None
+
+    return {
+        'cooks': total,
+        'distribution': [{'dishes': dishes, 'cooks': cooks} for dishes, cooks in distribution],
+        'median': percentile(0.5),
+        'p90': percentile(0.9),
+        'max': distribution[-1][0] if distribution else None,
+    }
+
+
+def menu_analytics():
+    summaries = PriceSummary.objects.filter(dish_type__deleted_at__isnull=True).select_related('dish_type').only(
+        'dish_type__name', 'refreshed_at', *SUMMARY_FIELDS
+    ).order_by('dish_type__name', 'dish_type_id')
+    return {
+        'dish_types': [
+            {
+                'id': summary.dish_type_id,
+                'name': summary.dish_type.name,
+                **{field: getattr(summary, field) for field in SUMMARY_FIELDS},
+                'refreshed_at': summary.refreshed_at,
+            }
+            for summary in summaries
+        ],
+        'histogram_bins': settings.KITCHEN_ANALYTICS_HISTOGRAM_BINS,
+        'cook_workload': cook_workload(),
+    }
@@ -0,0 +1,206 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.views import View
+
+from kitchen.analytics import menu_analytics
+from kitchen.cache import cached_menu, menu_version
+from kitchen.exports import aiterate, buffered
+from kitchen.models import Cook, Dish, DishType
+from kitchen.pagination import decode_cursor, encode_cursor
+
+
+class ApiError(Exception):
+    pass
+
+
+class Resource:
+    """
+    Describes how one model is exposed: which fields may be selected, which
+    are returned by default, and how each one is read from an instance.
+    """
+    model = None
+    fields = ()
+    default_fields = ()
+    relations = {}
+
+    def parse_fields(self, raw):
+        if not raw:
+            return self.default_fields
+        requested = tuple(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+        unknown = set(requested) - set(self.fields)
+        if unknown:
+            raise ApiError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+        return requested
+
+    def get_queryset(self, fields):
+        columns = [field for field in fields if field not in self.relations]
+        queryset = self.model._default_manager.only('id', 'updated_at', *columns)
+        for field in fields:
+            if field in self.relations:
+                queryset = queryset.prefetch_related(
+                    Prefetch(field, queryset=self.relations[field]._default_manager.only('id'))
+                )
+        return queryset
+
+    def serialize(self, obj, fields):
+        data = {}
+        for field in fields:
+            if field in self.relations:
+                data[field] = [related.id for related in getattr(obj, field).all()]
+            else:
+                data[field] = getattr(obj, field)
+        return data
+
+
+class DishResource(Resource):
+    model = Dish
+    fields = ('id', 'name', 'description', 'price', 'dish_type', 'cooks', 'updated_at')
+    default_fields = fields
+    relations = {'cooks': Cook}
+
+    def serialize(self, obj, fields):
+        data = super().serialize(obj, [field for field in fields if field != 'dish_type'])
+        if 'dish_type' in fields:
+            data['dish_type'] = obj.dish_type_id
+        return {field: data[field] for field in fields}
+
+
+class DishTypeResource(Resource):
+    model = DishType
+    fields = ('id', 'name', 'updated_at')
+    default_fields = fields
+
+
+class CookResource(Resource):
+    model = Cook
+    fields = ('id', 'username', 'first_name', 'last_name', 'years_of_experience', 'dishes', 'updated_at')
+    default_fields = ('id', 'username', 'first_name', 'last_name', 'years_of_experience', 'updated_at')
+    relations = {'dishes': Dish}
+
+
+def make_etag(versions, fields, extra=''):
+    digest = hashlib.md5(
+        json.dumps([versions, fields, extra], cls=DjangoJSONEncoder).encode()
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+class ApiView(View):
+    resource = None
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+
+class ApiListView(ApiView):
+    """
+    Keyset-paginated collection ordered by id. The weak ETag covers the
+    (id, updated_at) pairs of the requested page, so an unchanged page is
+    answered with 304 after a single narrow query; otherwise rows are
+    streamed from a server-side iterator.
+    """
+
+    def get_limit(self):
+        raw = self.request.GET.get('limit', settings.KITCHEN_API_PAGE_SIZE)
+        try:
+            limit = int(raw)
+        except (TypeError, ValueError):
+            raise ApiError("limit must be an integer.")
+        if not 1 <= limit <= settings.KITCHEN_API_MAX_PAGE_SIZE:
+            raise ApiError(f"limit must be between 1 and {settings.KITCHEN_API_MAX_PAGE_SIZE}.")
+        return limit
+
+    def get(self, request):
+        fields = self.resource.parse_fields(request.GET.get('fields'))
+        limit = self.get_limit()
+        queryset = self.resource.get_queryset(fields).order_by('id')
+
+        cursor = request.GET.get('cursor')
+        if cursor:
+            try:
+                _, (after,) = decode_cursor(cursor)
+                after = int(after)
+            except (Http404, TypeError, ValueError):
+                raise ApiError("Invalid cursor.")
+            queryset = queryset.filter(id__gt=after)
+
+        versions = list(queryset.prefetch_related(None).values_list('id', 'updated_at')[:limit + 1])
+        has_more = len(versions) > limit
+        versions = versions[:limit]
+
+        etag = make_etag(versions, fields)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+
+        next_url = None
+        if has_more:
+            params = request.GET.copy()
+            params['cursor'] = encode_cursor([versions[-1][0]])
+            next_url = f'{request.path}?{params.urlencode()}'
+
+        if versions:
+            rows = queryset.filter(id__lte=versions[-1][0]).iterator(chunk_size=settings.KITCHEN_API_CHUNK_SIZE)
+        else:
+            rows = iter(())
+        chunks = self.stream(rows, fields, next_url)
+        if isinstance(request, ASGIRequest):
+            chunks = aiterate(buffered(chunks))
+        response = StreamingHttpResponse(chunks, content_type='application/json')
+        response['ETag'] = etag
+        return response
+
+    def stream(self, rows, fields, next_url):
+        encoder = DjangoJSONEncoder()
+        yield '{"results": ['
+        for i, obj in enumerate(rows):
+            yield (',' if i else '') + encoder.encode(self.resource.serialize(obj, fields))
+        yield '], "next": ' + encoder.encode(next_url) + '}'
+
+
+class ApiDetailView(ApiView):
+    def get(self, request, pk):
+        fields = self.resource.parse_fields(request.GET.get('fields'))
+        queryset = self.resource.get_queryset(fields)
+        updated_at = get_object_or_404(queryset.prefetch_related(None).values_list('updated_at', flat=True), pk=pk)
+
+        etag = make_etag([pk, updated_at], fields)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+
+        obj = get_object_or_404(queryset, pk=pk)
+        response = JsonResponse(self.resource.serialize(obj, fields))
+        response['ETag'] = etag
+        return response
+
+
+class ApiAnalyticsView(View):
+    """
+    Price statistics per dish type and the cook workload distribution,
+    served from the PriceSummary table and the dish_count counters. The
+    payload is cached, and its ETag changes, with the menu version; both
+    are off while menu caching is (see KITCHEN_CACHE_TIMEOUT).
+    """
+
+    def get(self, request):
+        if not settings.KITCHEN_CACHE_TIMEOUT:
+            return JsonResponse(menu_analytics())
+        etag = make_etag([menu_version()], ['analytics'])
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+        response = JsonResponse(cached_menu('api:analytics', menu_analytics))
+        response['ETag'] = etag
+        return response
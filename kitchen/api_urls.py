@@ -0,0 +1,15 @@
+from django.urls import path
+
+from kitchen.api import ApiAnalyticsView, ApiDetailView, ApiListView, CookResource, DishResource, DishTypeResource
+
+app_name = 'api'
+
+urlpatterns = [
+    path('dishes/', ApiListView.as_view(resource=DishResource()), name='dish-list'),
+    path('dishes/<int:pk>/', ApiDetailView.as_view(resource=DishResource()), name='dish-detail'),
+    path('dish-types/', ApiListView.as_view(resource=DishTypeResource()), name='dish-type-list'),
+    path('dish-types/<int:pk>/', ApiDetailView.as_view(resource=DishTypeResource()), name='dish-type-detail'),
+    path('cooks/', ApiListView.as_view(resource=CookResource()), name='cook-list'),
+    path('cooks/<int:pk>/', ApiDetailView.as_view(resource=CookResource()), name='cook-detail'),
+    path('analytics/', ApiAnalyticsView.as_view(), name='analytics'),
+]
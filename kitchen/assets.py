@@ -0,0 +1,131 @@
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+
+# Third-party assets vendored into static/vendor/ by `manage.py build_static`,
+# with the Subresource Integrity hashes published for these releases. The
+# CDN URLs double as the fallback used until the bundle has been built.
+VENDOR_CSS = [
+    (
+        'vendor/bootstrap-4.5.2.min.css',
+        'https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css',
+        'sha384-JcKb8q3iqJ61gNV9KGb8thSsNjpSL0n8PARn9HuZOnIxN0hoP+VmmDGMN5t9UJ0Z',
+    ),
+]
+VENDOR_JS = [
+    (
+        'vendor/jquery-3.5.1.slim.min.js',
+        'https://code.jquery.com/jquery-3.5.1.slim.min.js',
+        'sha384-DfXdz2htPH0lsSSs5nCTpuj/zy4C+OGpamoFVy38MVBnE+IbbVYUew+OrCXaRkfj',
+    ),
+    (
+        'vendor/bootstrap-4.5.2.bundle.min.js',
+        'https://cdn.jsdelivr.net/npm/bootstrap@4.5.2/dist/js/bootstrap.bundle.min.js',
+        'sha384-LtrjvnR4Twt/qOuYxE721u19sVFLVSA4hf/rRt6PrZTmiPltdZcI7q7PXQBYTKyf',
+    ),
+]
+# Project files appended after the vendored ones in each bundle.
+LOCAL_CSS = ['css/style.css']
+LOCAL_JS = ['js/lookup.js', 'js/autocomplete.js', 'js/live.js']
+
+BUNDLE_CSS = 'dist/kitchen.css'
+BUNDLE_JS = 'dist/kitchen.js'
+
+# Classes that only Bootstrap's JavaScript adds, so no template mentions them.
+SAFELIST = {'show', 'showing', 'collapsing', 'fade', 'active', 'disabled', 'was-validated'}
+
+_TOKEN = re.compile(r'[A-Za-z0-9_-]+')
+_CLASS = re.compile(r'\.(-?[A-Za-z_][A-Za-z0-9_-]*)')
+
+
+def template_tokens():
+    """
+    Every word-like token in the project's and installed apps' templates
+    (including crispy-forms' Bootstrap layouts) and in the project scripts,
+    which set classes of their own. Deliberately loose: a class only has to
+    appear somewhere to be kept.
+    """
+    tokens = set(SAFELIST)
+    paths = [Path(settings.STATICFILES_DIRS[0]) / path for path in LOCAL_JS]
+    for engine in engines.all():
+        for directory in getattr(engine, 'template_dirs', ()):
+            paths.extend(Path(directory).rglob('*.html'))
+    for path in paths:
+        tokens.update(_TOKEN.findall(path.read_text(encoding='utf-8', errors='ignore')))
+    return tokens
+
+
+def _split_top_level(text, separator):
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(text):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _blocks(css):
+    """
+    Yield (prelude, body) for each top-level block of minified CSS, and
+    (comment, None) for top-level comments.
+    """
+    i, length = 0, len(css)
+    while i < length:
+        if css.startswith('/*', i):
+            end = css.index('*/', i) + 2
+            yield css[i:end], None
+            i = end
+            continue
+        brace = css.find('{', i)
+        if brace == -1:
+            return
+        depth, j, quote = 1, brace + 1, None
+        while depth:
+            char = css[j]
+            if quote:
+                if char == '\\':
+                    j += 1
+                elif char == quote:
+                    quote = None
+            elif char in '"\'':
+                quote = char
+            elif char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+            j += 1
+        yield css[i:brace].strip(), css[brace + 1:j - 1]
+        i = j
+
+
+def trim_css(css, used):
+    """
+    Drop every selector that names a class not in used, and every rule or
+    @media block left with no selectors. Other at-rules are kept as-is.
+    """
+    output = []
+    for prelude, body in _blocks(css):
+        if body is None:
+            if prelude.startswith('/*!'):
+                output.append(prelude)
+        elif prelude.startswith(('@media', '@supports')):
+            inner = trim_css(body, used)
+            if inner:
+                output.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            output.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [
+                selector for selector in _split_top_level(prelude, ',')
+                if set(_CLASS.findall(selector)) <= used
+            ]
+            if selectors:
+                output.append(f"{','.join(selectors)}{{{body}}}")
+    return '\n'.join(output)
@@ -0,0 +1,89 @@
+import asyncio
+
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404
+
+from kitchen.cache import acached_menu
+from kitchen.models import Cook, Dish
+from kitchen.views import CookDetailView, CookListView, DishDetailView, DishListView, HomeView
+
+# Async variants of the read-only pages, routed instead of the sync views
+# when KITCHEN_ASYNC_VIEWS is on.
+# Queries go through the async ORM; templates still render in Django's
+# sync_to_async worker, as for every TemplateResponse under ASGI.
+
+
+class AsyncListMixin:
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        page_size = self.get_paginate_by(self.object_list)
+        if page_size:
+            self._page = await self.apaginate_queryset(self.object_list, page_size)
+        return self.render_to_response(self.get_context_data())
+
+    def paginate_queryset(self, queryset, page_size):
+        return self._page
+
+    async def apaginate_queryset(self, queryset, page_size):
+        if self.use_keyset_pagination():
+            paginator = self.get_keyset_paginator(queryset, page_size)
+            page = await paginator.apage(self.request.GET.get(self.cursor_kwarg))
+            return paginator, page, page.object_list, page.has_other_pages()
+
+        paginator = Paginator(queryset, page_size, allow_empty_first_page=self.get_allow_empty())
+        # Paginator.count is a cached_property; fill it without a sync query.
+        paginator.count = await queryset.acount()
+        page_number = self.request.GET.get(self.page_kwarg) or 1
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as e:
+            raise Http404(str(e))
+        bottom = (number - 1) * page_size
+        object_list = [obj async for obj in queryset[bottom:bottom + page_size]]
+        page = paginator._get_page(object_list, number, paginator)
+        return paginator, page, object_list, page.has_other_pages()
+
+
+class AsyncDetailMixin:
+    async def get(self, request, *args, **kwargs):
+        try:
+            self.object = await self.get_queryset().aget(pk=self.kwargs[self.pk_url_kwarg])
+        except self.model.DoesNotExist:
+            raise Http404(f"No {self.model._meta.verbose_name} found matching the query")
+        return self.render_to_response(self.get_context_data(object=self.object))
+
+
+class AsyncDishListView(AsyncListMixin, DishListView):
+    pass
+
+
+class AsyncCookListView(AsyncListMixin, CookListView):
+    pass
+
+
+class AsyncDishDetailView(AsyncDetailMixin, DishDetailView):
+    pass
+
+
+class AsyncCookDetailView(AsyncDetailMixin, CookDetailView):
+    pass
+
+
+async def _first_dishes():
+    return [dish async for dish in Dish.objects.values('id', 'name')[:5]]
+
+
+async def _first_cooks():
+    return [cook async for cook in Cook.objects.values('id', 'username')[:5]]
+
+
+class AsyncHomeView(HomeView):
+    async def get(self, request, *args, **kwargs):
+        dishes, cooks = await asyncio.gather(
+            acached_menu('home:dishes', _first_dishes),
+            acached_menu('home:cooks', _first_cooks),
+        )
+        context = super(HomeView, self).get_context_data(**kwargs)
+        context['dishes'] = dishes
+        context['cooks'] = cooks
+        return self.render_to_response(context)
@@ -0,0 +1,71 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+_users = {}
+_lock = threading.Lock()
+
+
+def generation_key(user_id):
+    return f'kitchen:cook:{user_id}:generation'
+
+
+def invalidate_cook(user_id):
+    """
+    Drop a cook from this process's cache and bump its generation in the
+    shared cache, so other processes drop their copy on the next request.
+    """
+    with _lock:
+        _users.pop(user_id, None)
+    key = generation_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def clear():
+    with _lock:
+        _users.clear()
+
+
+def _store(user_id, entry):
+    with _lock:
+        if user_id not in _users and len(_users) >= settings.KITCHEN_USER_CACHE_MAX_ENTRIES:
+            now = time.monotonic()
+            for key in [key for key, (expires, _, _) in _users.items() if expires <= now]:
+                del _users[key]
+            if len(_users) >= settings.KITCHEN_USER_CACHE_MAX_ENTRIES:
+                del _users[next(iter(_users))]
+        _users[user_id] = entry
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that keeps the cooks resolved by get_user() in a per-process
+    cache for KITCHEN_USER_CACHE_SECONDS. AuthenticationMiddleware calls
+    get_user() on every request, so a warm cache saves a Cook SELECT per
+    page view; what remains is one shared-cache read of the cook's
+    generation, which kitchen.signals bumps whenever the cook is saved
+    (including password changes) or deleted.
+    """
+
+    def get_user(self, user_id):
+        ttl = settings.KITCHEN_USER_CACHE_SECONDS
+        if not ttl:
+            return super().get_user(user_id)
+        generation = cache.get(generation_key(user_id))
+        now = time.monotonic()
+        with _lock:
+            entry = _users.get(user_id)
+        if entry is not None and entry[0] > now and entry[1] == generation:
+            return copy.copy(entry[2])
+        user = super().get_user(user_id)
+        if user is None:
+            return None
+        _store(user_id, (now + ttl, generation, user))
+        return copy.copy(user)
@@ -0,0 +1,199 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connections
+
+from kitchen.cache import menu_version
+from kitchen.metrics import registry
+from kitchen.models import Cook, Dish, DishType
+
+# Autocomplete name -> (model, field suggested).
+SOURCES = {
+    'dishes': (Dish, 'name'),
+    'dish-types': (DishType, 'name'),
+    'cooks': (Cook, 'username'),
+}
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixIndex:
+    """
+    Case-insensitive prefix search over (casefolded text, text, id) tuples
+    kept in one sorted list: a lookup is a bisect to the first match and a
+    walk of at most limit distinct texts. Updates are O(n) list inserts,
+    which stays well under a millisecond at the size bound.
+    """
+
+    def __init__(self, rows, version=None):
+        self.entries = sorted((text.casefold(), text, pk) for pk, text in rows)
+        self.texts = {pk: text for _, text, pk in self.entries}
+        self.version = version
+        self.built_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, prefix, limit):
+        prefix = prefix.casefold()
+        results = []
+        with self.lock:
+            i = bisect_left(self.entries, (prefix,))
+            while i < len(self.entries) and len(results) < limit:
+                key, text, _ = self.entries[i]
+                if not key.startswith(prefix):
+                    break
+                if not results or results[-1] != text:
+                    results.append(text)
+                i += 1
+        return results
+
+    def _remove(self, pk):
+        text = self.texts.pop(pk, None)
+        if text is not None:
+            entry = (text.casefold(), text, pk)
+            i = bisect_left(self.entries, entry)
+            if i < len(self.entries) and self.entries[i] == entry:
+                del self.entries[i]
+
+    def update(self, pk, text):
+        with self.lock:
+            self._remove(pk)
+            insort(self.entries, (text.casefold(), text, pk))
+            self.texts[pk] = text
+
+    def discard(self, pk):
+        with self.lock:
+            self._remove(pk)
+
+
+_indexes = {}
+_building = set()
+_lock = threading.Lock()
+
+
+def build(kind):
+    """
+    Load one index from the database and install it. A table larger than
+    KITCHEN_AUTOCOMPLETE_MAX_ENTRIES gets no index and is served by the
+    database fallback until the next reset().
+    """
+    model, field = SOURCES[kind]
+    version = menu_version()
+    rows = list(
+        model.objects.order_by().values_list('id', field)[:settings.KITCHEN_AUTOCOMPLETE_MAX_ENTRIES + 1]
+    )
+    index = None
+    if len(rows) <= settings.KITCHEN_AUTOCOMPLETE_MAX_ENTRIES:
+        index = PrefixIndex(rows, version)
+    with _lock:
+        _indexes[kind] = index
+        _building.discard(kind)
+    return index
+
+
+def _build_in_background(kind):
+    with _lock:
+        if kind in _building:
+            return
+        _building.add(kind)
+    try:
+        threading.Thread(target=_build_quietly, args=(kind,), daemon=True).start()
+    except RuntimeError:
+        with _lock:
+            _building.discard(kind)
+
+
+def _build_quietly(kind):
+    try:
+        build(kind)
+    except Exception:
+        logger.exception("Could not build the %s autocomplete index", kind)
+        with _lock:
+            _building.discard(kind)
+    finally:
+        connections.close_all()
+
+
+def get_index(kind):
+    """
+    The ready index for kind, or None while it is first being built in a
+    background thread. An index older than KITCHEN_AUTOCOMPLETE_MAX_AGE is
+    rebuilt in the background if the menu changed since, which picks up
+    writes made by other processes; it keeps serving meanwhile.
+    """
+    with _lock:
+        index = _indexes.get(kind)
+        known = kind in _indexes
+    if not known:
+        if settings.KITCHEN_AUTOCOMPLETE_BACKGROUND_BUILD:
+            _build_in_background(kind)
+            return None
+        return build(kind)
+    if index is not None and time.monotonic() - index.built_at > settings.KITCHEN_AUTOCOMPLETE_MAX_AGE:
+        if menu_version() != index.version:
+            _build_in_background(kind)
+        else:
+            index.built_at = time.monotonic()
+    return index
+
+
+def suggest(kind, prefix, limit):
+    """
+    Up to limit distinct texts starting with prefix, and where they came
+    from: 'index', or 'database' during cold start and for tables over the
+    size bound.
+    """
+    index = get_index(kind)
+    if index is not None:
+        return index.search(prefix, limit), 'index'
+    model, field = SOURCES[kind]
+    texts = (
+        model.objects.filter(**{f'{field}__istartswith': prefix})
+        .order_by(field).values_list(field, flat=True).distinct()[:limit]
+    )
+    return list(texts), 'database'
+
+
+def update(kind, pk, text):
+    with _lock:
+        index = _indexes.get(kind)
+    if index is None:
+        return
+    if pk not in index.texts and len(index) >= settings.KITCHEN_AUTOCOMPLETE_MAX_ENTRIES:
+        # Over the bound: drop the index and let the next build decide.
+        reset(kind)
+        return
+    index.update(pk, text)
+
+
+def discard(kind, pk):
+    with _lock:
+        index = _indexes.get(kind)
+    if index is not None:
+        index.discard(pk)
+
+
+def reset(kind=None):
+    with _lock:
+        if kind is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(kind, None)
+
+
+def autocomplete_gauges():
+    with _lock:
+        indexes = dict(_indexes)
+    for kind, index in sorted(indexes.items()):
+        yield (
+            'kitchen_autocomplete_entries', "Entries in this process's autocomplete index; -1 if over the size bound.",
+            {'kind': kind}, -1 if index is None else len(index),
+        )
+
+
+registry.register_gauges(autocomplete_gauges)
@@ -0,0 +1,287 @@
+import collections
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from kitchen.analytics import refresh_price_summaries
+from kitchen.cache import bump_menu_version
+from kitchen.counters import reconcile_dish_counts
+from kitchen.dispatch import Dispatcher
+from kitchen.models import Cook, DeletionJob, Dish, DishType, Ticket, TicketLine
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'bench_baseline.json'
+
+# URL name prefixes mapped to the model whose pk fills <int:pk>.
+ROUTE_OBJECTS = (
+    ('dish-type', DishType),
+    ('dish', Dish),
+    ('cook', Cook),
+    ('ticket-line', TicketLine),
+    ('ticket', Ticket),
+    ('deletion-job', DeletionJob),
+)
+
+# Values for the other URL arguments.
+ROUTE_ARGUMENTS = {
+    'kitchen:export': {'kind': 'dishes', 'fmt': 'csv'},
+    'kitchen:lookup': {'kind': 'dishes'},
+    'kitchen:autocomplete': {'kind': 'dishes'},
+}
+
+SKIPPED_NAMESPACES = ('admin',)
+
+
+def seed_kitchen(
+    dishes=100_000, cooks=5_000, dish_types=200, cooks_per_dish=3, tickets=1_000, batch_size=5_000, seed=0
+):
+    """
+    Fill the current database with a synthetic kitchen using bulk inserts.
+    """
+    rng = random.Random(seed)
+    DishType.objects.bulk_create(
+        (DishType(name=f'Type {i:04d}') for i in range(dish_types)), batch_size=batch_size
+    )
+    Cook.objects.bulk_create(
+        (
+            Cook(username=f'cook{i:06d}', password='!', years_of_experience=rng.randint(0, 40))
+            for i in range(cooks)
+        ),
+        batch_size=batch_size,
+    )
+    type_ids = list(DishType.objects.values_list('id', flat=True))
+    cook_ids = list(Cook.objects.values_list('id', flat=True))
+    Dish.objects.bulk_create(
+        (
+            Dish(
+                name=f'Dish {i:07d}',
+                description=f'Synthetic dish number {i} with a reasonably long description.',
+                price=Decimal(rng.randint(100, 99_999)) / 100,
+                dish_type_id=rng.choice(type_ids),
+            )
+            for i in range(dishes)
+        ),
+        batch_size=batch_size,
+    )
+    through = Dish.cooks.through
+    links = (
+        through(dish_id=dish_id, cook_id=cook_id)
+        for dish_id in Dish.objects.values_list('id', flat=True).iterator()
+        for cook_id in rng.sample(cook_ids, min(cooks_per_dish, len(cook_ids)))
+    )
+    through.objects.bulk_create(links, batch_size=batch_size)
+    dish_ids = list(Dish.objects.values_list('id', flat=True))
+    created = Ticket.objects.bulk_create(
+        (Ticket(note=f'Table {i % 40}') for i in range(tickets)), batch_size=batch_size,
+    )
+    TicketLine.objects.bulk_create(
+        (TicketLine(ticket=ticket, dish_id=rng.choice(dish_ids)) for ticket in created for _ in range(3)),
+        batch_size=batch_size,
+    )
+    # A finished purge, for the deletion progress route.
+    DeletionJob.objects.create(
+        model='kitchen.dishtype', object_id=0, object_repr='Type removed', status=DeletionJob.Status.DONE
+    )
+    reconcile_dish_counts()
+    refresh_price_summaries()
+    bump_menu_version()
+
+
+def iter_route_names(patterns=None, namespace=None):
+    """
+    Yield (url name, required kwargs) for every named route in the project.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIPPED_NAMESPACES:
+                continue
+            child_namespace = pattern.namespace
+            if namespace and child_namespace:
+                child_namespace = f'{namespace}:{child_namespace}'
+            yield from iter_route_names(pattern.url_patterns, child_namespace or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, tuple(pattern.pattern.converters)
+
+
+def middle_pk(model):
+    return model.objects.order_by('pk').values_list('pk', flat=True)[model.objects.count() // 2:].first()
+
+
+def build_routes():
+    """
+    Map every route name to a concrete URL, using a mid-table object for
+    <int:pk>. Routes whose arguments cannot be filled are left out.
+    """
+    routes = {}
+    for name, kwargs in iter_route_names():
+        values = dict(ROUTE_ARGUMENTS.get(name, {}))
+        for kwarg in set(kwargs) - values.keys():
+            model = next(
+                (model for prefix, model in ROUTE_OBJECTS if name.split(':')[-1].startswith(prefix)), None
+            )
+            pk = middle_pk(model) if kwarg == 'pk' and model is not None else None
+            if pk is None:
+                break
+            values[kwarg] = pk
+        else:
+            routes[name] = reverse(name, kwargs=values)
+    return routes
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def get(client, url):
+    response = client.get(url)
+    # A streamed body is produced while it is read, one chunk at a time.
+    for _ in getattr(response, 'streaming_content', ()):
+        pass
+    return response
+
+
+def measure_routes(routes, iterations=20, user=None):
+    """
+    Request every route with the test client and return per-route query
+    counts, p50/p95 latency in milliseconds and peak allocated KiB.
+    """
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    results = {}
+    for name, url in routes.items():
+        get(client, url)  # warm up template and URL caches
+        timings = []
+        queries = 0
+        status = None
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = get(client, url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len(captured))
+            status = response.status_code
+
+        tracemalloc.start()
+        get(client, url)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = {
+            'url': url,
+            'status': status,
+            'queries': queries,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'memory_kb': round(peak / 1024, 1),
+        }
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baseline(results, size, path=BASELINE_PATH):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'size': size, 'routes': results}, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def compare_to_baseline(results, baseline, size=None, tolerance=1.5):
+    """
+    Return a list of human-readable regressions. Query counts must not grow
+    at all; latency and memory may grow by the tolerance factor, and are
+    only compared when the dataset size matches the one in the baseline.
+    A route missing from the baseline is a failure too, so new routes get
+    measured.
+    """
+    failures = []
+    same_size = size is not None and baseline.get('size') == size
+    for name, result in results.items():
+        expected = baseline.get('routes', {}).get(name)
+        if expected is None:
+            failures.append(f"{name}: not in the baseline, run bench_kitchen --update-baseline")
+            continue
+        if result['queries'] > expected['queries']:
+            failures.append(f"{name}: {result['queries']} queries, baseline {expected['queries']}")
+        if not same_size:
+            continue
+        for metric in ('p95_ms', 'memory_kb'):
+            if result[metric] > expected[metric] * tolerance:
+                failures.append(f"{name}: {metric} {result[metric]}, baseline {expected[metric]}")
+    return failures
+
+
+def bench_dispatcher(cooks=5_000, dishes=100_000, cooks_per_dish=3, lines=200_000, max_load=5, seed=0):
+    """
+    Drive a Dispatcher with a synthetic kitchen, no database involved:
+    lines for random dishes arrive while the oldest assignments are
+    finished, keeping the kitchen about 90% busy. Returns the build time,
+    assignments per second and the time to rebuild the final state the
+    way DispatchLoop.rebuild() does.
+    """
+    rng = random.Random(seed)
+    years = [rng.randint(0, 40) for _ in range(cooks)]
+    skills = [[] for _ in range(cooks)]
+    for dish_id in range(dishes):
+        for cook_id in rng.sample(range(cooks), min(cooks_per_dish, cooks)):
+            skills[cook_id].append(dish_id)
+
+    started = time.perf_counter()
+    dispatcher = Dispatcher(max_load, experience_weight=0.1)
+    for cook_id in range(cooks):
+        dispatcher.add_cook(cook_id, years[cook_id], skills[cook_id])
+    build_ms = (time.perf_counter() - started) * 1000
+
+    arrivals = [rng.randrange(dishes) for _ in range(lines)]
+    busy = int(cooks * (max_load or 5) * 0.9)
+    in_progress = collections.deque()
+    assigned = 0
+    started = time.perf_counter()
+    for line_id, dish_id in enumerate(arrivals):
+        cook_id = dispatcher.submit(line_id, dish_id, line_id)
+        if cook_id is not None:
+            in_progress.append(cook_id)
+            assigned += 1
+        while len(in_progress) > busy:
+            for _, freed in dispatcher.finish(in_progress.popleft()):
+                in_progress.append(freed)
+                assigned += 1
+    elapsed = time.perf_counter() - started
+
+    loads = {cook_id: cook.load for cook_id, cook in dispatcher.cooks.items()}
+    waiting = sorted(entry + (dish_id,) for dish_id, heap in dispatcher.waiting.items() for entry in heap)
+    started = time.perf_counter()
+    rebuilt = Dispatcher(max_load, experience_weight=0.1)
+    for cook_id in range(cooks):
+        rebuilt.add_cook(cook_id, years[cook_id], skills[cook_id], loads[cook_id])
+    for queued_at, line_id, dish_id in waiting:
+        rebuilt.submit(line_id, dish_id, queued_at)
+    rebuild_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        'build_ms': round(build_ms, 1),
+        'lines': lines,
+        'assigned': assigned,
+        'waiting': dispatcher.queued,
+        'per_second': round(assigned / elapsed),
+        'rebuild_ms': round(rebuild_ms, 1),
+        'rebuild_lines': len(waiting) + sum(loads.values()),
+    }
@@ -0,0 +1,117 @@
+from decimal import Decimal
+
+from django.db import router, transaction
+from django.db.models import F, Max
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from kitchen import events
+from kitchen.analytics import refresh_price_summaries
+from kitchen.cache import bump_menu_version
+from kitchen.counters import recount_dish_counts
+from kitchen.models import Cook, Dish, DishType
+from kitchen.signals import touch
+
+MAX_PRICE = Decimal('9999.99')
+
+
+class BulkError(Exception):
+    pass
+
+
+def _selection(dishes):
+    # A plain pk__in subquery, so ranked or annotated search querysets can
+    # be updated, and the operation stays one statement however many rows.
+    return Dish.objects.filter(pk__in=dishes.order_by().values('pk'))
+
+
+def _dish_type_ids(dishes):
+    return set(dishes.order_by().values_list('dish_type_id', flat=True).distinct())
+
+
+def change_prices(dishes, price=None, percent=None):
+    """
+    Set the price of every dish in dishes to price, or scale it by
+    percent (e.g. 10 or -15), with one UPDATE. Returns the number of
+    dishes changed.
+    """
+    dishes = _selection(dishes)
+    if percent is not None:
+        factor = (100 + Decimal(percent)) / 100
+        value = Round(F('price') * factor, 2)
+    else:
+        value = price
+    with transaction.atomic(using=router.db_for_write(Dish)):
+        if percent is not None:
+            highest = dishes.aggregate(highest=Max('price'))['highest']
+            if highest is not None and highest * factor > MAX_PRICE:
+                raise BulkError(f"Prices would exceed {MAX_PRICE}.")
+        dish_type_ids = _dish_type_ids(dishes)
+        changed = dishes.update(price=value, updated_at=timezone.now())
+        refresh_price_summaries(dish_type_ids)
+    transaction.on_commit(bump_menu_version)
+    events.publish('dish', action='bulk', count=changed)
+    return changed
+
+
+def assign_cooks(dishes, cooks):
+    """
+    Add every cook to every dish with one bulk_create on the through
+    table. Returns the number of assignments added.
+    """
+    through = Dish.cooks.through
+    cook_ids = {cook.pk for cook in cooks}
+    with transaction.atomic(using=router.db_for_write(through)):
+        dish_ids = list(_selection(dishes).values_list('pk', flat=True))
+        existing = set(
+            through.objects.filter(dish_id__in=dishes.order_by().values('pk'), cook_id__in=cook_ids)
+            .values_list('dish_id', 'cook_id')
+        )
+        rows = [
+            through(dish_id=dish_id, cook_id=cook_id)
+            for dish_id in dish_ids for cook_id in cook_ids if (dish_id, cook_id) not in existing
+        ]
+        # ignore_conflicts covers assignments made concurrently; the
+        # recount below is exact either way.
+        through.objects.bulk_create(rows, ignore_conflicts=True)
+        recount_dish_counts(Cook, cook_ids)
+        touch(dish_ids={row.dish_id for row in rows}, cook_ids=cook_ids)
+    transaction.on_commit(bump_menu_version)
+    events.publish('dish', action='bulk', count=len(rows))
+    events.publish('cook', action='bulk', count=len(rows))
+    return len(rows)
+
+
+def unassign_cooks(dishes, cooks):
+    """
+    Remove the cooks from every dish in dishes with one DELETE. Returns
+    the number of assignments removed.
+    """
+    through = Dish.cooks.through
+    cook_ids = {cook.pk for cook in cooks}
+    with transaction.atomic(using=router.db_for_write(through)):
+        rows = through.objects.filter(dish_id__in=dishes.order_by().values('pk'), cook_id__in=cook_ids)
+        dish_ids = set(rows.values_list('dish_id', flat=True))
+        removed, _ = rows.delete()
+        recount_dish_counts(Cook, cook_ids)
+        touch(dish_ids=dish_ids, cook_ids=cook_ids)
+    transaction.on_commit(bump_menu_version)
+    events.publish('dish', action='bulk', count=removed)
+    events.publish('cook', action='bulk', count=removed)
+    return removed
+
+
+def move_dishes(dishes, dish_type):
+    """
+    Move every dish in dishes to dish_type with one UPDATE. Returns the
+    number of dishes moved.
+    """
+    dishes = _selection(dishes).exclude(dish_type=dish_type)
+    with transaction.atomic(using=router.db_for_write(Dish)):
+        dish_type_ids = _dish_type_ids(dishes) | {dish_type.pk}
+        moved = dishes.update(dish_type=dish_type, updated_at=timezone.now())
+        recount_dish_counts(DishType, dish_type_ids)
+        refresh_price_summaries(dish_type_ids)
+    transaction.on_commit(bump_menu_version)
+    events.publish('dish', action='bulk', count=moved)
+    return moved
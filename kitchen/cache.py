@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from kitchen.routers import primary_reads
+
+MENU_VERSION_KEY = 'kitchen:menu:version'
+
+
+def menu_version():
+    """
+    Current generation of the menu data. Every cached menu fragment embeds
+    it in its key, so bumping it makes all of them unreachable at once.
+    """
+    version = cache.get(MENU_VERSION_KEY)
+    if version is None:
+        # Seed from the clock rather than 1 so that an evicted counter can
+        # never come back at a value whose fragments are still cached.
+        cache.add(MENU_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(MENU_VERSION_KEY)
+    return version
+
+
+def bump_menu_version():
+    try:
+        cache.incr(MENU_VERSION_KEY)
+    except ValueError:
+        cache.add(MENU_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def cached_menu(name, build):
+    """
+    Return build() cached under the current menu version. Fills read from
+    the primary: a lagging replica would otherwise store pre-write data
+    under the key that the write has just made current.
+
+    With KITCHEN_CACHE_TIMEOUT at 0 nothing is cached.
+    """
+    if not settings.KITCHEN_CACHE_TIMEOUT:
+        return build()
+    key = f'kitchen:menu:{menu_version()}:{name}'
+    value = cache.get(key)
+    if value is None:
+        with primary_reads():
+            value = build()
+        cache.set(key, value, settings.KITCHEN_CACHE_TIMEOUT)
+    return value
+
+
+async def amenu_version():
+    version = await cache.aget(MENU_VERSION_KEY)
+    if version is None:
+        await cache.aadd(MENU_VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(MENU_VERSION_KEY)
+    return version
+
+
+async def acached_menu(name, build):
+    """
+    Async counterpart of cached_menu(); build is a coroutine function.
+    """
+    if not settings.KITCHEN_CACHE_TIMEOUT:
+        return await build()
+    key = f'kitchen:menu:{await amenu_version()}:{name}'
+    value = await cache.aget(key)
+    if value is None:
+        with primary_reads():
+            value = await build()
+        await cache.aset(key, value, settings.KITCHEN_CACHE_TIMEOUT)
+    return value
@@ -0,0 +1,56 @@
+from collections import defaultdict
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from kitchen.models import Cook, Dish, DishType
+
+
+def adjust_dish_counts(model, deltas):
+    """
+    Apply {pk: delta} to model.dish_count with one
+    UPDATE ... SET dish_count = dish_count + delta per distinct delta, so
+    concurrent writers add up instead of overwriting each other.
+    """
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(dish_count=F('dish_count') + delta)
+
+
+def actual_dish_counts(model):
+    if model is DishType:
+        rows = Dish.all_objects.filter(dish_type=OuterRef('pk')).values('dish_type')
+    else:
+        rows = Dish.cooks.through.objects.filter(cook=OuterRef('pk')).values('cook')
+    count = rows.order_by().annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(count, output_field=IntegerField()), Value(0))
+
+
+def reconcile_dish_counts(dry_run=False):
+    """
+    Recompute every dish_count from the source tables and rewrite only the
+    rows that drifted, e.g. after raw SQL or a queryset.update() of
+    dish_type, which send no signals. Returns {model: rows out of date}.
+    """
+    stale = {}
+    for model in (DishType, Cook):
+        actual = actual_dish_counts(model)
+        drifted = model.objects.annotate(actual=actual).exclude(dish_count=F('actual')).values('pk')
+        if dry_run:
+            stale[model] = drifted.count()
+        else:
+            stale[model] = model.objects.filter(pk__in=drifted).update(dish_count=actual)
+    return stale
+
+
+def recount_dish_counts(model, pks):
+    """
+    Rewrite dish_count for the given rows from the source tables in one
+    UPDATE, for bulk writes where per-row deltas are not known.
+    """
+    pks = set(pks)
+    if pks:
+        model.objects.filter(pk__in=pks).update(dish_count=actual_dish_counts(model))
@@ -0,0 +1,51 @@
+import threading
+from collections import Counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from kitchen.metrics import registry
+
+_lock = threading.Lock()
+_opened = Counter()
+
+POOL_STATS = (
+    ('pool_max', 'kitchen_db_pool_max_size', "Largest size the connection pool may grow to."),
+    ('pool_size', 'kitchen_db_pool_size', "Connections currently held by the pool, idle or in use."),
+    ('pool_available', 'kitchen_db_pool_available', "Idle connections ready to be handed out."),
+    ('requests_waiting', 'kitchen_db_pool_requests_waiting', "Requests queued waiting for a connection."),
+)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    # With persistent connections this should level off at one per worker
+    # thread; a steady climb means connections are not being reused.
+    with _lock:
+        _opened[connection.alias] += 1
+
+
+def connection_gauges():
+    with _lock:
+        opened = dict(_opened)
+    for alias, count in sorted(opened.items()):
+        yield (
+            'kitchen_db_connections_opened', "Database connections opened by this process.",
+            {'alias': alias}, count,
+        )
+    for alias in connections:
+        if not connections.settings[alias].get('OPTIONS', {}).get('pool'):
+            continue
+        stats = connections[alias].pool.get_stats()
+        for key, name, help_text in POOL_STATS:
+            yield name, help_text, {'alias': alias}, stats.get(key, 0)
+        if stats.get('pool_max'):
+            in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+            yield (
+                'kitchen_db_pool_saturation', "Share of the pool's maximum size currently in use.",
+                {'alias': alias}, round(in_use / stats['pool_max'], 4),
+            )
+
+
+registry.register_gauges(connection_gauges)
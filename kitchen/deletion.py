@@ -0,0 +1,222 @@
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from kitchen import autocomplete, events
+from kitchen.analytics import refresh_price_summaries
+from kitchen.auth import invalidate_cook
+from kitchen.cache import bump_menu_version
+from kitchen.counters import adjust_dish_counts
+from kitchen.models import Cook, DeletionJob, Dish, DishType, TicketLine
+from kitchen.signals import AUTOCOMPLETE_KINDS, EVENT_KINDS, touch
+
+logger = logging.getLogger(__name__)
+
+
+def delete_dishes(ids, summaries=True):
+    """
+    Delete the given dishes and their cook assignments with a handful of
+    set-based statements, doing by hand what the collector and the per-dish
+    signals in kitchen.signals would: dish counts, cooks' updated_at, price
+    summaries, the menu cache and autocomplete.
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    through = Dish.cooks.through
+    db = router.db_for_write(Dish)
+    with transaction.atomic(using=db):
+        cooks = Counter(through.objects.using(db).filter(dish_id__in=ids).values_list('cook_id', flat=True))
+        dish_types = Counter(Dish.all_objects.using(db).filter(id__in=ids).values_list('dish_type_id', flat=True))
+        through.objects.using(db).filter(dish_id__in=ids).delete()
+        # Done by SET_NULL in a normal delete; kitchen.dispatch cancels the
+        # open ones.
+        TicketLine.objects.using(db).filter(dish_id__in=ids).update(dish=None)
+        # The assignments are gone and the bookkeeping is done here, so skip
+        # the collector, which would send two signals per dish.
+        deleted = Dish.all_objects.filter(id__in=ids)._raw_delete(db)
+        adjust_dish_counts(Cook, {cook_id: -count for cook_id, count in cooks.items()})
+        adjust_dish_counts(DishType, {type_id: -count for type_id, count in dish_types.items()})
+        touch(cook_ids=list(cooks))
+        if summaries:
+            refresh_price_summaries(dish_types)
+        transaction.on_commit(lambda: [autocomplete.discard('dishes', pk) for pk in ids], using=db)
+        transaction.on_commit(bump_menu_version, using=db)
+    events.publish('dish', action='bulk', count=deleted)
+    return deleted
+
+
+class Purge:
+    """
+    How one model is soft-deleted and then purged: mark() gives the
+    columns set immediately, and purge_batch() removes up to limit
+    dependent rows and returns how many it removed, 0 once none are left.
+    The row itself is deleted normally at the end.
+    """
+    model = None
+    name_field = 'name'
+
+    def mark(self, obj, now):
+        # The unique name is freed at once: the managers hide the row, so
+        # validate_unique() and the importer would not see it clash.
+        suffix = f' [deleted {obj.pk}]'
+        max_length = self.model._meta.get_field(self.name_field).max_length
+        name = getattr(obj, self.name_field)[:max_length - len(suffix)] + suffix
+        return {'deleted_at': now, 'updated_at': now, self.name_field: name}
+
+    def estimate(self, obj):
+        # Denormalized, so queueing stays constant time whatever the fan-out.
+        return obj.dish_count
+
+    def purge_batch(self, object_id, limit):
+        raise NotImplementedError
+
+
+class DishTypePurge(Purge):
+    model = DishType
+
+    def purge_batch(self, object_id, limit):
+        ids = Dish.all_objects.filter(dish_type_id=object_id).order_by().values_list('id', flat=True)[:limit]
+        return delete_dishes(ids, summaries=False)
+
+
+class CookPurge(Purge):
+    model = Cook
+    name_field = 'username'
+
+    def mark(self, obj, now):
+        return {**super().mark(obj, now), 'is_active': False}
+
+    def purge_batch(self, object_id, limit):
+        through = Dish.cooks.through
+        rows = list(through.objects.filter(cook_id=object_id).values_list('id', 'dish_id')[:limit])
+        if not rows:
+            return 0
+        with transaction.atomic(using=router.db_for_write(through)):
+            through.objects.filter(id__in=[pk for pk, _ in rows]).delete()
+            adjust_dish_counts(Cook, {object_id: -len(rows)})
+            touch(dish_ids=[dish_id for _, dish_id in rows])
+            transaction.on_commit(bump_menu_version)
+        return len(rows)
+
+
+PURGES = {purge.model._meta.label_lower: purge for purge in (DishTypePurge(), CookPurge())}
+
+
+def soft_delete(obj):
+    """
+    Hide obj at once and queue a DeletionJob that purges its dependents in
+    batches. Returns the job, or None if obj was already deleted.
+    """
+    label = obj._meta.label_lower
+    purge = PURGES[label]
+    db = router.db_for_write(purge.model)
+    with transaction.atomic(using=db):
+        if not purge.model.objects.using(db).filter(pk=obj.pk).update(**purge.mark(obj, timezone.now())):
+            return None
+        job = DeletionJob.objects.using(db).create(
+            model=label, object_id=obj.pk, object_repr=getattr(obj, purge.name_field)[:200], total=purge.estimate(obj),
+        )
+        kind = AUTOCOMPLETE_KINDS[purge.model]
+        transaction.on_commit(lambda: autocomplete.discard(kind, obj.pk), using=db)
+        transaction.on_commit(lambda: enqueue(job.pk), using=db)
+        transaction.on_commit(bump_menu_version, using=db)
+        if purge.model is Cook:
+            transaction.on_commit(lambda: invalidate_cook(obj.pk), using=db)
+    events.publish(EVENT_KINDS[purge.model], id=obj.pk, action='deleted')
+    return job
+
+
+def run_job(job_id):
+    """
+    Claim and run one pending job. The claim is a conditional UPDATE, so a
+    job is only ever run by one worker across processes.
+    """
+    if not DeletionJob.objects.filter(pk=job_id, status=DeletionJob.Status.PENDING).update(
+        status=DeletionJob.Status.RUNNING, updated_at=timezone.now()
+    ):
+        return False
+    job = DeletionJob.objects.get(pk=job_id)
+    purge = PURGES[job.model]
+    try:
+        while True:
+            removed = purge.purge_batch(job.object_id, settings.KITCHEN_DELETION_BATCH_SIZE)
+            if not removed:
+                break
+            DeletionJob.objects.filter(pk=job_id).update(done=F('done') + removed, updated_at=timezone.now())
+            logger.info("%s: removed %d dependent rows", job.object_repr, removed)
+        purge.model.all_objects.filter(pk=job.object_id).delete()
+    except Exception as e:
+        logger.exception("Deleting %s failed", job.object_repr)
+        DeletionJob.objects.filter(pk=job_id).update(
+            status=DeletionJob.Status.FAILED, error=str(e), updated_at=timezone.now()
+        )
+        return False
+    DeletionJob.objects.filter(pk=job_id).update(status=DeletionJob.Status.DONE, updated_at=timezone.now())
+    return True
+
+
+def run_pending():
+    ran = 0
+    for job_id in DeletionJob.objects.filter(status=DeletionJob.Status.PENDING).order_by('id').values_list(
+        'id', flat=True
+    ):
+        ran += run_job(job_id)
+    return ran
+
+
+def requeue_stale(minutes):
+    """
+    Return running jobs not updated for minutes, e.g. because their process
+    died, to pending. Returns how many were requeued.
+    """
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return DeletionJob.objects.filter(status=DeletionJob.Status.RUNNING, updated_at__lt=cutoff).update(
+        status=DeletionJob.Status.PENDING, updated_at=timezone.now()
+    )
+
+
+class Worker:
+    """
+    One daemon thread per process, started on first use, that drains
+    pending jobs and then sleeps until woken again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def wake(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='kitchen-deletion', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                run_pending()
+            except Exception:
+                logger.exception("Deletion worker failed")
+            finally:
+                connections.close_all()
+
+
+worker = Worker()
+
+
+def enqueue(job_id):
+    if settings.KITCHEN_DELETION_BACKGROUND:
+        worker.wake()
+    else:
+        run_job(job_id)
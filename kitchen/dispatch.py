@@ -0,0 +1,363 @@
+import heapq
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, router, transaction
+from django.db.models import Case, Count, IntegerField, Max, Q, Value, When
+from django.utils import timezone
+
+from kitchen import events
+from kitchen.models import Cook, Dish, Ticket, TicketLine
+
+logger = logging.getLogger(__name__)
+
+OPEN = (TicketLine.Status.QUEUED, TicketLine.Status.ASSIGNED)
+
+
+class _Cook:
+    __slots__ = ('weight', 'dishes', 'load', 'stamp')
+
+    def __init__(self, weight, dishes, load):
+        self.weight = weight
+        self.dishes = dishes
+        self.load = load
+        # Bumped on every load change; heap entries carrying an older stamp
+        # are stale.
+        self.stamp = 0
+
+    def score(self):
+        return (self.load + 1) / self.weight
+
+
+class _CookHeap:
+    __slots__ = ('entries', 'latest', 'limit')
+
+    def __init__(self, cooks):
+        # (score, cook id, stamp)
+        self.entries = []
+        # Cook id -> stamp of its newest entry here.
+        self.latest = {}
+        # Past this many entries most are stale and the heap is rebuilt.
+        self.limit = 2 * cooks + 8
+
+    def push(self, cook_id, cook):
+        heapq.heappush(self.entries, (cook.score(), cook_id, cook.stamp))
+        self.latest[cook_id] = cook.stamp
+
+
+class Dispatcher:
+    """
+    In-memory assignment of ticket lines to the cooks who can prepare their
+    dish. Every dish has a heap of its cooks keyed on (load + 1) / weight,
+    where weight = 1 + experience_weight * years_of_experience, so a line
+    goes to the least loaded cook relative to experience in O(log k).
+    While all of a dish's cooks are at max_load its lines wait in a heap
+    keyed on ticket age, and the oldest goes to the first of them who
+    frees up.
+
+    The cook heaps are lazy. Taking a line only updates the heap it came
+    from; entries elsewhere carry an old stamp and are re-keyed when they
+    reach the top, which is safe because the load only went up. When a
+    load goes down the cook is pushed again into each of its heaps.
+    """
+
+    def __init__(self, max_load=None, experience_weight=0.0):
+        self.max_load = max_load
+        self.experience_weight = experience_weight
+        self.cooks = {}
+        # Dish id -> ids of the cooks who can prepare it.
+        self.qualified = defaultdict(list)
+        # Dish id -> _CookHeap, built on the dish's first line.
+        self.ready = {}
+        # Dish id -> heap of (queued_at, line id).
+        self.waiting = {}
+        self.queued = 0
+
+    def add_cook(self, cook_id, years=0, dish_ids=(), load=0):
+        cook = _Cook(1 + self.experience_weight * (years or 0), set(dish_ids), load)
+        self.cooks[cook_id] = cook
+        for dish_id in cook.dishes:
+            self.qualified[dish_id].append(cook_id)
+        if self.ready:
+            for dish_id in cook.dishes:
+                self.ready.pop(dish_id, None)
+
+    def _full(self, cook):
+        return self.max_load is not None and cook.load >= self.max_load
+
+    def _heap(self, dish_id):
+        heap = self.ready.get(dish_id)
+        if heap is None:
+            cook_ids = self.qualified.get(dish_id, ())
+            heap = self.ready[dish_id] = _CookHeap(len(cook_ids))
+            for cook_id in cook_ids:
+                cook = self.cooks[cook_id]
+                if not self._full(cook):
+                    heap.entries.append((cook.score(), cook_id, cook.stamp))
+                    heap.latest[cook_id] = cook.stamp
+            heapq.heapify(heap.entries)
+        return heap
+
+    def _best(self, heap):
+        entries = heap.entries
+        while entries:
+            _, cook_id, stamp = entries[0]
+            cook = self.cooks[cook_id]
+            if stamp == cook.stamp and not self._full(cook):
+                return cook_id
+            heapq.heappop(entries)
+            if not self._full(cook) and heap.latest[cook_id] != cook.stamp:
+                heap.push(cook_id, cook)
+        return None
+
+    def submit(self, line_id, dish_id, queued_at):
+        """
+        Assign a line and return the cook's id, or None if it has to wait.
+        """
+        heap = self._heap(dish_id)
+        cook_id = self._best(heap)
+        if cook_id is None:
+            heapq.heappush(self.waiting.setdefault(dish_id, []), (queued_at, line_id))
+            self.queued += 1
+            return None
+        cook = self.cooks[cook_id]
+        cook.load += 1
+        cook.stamp += 1
+        if self._full(cook):
+            heapq.heappop(heap.entries)
+        else:
+            heapq.heapreplace(heap.entries, (cook.score(), cook_id, cook.stamp))
+            heap.latest[cook_id] = cook.stamp
+        return cook_id
+
+    def set_load(self, cook_id, load):
+        """
+        Set a cook's load, e.g. after they finished lines, and return the
+        (line id, cook id) pairs of waiting lines handed to them.
+        """
+        cook = self.cooks.get(cook_id)
+        if cook is None or load == cook.load:
+            return []
+        went_down = load < cook.load
+        cook.load = load
+        cook.stamp += 1
+        if not went_down:
+            return []
+        assigned = self._drain(cook_id, cook)
+        if not self._full(cook):
+            entry = (cook.score(), cook_id, cook.stamp)
+            for dish_id in cook.dishes:
+                heap = self.ready.get(dish_id)
+                if heap is None:
+                    continue
+                if len(heap.entries) > heap.limit:
+                    del self.ready[dish_id]
+                else:
+                    heapq.heappush(heap.entries, entry)
+                    heap.latest[cook_id] = cook.stamp
+        return assigned
+
+    def finish(self, cook_id, lines=1):
+        cook = self.cooks.get(cook_id)
+        if cook is None:
+            return []
+        return self.set_load(cook_id, max(cook.load - lines, 0))
+
+    def _drain(self, cook_id, cook):
+        assigned = []
+        while self.waiting and not self._full(cook):
+            dish_ids = self.waiting.keys() & cook.dishes
+            if not dish_ids:
+                break
+            dish_id = min(dish_ids, key=lambda dish_id: self.waiting[dish_id][0])
+            _, line_id = heapq.heappop(self.waiting[dish_id])
+            if not self.waiting[dish_id]:
+                del self.waiting[dish_id]
+            self.queued -= 1
+            cook.load += 1
+            cook.stamp += 1
+            assigned.append((line_id, cook_id))
+        return assigned
+
+
+def place_ticket(dish_ids, note=''):
+    with transaction.atomic(using=router.db_for_write(Ticket)):
+        ticket = Ticket.objects.create(note=note)
+        TicketLine.objects.bulk_create(TicketLine(ticket=ticket, dish_id=dish_id) for dish_id in dish_ids)
+    return ticket
+
+
+def finish_line(line_id, cook_id=None):
+    """
+    Mark an assigned line done; the dispatcher sees the cook's load drop on
+    its next poll. Returns False if the line was not assigned (to cook_id).
+    """
+    lines = TicketLine.objects.filter(pk=line_id, status=TicketLine.Status.ASSIGNED)
+    if cook_id is not None:
+        lines = lines.filter(cook_id=cook_id)
+    if not lines.update(status=TicketLine.Status.DONE, done_at=timezone.now()):
+        return False
+    events.publish('ticket', line=line_id, action='done')
+    return True
+
+
+def release_orphans():
+    """
+    Cancel open lines whose dish was deleted and requeue the ones assigned
+    to a cook who was deleted or deactivated. Returns both counts.
+    """
+    cancelled = TicketLine.objects.filter(status__in=OPEN, dish__isnull=True).update(
+        status=TicketLine.Status.CANCELLED, cook=None
+    )
+    requeued = TicketLine.objects.filter(
+        Q(cook__isnull=True) | ~Q(cook__in=Cook.objects.filter(is_active=True)),
+        status=TicketLine.Status.ASSIGNED,
+    ).update(status=TicketLine.Status.QUEUED, cook=None, assigned_at=None)
+    if cancelled or requeued:
+        events.publish('ticket', action='released', count=cancelled + requeued)
+    return cancelled, requeued
+
+
+def assigned_loads():
+    return dict(
+        TicketLine.objects.filter(status=TicketLine.Status.ASSIGNED).order_by().values('cook_id')
+        .annotate(lines=Count('id')).values_list('cook_id', 'lines')
+    )
+
+
+def save_assignments(assignments, batch_size=1000):
+    """
+    Write (line id, cook id) pairs with one UPDATE per batch. Lines that
+    are no longer queued, e.g. cancelled meanwhile, are left alone.
+    """
+    saved = 0
+    now = timezone.now()
+    for start in range(0, len(assignments), batch_size):
+        batch = assignments[start:start + batch_size]
+        saved += TicketLine.objects.filter(
+            pk__in=[line_id for line_id, _ in batch], status=TicketLine.Status.QUEUED
+        ).update(
+            cook_id=Case(
+                *(When(pk=line_id, then=Value(cook_id)) for line_id, cook_id in batch), output_field=IntegerField()
+            ),
+            status=TicketLine.Status.ASSIGNED,
+            assigned_at=now,
+        )
+    if saved:
+        events.publish('ticket', action='assigned', count=saved)
+    return saved
+
+
+def kitchen_state():
+    """
+    The newest updated_at of dishes and cooks. Editing either, or their
+    assignments (which touch both sides, see kitchen.signals), moves it.
+    Read from the database: the menu version lives in a cache that may be
+    private to each process.
+    """
+    return (
+        Dish.all_objects.aggregate(latest=Max('updated_at'))['latest'],
+        Cook.all_objects.aggregate(latest=Max('updated_at'))['latest'],
+    )
+
+
+class DispatchLoop:
+    """
+    The dispatcher of the one process running dispatch_tickets. Each poll()
+    syncs cook loads, submits lines queued since the last poll and saves
+    the assignments. The state is rebuilt from the database when dishes,
+    cooks or their assignments were edited and every
+    KITCHEN_DISPATCH_RESYNC_SECONDS.
+    """
+
+    def __init__(self):
+        self.dispatcher = None
+        self.state = None
+        self.built_at = 0
+        # Line id -> ticket time of the queued lines handed to the
+        # dispatcher, back to the start of the window submit_queued() scans.
+        self.submitted = {}
+
+    def stale(self):
+        return (
+            self.dispatcher is None
+            or time.monotonic() - self.built_at > settings.KITCHEN_DISPATCH_RESYNC_SECONDS
+            or kitchen_state() != self.state
+        )
+
+    def rebuild(self):
+        """
+        Load cooks, their dishes and loads, then submit every queued line
+        oldest ticket first: O(n log n) in lines and assignments.
+        """
+        self.state = kitchen_state()
+        release_orphans()
+        dispatcher = Dispatcher(settings.KITCHEN_DISPATCH_MAX_LOAD, settings.KITCHEN_DISPATCH_EXPERIENCE_WEIGHT)
+        skills = defaultdict(list)
+        for dish_id, cook_id in Dish.cooks.through.objects.values_list('dish_id', 'cook_id').iterator():
+            skills[cook_id].append(dish_id)
+        loads = assigned_loads()
+        for cook_id, years in Cook.objects.filter(is_active=True).values_list('id', 'years_of_experience'):
+            dispatcher.add_cook(cook_id, years, skills.get(cook_id, ()), loads.get(cook_id, 0))
+        self.dispatcher = dispatcher
+        self.built_at = time.monotonic()
+        self.submitted = {}
+        return self.submit_queued(window=None)
+
+    def submit_queued(self, window=True):
+        """
+        Submit the queued lines the dispatcher has not seen. Line ids are
+        not committed in order, so rather than a high-water mark this scans
+        the tickets of the last KITCHEN_DISPATCH_RESYNC_SECONDS; a line
+        committed later than that waits for the next rebuild.
+        """
+        lines = TicketLine.objects.filter(status=TicketLine.Status.QUEUED, dish__isnull=False)
+        if window:
+            since = timezone.now() - timedelta(seconds=settings.KITCHEN_DISPATCH_RESYNC_SECONDS)
+            lines = lines.filter(ticket__created_at__gte=since)
+            self.submitted = {
+                line_id: queued_at for line_id, queued_at in self.submitted.items() if queued_at >= since
+            }
+        lines = lines.order_by('ticket__created_at', 'id').values_list('id', 'dish_id', 'ticket__created_at')
+        assignments = []
+        for line_id, dish_id, queued_at in lines.iterator():
+            if line_id in self.submitted:
+                continue
+            self.submitted[line_id] = queued_at
+            cook_id = self.dispatcher.submit(line_id, dish_id, queued_at)
+            if cook_id is not None:
+                assignments.append((line_id, cook_id))
+        return assignments
+
+    def poll(self):
+        """
+        One round of dispatching. Returns the number of lines assigned.
+        """
+        if self.stale():
+            assignments = self.rebuild()
+        else:
+            assignments = []
+            loads = assigned_loads()
+            for cook_id, cook in self.dispatcher.cooks.items():
+                load = loads.get(cook_id, 0)
+                if load != cook.load:
+                    assignments += self.dispatcher.set_load(cook_id, load)
+            assignments += self.submit_queued()
+        return save_assignments(assignments)
+
+    def run(self, interval=None, stop=None):
+        interval = settings.KITCHEN_DISPATCH_INTERVAL if interval is None else interval
+        while stop is None or not stop.is_set():
+            close_old_connections()
+            try:
+                assigned = self.poll()
+            except Exception:
+                logger.exception("Dispatching failed; rebuilding")
+                self.dispatcher = None
+                assigned = 0
+            if assigned:
+                logger.info("Assigned %d ticket lines, %d waiting", assigned, self.dispatcher.queued)
+            time.sleep(interval)
@@ -0,0 +1,273 @@
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from kitchen.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class Event:
+    __slots__ = ('id', 'kind', 'data', 'message')
+
+    def __init__(self, id, kind, data):
+        self.id = id
+        self.kind = kind
+        self.data = data
+        # Encoded once and shared by every connection it is sent to.
+        self.message = f"id: {id}\nevent: {kind}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+# Queued in place of the events a slow client missed; its stream ends and
+# the browser reconnects with Last-Event-ID.
+DROPPED = object()
+
+
+class Subscriber:
+    __slots__ = ('kinds', 'queue', 'loop', 'dropped')
+
+    def __init__(self, kinds, size, loop):
+        self.kinds = kinds
+        self.queue = asyncio.Queue(size)
+        self.loop = loop
+        self.dropped = False
+
+    def offer(self, event):
+        """
+        Queue event, or drop this client if its queue is full. Returns True
+        when the client was dropped just now.
+        """
+        if self.dropped or (self.kinds is not None and event.kind not in self.kinds):
+            return False
+        try:
+            self.queue.put_nowait(event)
+            return False
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(DROPPED)
+            return True
+
+
+class Hub:
+    """
+    Fan-out of events to the SSE connections of this process. Each
+    connection is a Subscriber with a bounded queue on its event loop;
+    deliver() may be called from any thread and costs one
+    call_soon_threadsafe() per loop, not per connection. A client whose
+    queue fills up is dropped rather than slowing down the rest. The last
+    KITCHEN_EVENTS_REPLAY events are kept for reconnecting clients.
+    """
+
+    def __init__(self, queue_size=None, replay=None):
+        self.queue_size = queue_size
+        self.replay = replay
+        self.recent = None
+        self.loops = {}
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._backend_tasks = {}
+
+    def _recent(self):
+        if self.recent is None:
+            self.recent = deque(maxlen=self.replay or settings.KITCHEN_EVENTS_REPLAY)
+        return self.recent
+
+    def subscribe(self, kinds=None, last_event_id=None):
+        """
+        Register a connection on the running loop and return it with the
+        events to replay to it first: those after last_event_id, or a
+        single 'reset' event when that one is too old to replay from.
+        """
+        loop = asyncio.get_running_loop()
+        subscriber = Subscriber(kinds, self.queue_size or settings.KITCHEN_EVENTS_QUEUE_SIZE, loop)
+        with self._lock:
+            self.loops.setdefault(loop, set()).add(subscriber)
+            recent = list(self._recent())
+            if loop not in self._backend_tasks:
+                self._backend_tasks[loop] = backend().start(self, loop)
+        replay = []
+        if last_event_id:
+            ids = [event.id for event in recent]
+            if last_event_id in ids:
+                replay = recent[ids.index(last_event_id) + 1:]
+            else:
+                replay = [Event(last_event_id, 'reset', {})]
+        return subscriber, [event for event in replay if kinds is None or event.kind in kinds | {'reset'}]
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            subscribers = self.loops.get(subscriber.loop)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.loops[subscriber.loop]
+                task = self._backend_tasks.pop(subscriber.loop, None)
+                if task is not None:
+                    task.cancel()
+
+    def deliver(self, event):
+        with self._lock:
+            self._recent().append(event)
+            loops = list(self.loops)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._deliver_on_loop, loop, event)
+            except RuntimeError:
+                # The loop was closed with connections still registered.
+                with self._lock:
+                    self.loops.pop(loop, None)
+
+    def _deliver_on_loop(self, loop, event):
+        for subscriber in list(self.loops.get(loop, ())):
+            if subscriber.offer(event):
+                self.dropped += 1
+
+    def connections(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self.loops.values())
+
+    async def stream(self, kinds=None, last_event_id=None, heartbeat=None):
+        """
+        The text/event-stream body of one connection. A comment line every
+        heartbeat seconds keeps proxies from closing an idle stream.
+        """
+        heartbeat = heartbeat or settings.KITCHEN_EVENTS_HEARTBEAT
+        subscriber, replay = self.subscribe(kinds, last_event_id)
+        try:
+            yield f"retry: {settings.KITCHEN_EVENTS_RETRY_MS}\n\n"
+            for event in replay:
+                yield event.message
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if event is DROPPED:
+                    return
+                yield event.message
+        finally:
+            self.unsubscribe(subscriber)
+
+
+hub = Hub()
+
+
+class LocalBackend:
+    """
+    Events only reach connections of the process that published them. Use
+    CacheBackend when there are several workers, or to see the events of
+    the dispatch_tickets process.
+    """
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        # A restarted process must not reuse the ids a client remembers.
+        self._epoch = uuid.uuid4().hex[:8]
+
+    def publish(self, kind, data):
+        hub.deliver(Event(f'{self._epoch}-{next(self._ids)}', kind, data))
+
+    def start(self, hub, loop):
+        return None
+
+
+class CacheBackend:
+    """
+    Share events through the default cache, which must then be one all
+    processes see (Redis, Memcached, ...). publish() stores each event
+    under a number from cache.incr(); one task per worker loop polls for
+    new numbers every KITCHEN_EVENTS_POLL_INTERVAL seconds and reads them
+    with a single get_many(), so idle connections cost the cache nothing.
+    """
+    sequence_key = 'kitchen:events:sequence'
+    # An event published but not yet stored is waited for this long.
+    missing_timeout = 2.0
+
+    def _key(self, number):
+        return f'kitchen:events:{number}'
+
+    def publish(self, kind, data):
+        try:
+            number = cache.incr(self.sequence_key)
+        except ValueError:
+            cache.add(self.sequence_key, 0, timeout=None)
+            number = cache.incr(self.sequence_key)
+        cache.set(self._key(number), (kind, data), settings.KITCHEN_EVENTS_CACHE_TIMEOUT)
+
+    def start(self, hub, loop):
+        return loop.create_task(self.run(hub))
+
+    async def run(self, hub):
+        seen = await cache.aget(self.sequence_key) or 0
+        missing_since = None
+        while True:
+            await asyncio.sleep(settings.KITCHEN_EVENTS_POLL_INTERVAL)
+            try:
+                latest = await cache.aget(self.sequence_key) or 0
+                if latest < seen:
+                    # The counter was evicted or the cache restarted.
+                    seen = latest
+                numbers = range(max(seen, latest - settings.KITCHEN_EVENTS_REPLAY) + 1, latest + 1)
+                if not numbers:
+                    continue
+                found = await cache.aget_many([self._key(number) for number in numbers])
+                for number in numbers:
+                    stored = found.get(self._key(number))
+                    if stored is None:
+                        missing_since = missing_since or time.monotonic()
+                        if time.monotonic() - missing_since < self.missing_timeout:
+                            break
+                    else:
+                        hub.deliver(Event(str(number), *stored))
+                    missing_since = None
+                    seen = number
+            except Exception:
+                logger.exception("Could not read kitchen events from the cache")
+
+
+_backend = None
+
+
+def backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.KITCHEN_EVENTS_BACKEND)()
+    return _backend
+
+
+def publish(kind, **data):
+    """
+    Announce a change to the live boards once the current transaction
+    commits, e.g. publish('dish', id=3, action='saved').
+    """
+    transaction.on_commit(lambda: _publish(kind, data))
+
+
+def _publish(kind, data):
+    try:
+        backend().publish(kind, data)
+    except Exception:
+        logger.exception("Could not publish a %s event", kind)
+
+
+def event_gauges():
+    yield 'kitchen_events_connections', "Open live board connections in this process.", {}, hub.connections()
+    yield 'kitchen_events_dropped', "Live board connections dropped for falling behind.", {}, hub.dropped
+
+
+registry.register_gauges(event_gauges)
@@ -0,0 +1,154 @@
+import csv
+from collections import defaultdict
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from kitchen.importers import COOK_FIELDS, batched
+from kitchen.models import Cook, Dish, DishType
+from kitchen.search import search_cooks, search_dish_types, search_dishes
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class Export:
+    """
+    Rows of one model in id order, read as plain dicts. Dishes and cooks
+    use the same column names as kitchen.importers, so a JSONL export can
+    be imported again.
+    """
+    model = None
+    columns = ()
+    search = None
+
+    def get_queryset(self):
+        return self.model.objects.order_by('id')
+
+    def rows(self, queryset, chunk_size):
+        return queryset.values(*self.columns).iterator(chunk_size=chunk_size)
+
+
+class DishExport(Export):
+    model = Dish
+    columns = ('id', 'name', 'description', 'price', 'dish_type', 'cooks')
+    search = staticmethod(partial(search_dishes, ranked=False))
+
+    def rows(self, queryset, chunk_size):
+        rows = queryset.values('id', 'name', 'description', 'price', 'dish_type__name').iterator(
+            chunk_size=chunk_size
+        )
+        for batch in batched(rows, chunk_size):
+            # One through-table query per chunk instead of a prefetch that
+            # would build a Cook instance for every assignment.
+            cooks = defaultdict(list)
+            assignments = Dish.cooks.through.objects.filter(
+                dish_id__in=[row['id'] for row in batch]
+            ).order_by('cook__username').values_list('dish_id', 'cook__username')
+            for dish_id, username in assignments:
+                cooks[dish_id].append(username)
+            for row in batch:
+                row['dish_type'] = row.pop('dish_type__name')
+                row['cooks'] = cooks[row['id']]
+                yield row
+
+
+class DishTypeExport(Export):
+    model = DishType
+    columns = ('id', 'name')
+    search = staticmethod(search_dish_types)
+
+
+class CookExport(Export):
+    model = Cook
+    # Any signed-in cook may export, so contact details stay out.
+    columns = ('id',) + tuple(field for field in COOK_FIELDS if field != 'email')
+    search = staticmethod(search_cooks)
+
+
+EXPORTS = {
+    'dishes': DishExport(),
+    'dish-types': DishTypeExport(),
+    'cooks': CookExport(),
+}
+
+
+def export_rows(kind, query='', chunk_size=None):
+    """
+    Yield one dict per row. The queryset is read with iterator(), so only
+    chunk_size rows (and, for dishes, their cooks) are in memory at a time;
+    on PostgreSQL this uses a server-side cursor.
+    """
+    export = EXPORTS[kind]
+    queryset = export.get_queryset()
+    if query:
+        queryset = export.search(queryset, query)
+    return export.rows(queryset, chunk_size or settings.KITCHEN_EXPORT_CHUNK_SIZE)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([
+            ' '.join(value) if isinstance(value, list) else value
+            for value in (row[column] for column in columns)
+        ])
+
+
+def iter_jsonl(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def buffered(lines, size=64 * 1024):
+    """
+    Join lines into chunks of roughly size characters, so a streamed export
+    is written in a few large writes rather than one per row.
+    """
+    buffer, length = [], 0
+    for line in lines:
+        buffer.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_export(kind, fmt, query='', chunk_size=None):
+    rows = export_rows(kind, query, chunk_size)
+    if fmt == 'csv':
+        lines = iter_csv(EXPORTS[kind].columns, rows)
+    else:
+        lines = iter_jsonl(rows)
+    return buffered(lines)
+
+
+async def aiterate(chunks):
+    """
+    Async iterator over a sync one, for StreamingHttpResponse under ASGI.
+    Given a sync iterator Django collects it with list() before sending
+    anything; this hands it over one chunk at a time, each read in the
+    thread the request's database connection lives in.
+    """
+    chunks = iter(chunks)
+    step = sync_to_async(next)
+    try:
+        while (chunk := await step(chunks, None)) is not None:
+            yield chunk
+    finally:
+        # Releases the server-side cursor when the client goes away early.
+        if hasattr(chunks, 'close'):
+            await sync_to_async(chunks.close)()
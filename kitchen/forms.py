@@ -1,11 +1,52 @@
 from django import forms
+from kitchen.bulk import BulkError, assign_cooks, change_prices, move_dishes, unassign_cooks
+from kitchen.lookups import LookupSelect, LookupSelectMultiple
 from kitchen.models import Dish, DishType, Cook
+from kitchen.search import search_dishes
 
 
-class DishForm(forms.ModelForm):
+class DatabaseConstraintsMixin:
+    """
+    Leave the fields guarded by database constraints out of model
+    validation, so saving does not pre-query for violations the database
+    rejects anyway. Views catch the IntegrityError and hand it to
+    add_constraint_error() to turn it back into a form error.
+    """
+    # Form field name -> names of the constraints that guard it.
+    constraint_fields = {}
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        exclude.update(self.constraint_fields)
+        return exclude
+
+    def add_constraint_error(self, error):
+        message = str(error)
+        for field, constraint_names in self.constraint_fields.items():
+            for constraint in self._meta.model._meta.constraints:
+                if constraint.name in constraint_names and constraint.name in message:
+                    self.add_error(field, constraint.get_violation_error_message())
+                    return True
+        return False
+
+
+class DishForm(DatabaseConstraintsMixin, forms.ModelForm):
+    constraint_fields = {'price': ('kitchen_dish_price_gte_0',)}
+
     class Meta:
         model = Dish
         fields = '__all__'
+        widgets = {
+            'dish_type': LookupSelect('dish-types'),
+            'cooks': LookupSelectMultiple('cooks'),
+        }
+
+    def _get_validation_exclusions(self):
+        # The form field has already fetched the submitted dish type; skip
+        # the model's second existence query for the same row.
+        exclude = super()._get_validation_exclusions()
+        exclude.add('dish_type')
+        return exclude
 
     def clean(self):
         cleaned_data = super().clean()
@@ -25,7 +66,9 @@ class DishForm(forms.ModelForm):
         return cleaned_data
 
 
-class DishTypeForm(forms.ModelForm):
+class DishTypeForm(DatabaseConstraintsMixin, forms.ModelForm):
+    constraint_fields = {'name': ('kitchen_dishtype_name_ci_unique',)}
+
     class Meta:
         model = DishType
         fields = '__all__'
@@ -37,23 +80,28 @@ class DishTypeForm(forms.ModelForm):
         if not name:
             raise forms.ValidationError("Name is required")
 
-        if DishType.objects.filter(name=name).exists():
-            raise forms.ValidationError("This dish type already exists")
-
         return cleaned_data
 
 
 class CookForm(forms.ModelForm):
+    """
+    Kitchen-facing cook editor. Passwords, groups and permissions stay in
+    the admin, so rendering the form needs no choice lists at all; a
+    negative years_of_experience is rejected by Cook.clean().
+    """
+
     class Meta:
         model = Cook
-        fields = '__all__'
-
-    def clean(self):
-        cleaned_data = super().clean()
-        years = cleaned_data.get('years')
+        fields = ('username', 'first_name', 'last_name', 'email', 'years_of_experience')
 
-        if years is not None and years < 0:
-            raise forms.ValidationError("Years must be greater than or equal to 0")
+    def save(self, commit=True):
+        cook = super().save(commit=False)
+        if cook._state.adding:
+            # Cooks added here cannot sign in until a password is set for them.
+            cook.set_unusable_password()
+        if commit:
+            cook.save()
+        return cook
 
 
 class UserRegistrationForm(forms.ModelForm):
@@ -83,6 +131,11 @@ class UserRegistrationForm(forms.ModelForm):
         return cook
 
 
+class TicketForm(forms.Form):
+    dishes = forms.ModelMultipleChoiceField(queryset=Dish.objects.all(), widget=LookupSelectMultiple('dishes'))
+    note = forms.CharField(max_length=200, required=False)
+
+
 class DishSearchForm(forms.Form):
     q = forms.CharField(label='Search', required=False)
 
@@ -93,3 +146,80 @@ class CookSearchForm(forms.Form):
 
 class DishTypeSearchForm(forms.Form):
     q = forms.CharField(required=False, label="Search Dish Types")
+
+
+class BulkDishForm(forms.Form):
+    """
+    One operation applied to many dishes at once: the dishes ticked on the
+    list page, or if none are, every dish matching the list's search q.
+    With neither, the whole menu is changed only when all_dishes is ticked.
+    Each action is a constant number of queries (see kitchen.bulk).
+    """
+    ACTIONS = (
+        ('set_price', 'Set price'),
+        ('adjust_price', 'Change price by percent'),
+        ('add_cooks', 'Assign cooks'),
+        ('remove_cooks', 'Unassign cooks'),
+        ('move', 'Move to dish type'),
+    )
+    # Action -> the fields it requires.
+    REQUIRED = {
+        'set_price': ('price',),
+        'adjust_price': ('percent',),
+        'add_cooks': ('cooks',),
+        'remove_cooks': ('cooks',),
+        'move': ('dish_type',),
+    }
+
+    dishes = forms.ModelMultipleChoiceField(
+        queryset=Dish.objects.only('id'), required=False, widget=forms.MultipleHiddenInput
+    )
+    q = forms.CharField(required=False, label="Dishes matching")
+    all_dishes = forms.BooleanField(required=False, label="Apply to every dish on the menu")
+    action = forms.ChoiceField(choices=ACTIONS)
+    price = forms.DecimalField(max_digits=6, decimal_places=2, min_value=0, required=False)
+    percent = forms.DecimalField(max_digits=5, decimal_places=2, min_value=-100, required=False)
+    cooks = forms.ModelMultipleChoiceField(
+        queryset=Cook.objects.all(), required=False, widget=LookupSelectMultiple('cooks')
+    )
+    dish_type = forms.ModelChoiceField(
+        queryset=DishType.objects.all(), required=False, widget=LookupSelect('dish-types')
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field in self.REQUIRED.get(cleaned_data.get('action'), ()):
+            value = cleaned_data.get(field)
+            if field not in self.errors and (value is None or field == 'cooks' and not value):
+                self.add_error(field, "This field is required for this action.")
+        if not (cleaned_data.get('dishes') or cleaned_data.get('q', '').strip() or cleaned_data.get('all_dishes')):
+            self.add_error(
+                'all_dishes', "No dishes are selected. Tick dishes, search for some, or confirm every dish."
+            )
+        return cleaned_data
+
+    def get_dishes(self):
+        if self.cleaned_data['dishes']:
+            return self.cleaned_data['dishes']
+        return search_dishes(Dish.objects.all(), self.cleaned_data['q'].strip(), ranked=False)
+
+    def save(self):
+        """
+        Apply the action and return how many dishes or assignments changed;
+        a BulkError becomes a form error and None.
+        """
+        data = self.cleaned_data
+        dishes = self.get_dishes()
+        try:
+            if data['action'] == 'set_price':
+                return change_prices(dishes, price=data['price'])
+            if data['action'] == 'adjust_price':
+                return change_prices(dishes, percent=data['percent'])
+            if data['action'] == 'add_cooks':
+                return assign_cooks(dishes, data['cooks'])
+            if data['action'] == 'remove_cooks':
+                return unassign_cooks(dishes, data['cooks'])
+            return move_dishes(dishes, data['dish_type'])
+        except BulkError as e:
+            self.add_error(None, str(e))
+            return None
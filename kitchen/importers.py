@@ -0,0 +1,203 @@
+import json
+import time
+from decimal import Decimal
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import connections, router, transaction
+
+from kitchen.analytics import refresh_price_summaries
+from kitchen.cache import bump_menu_version
+from kitchen.counters import adjust_dish_counts
+from kitchen.models import Cook, Dish, DishType
+
+COOK_FIELDS = ('username', 'first_name', 'last_name', 'email', 'years_of_experience')
+
+
+class ImportResult:
+    def __init__(self, rows=0, elapsed=0.0):
+        self.rows = rows
+        self.elapsed = elapsed
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return f"{self.rows} rows in {self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/s)"
+
+
+def iter_records(path, chunk_size=64 * 1024):
+    """
+    Yield records from a .json array or a .jsonl file one at a time,
+    without reading the whole file into memory.
+    """
+    with open(path, 'r', encoding='utf-8') as stream:
+        if str(path).endswith(('.jsonl', '.ndjson')):
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(stream, chunk_size)
+
+
+def iter_json_array(stream, chunk_size=64 * 1024):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    opened = False
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
+                break
+            if not opened:
+                if buffer[position] != '[':
+                    raise ValueError("Expected a JSON array.")
+                opened = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break
+            yield record
+        if not chunk:
+            raise ValueError("Unexpected end of JSON array.")
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_dishes(records, batch_size=1000, progress=None):
+    """
+    Insert dishes in bulk_create batches, one transaction per batch.
+
+    Dish types are resolved from a single up-front query and created in
+    bulk as new names appear. Records may list cook usernames under
+    "cooks"; those become through-table rows in one insert per batch.
+
+    Databases that return no primary keys from a bulk insert (MySQL) get
+    one INSERT per dish and dish type instead, counted by kitchen.signals.
+    """
+    db = router.db_for_write(Dish)
+    returns_pks = connections[db].features.can_return_rows_from_bulk_insert
+
+    # Keyed on the lowercased name, matching kitchen_dishtype_name_ci_unique.
+    dish_types = {name.lower(): pk for name, pk in DishType.objects.using(db).values_list('name', 'id')}
+    cook_ids = {}
+    touched_types = set()
+    through = Dish.cooks.through
+    result = ImportResult()
+    started = time.perf_counter()
+
+    for batch in batched(records, batch_size):
+        with transaction.atomic(using=db):
+            new_types = {}
+            for record in batch:
+                key = record['dish_type'].lower()
+                if key not in dish_types:
+                    new_types.setdefault(key, record['dish_type'])
+            if new_types:
+                created = [DishType(name=name) for name in new_types.values()]
+                if returns_pks:
+                    DishType.objects.using(db).bulk_create(created)
+                else:
+                    for dish_type in created:
+                        dish_type.save(using=db)
+                dish_types.update((dish_type.name.lower(), dish_type.id) for dish_type in created)
+
+            usernames = {username for record in batch for username in record.get('cooks', ())}
+            missing = usernames - cook_ids.keys()
+            if missing:
+                cook_ids.update(Cook.objects.using(db).filter(username__in=missing).values_list('username', 'id'))
+
+            dishes = [
+                Dish(
+                    name=record['name'],
+                    description=record.get('description', ''),
+                    price=Decimal(str(record['price'])),
+                    dish_type_id=dish_types[record['dish_type'].lower()],
+                )
+                for record in batch
+            ]
+            if returns_pks:
+                Dish.objects.using(db).bulk_create(dishes)
+                adjust_dish_counts(DishType, Counter(dish.dish_type_id for dish in dishes))
+            else:
+                for dish in dishes:
+                    dish.save(using=db)
+            links = {
+                (dish.id, cook_ids[username])
+                for dish, record in zip(dishes, batch)
+                for username in record.get('cooks', ())
+                if username in cook_ids
+            }
+            if links:
+                through.objects.using(db).bulk_create(
+                    [through(dish_id=dish_id, cook_id=cook_id) for dish_id, cook_id in links],
+                    ignore_conflicts=True,
+                )
+            # The dishes are new, so every link is too.
+            adjust_dish_counts(Cook, Counter(cook_id for _, cook_id in links))
+            touched_types.update(dish.dish_type_id for dish in dishes)
+            # bulk_create sends no signals, so invalidate cached menus here.
+            transaction.on_commit(bump_menu_version, using=db)
+
+        result.rows += len(batch)
+        result.elapsed = time.perf_counter() - started
+        if progress:
+            progress(result)
+    refresh_price_summaries(touched_types)
+    return result
+
+
+def import_cooks(records, batch_size=1000, progress=None):
+    """
+    Upsert cooks by username in bulk_create batches. Records without a
+    password get an unusable one; plain-text passwords are hashed.
+    """
+    db = router.db_for_write(Cook)
+    result = ImportResult()
+    started = time.perf_counter()
+
+    for batch in batched(records, batch_size):
+        cooks = []
+        for record in batch:
+            cook = Cook(**{field: record[field] for field in COOK_FIELDS if field in record})
+            cook.password = make_password(record.get('password'))
+            cooks.append(cook)
+        # Only overwrite columns the feed actually carries.
+        update_fields = sorted({field for record in batch for field in record} & set(COOK_FIELDS) - {'username'})
+        if update_fields:
+            update_fields.append('updated_at')
+        with transaction.atomic(using=db):
+            if update_fields:
+                Cook.objects.using(db).bulk_create(
+                    cooks,
+                    update_conflicts=True,
+                    unique_fields=['username'],
+                    update_fields=update_fields,
+                )
+            else:
+                Cook.objects.using(db).bulk_create(cooks, ignore_conflicts=True)
+            # bulk_create sends no signals, so invalidate cached menus here.
+            transaction.on_commit(bump_menu_version, using=db)
+
+        result.rows += len(batch)
+        result.elapsed = time.perf_counter() - started
+        if progress:
+            progress(result)
+    return result
@@ -0,0 +1,96 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+class LoadTestResult:
+    def __init__(self, url, latencies, errors, elapsed):
+        self.url = url
+        self.latencies = latencies
+        self.errors = errors
+        self.elapsed = elapsed
+
+    @property
+    def requests_per_second(self):
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, fraction):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    def __str__(self):
+        median = statistics.median(self.latencies) * 1000 if self.latencies else 0.0
+        return (
+            f"{self.url}: {self.requests_per_second:.0f} req/s, "
+            f"p50 {median:.1f} ms, p95 {self.percentile(0.95):.1f} ms, "
+            f"{len(self.latencies)} ok, {self.errors} errors"
+        )
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed.")
+    status = int(status_line.split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while size := int((await reader.readline()).split(b';')[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def _client(url, counter, latencies, errors):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path = f'{path}?{parts.query}'
+    request = (
+        f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: keep-alive\r\n\r\n'
+    ).encode()
+    reader = writer = None
+    while counter[0] > 0:
+        counter[0] -= 1
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await _read_response(reader)
+        except (OSError, ValueError, ConnectionError, asyncio.IncompleteReadError):
+            errors[0] += 1
+            writer = None
+            continue
+        if status < 400:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors[0] += 1
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load_test(url, requests=2000, concurrency=50):
+    """
+    Fire `requests` GETs at url over `concurrency` keep-alive connections
+    and report throughput and latency percentiles.
+    """
+    counter, latencies, errors = [requests], [], [0]
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(url, counter, latencies, errors) for _ in range(concurrency)))
+    return LoadTestResult(url, latencies, errors[0], time.perf_counter() - started)
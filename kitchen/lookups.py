@@ -0,0 +1,75 @@
+import copy
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+from kitchen.models import Cook, Dish, DishType
+from kitchen.pagination import KeysetPaginator
+
+# Lookup name -> (model, field searched, ordered by and shown as the label).
+LOOKUPS = {
+    'cooks': (Cook, 'username'),
+    'dish-types': (DishType, 'name'),
+    'dishes': (Dish, 'name'),
+}
+
+
+def lookup(kind, query='', cursor=None, limit=20):
+    """
+    One page of {'id', 'text'} results whose label starts with query,
+    ordered by (label, id) and paged with an opaque keyset cursor.
+    """
+    model, field = LOOKUPS[kind]
+    queryset = model.objects.only('id', field)
+    if query:
+        queryset = queryset.filter(**{f'{field}__istartswith': query})
+    page = KeysetPaginator(queryset, limit, (field, 'id'), count_mode='none').page(cursor)
+    return {
+        'results': [{'id': obj.id, 'text': getattr(obj, field)} for obj in page],
+        'next': page.next_cursor,
+    }
+
+
+class LookupSelectMixin:
+    """
+    Render only the selected options of a model choice field. Everything
+    else is fetched from the lookup endpoint by static/js/lookup.js as the
+    user types, so the page no longer carries a row per cook or dish type.
+    """
+
+    def __init__(self, lookup, attrs=None):
+        super().__init__(attrs)
+        self.lookup = lookup
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-lookup-url'] = reverse('kitchen:lookup', args=[self.lookup])
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        iterator = self.choices
+        _, field = LOOKUPS[self.lookup]
+        key = iterator.field.to_field_name or 'pk'
+        selected = [v for v in value if v]
+        objects = []
+        if selected:
+            try:
+                objects = list(iterator.queryset.filter(**{f'{key}__in': selected}).only(field))
+            except (ValueError, TypeError, ValidationError):
+                objects = []
+        choices = [(iterator.choice(obj)[0], getattr(obj, field)) for obj in objects]
+        if iterator.field.empty_label is not None and not self.allow_multiple_selected:
+            choices.insert(0, ('', iterator.field.empty_label))
+
+        widget = copy.copy(self)
+        widget.choices = choices
+        return super(LookupSelectMixin, widget).optgroups(name, value, attrs)
+
+
+class LookupSelect(LookupSelectMixin, forms.Select):
+    pass
+
+
+class LookupSelectMultiple(LookupSelectMixin, forms.SelectMultiple):
+    pass
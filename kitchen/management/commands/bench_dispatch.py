@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen.benchmarks import bench_dispatcher
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure kitchen.dispatch in memory on a synthetic kitchen and fail if "
+        "it assigns fewer than --min-rate lines per second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cooks', type=int, default=5_000)
+        parser.add_argument('--dishes', type=int, default=100_000)
+        parser.add_argument('--cooks-per-dish', type=int, default=3)
+        parser.add_argument('--lines', type=int, default=200_000)
+        parser.add_argument('--max-load', type=int, default=5)
+        parser.add_argument('--min-rate', type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        result = bench_dispatcher(
+            cooks=options['cooks'],
+            dishes=options['dishes'],
+            cooks_per_dish=options['cooks_per_dish'],
+            lines=options['lines'],
+            max_load=options['max_load'] or None,
+        )
+        for name, value in result.items():
+            self.stdout.write(f"{name:14} {value:>12}")
+        if result['per_second'] < options['min_rate']:
+            raise CommandError(f"{result['per_second']} assignments/s, expected at least {options['min_rate']}")
+        self.stdout.write(self.style.SUCCESS("Dispatch rate OK."))
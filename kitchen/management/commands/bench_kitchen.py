@@ -0,0 +1,69 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from kitchen.benchmarks import (
+    BASELINE_PATH,
+    build_routes,
+    compare_to_baseline,
+    load_baseline,
+    measure_routes,
+    save_baseline,
+    seed_kitchen,
+)
+from kitchen.models import Cook
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with a synthetic kitchen, request every "
+        "route and fail if query counts, p95 latency or memory exceed the baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dishes', type=int, default=100_000)
+        parser.add_argument('--cooks', type=int, default=5_000)
+        parser.add_argument('--dish-types', type=int, default=200)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--tolerance', type=float, default=1.5)
+        parser.add_argument('--baseline', default=str(BASELINE_PATH))
+        parser.add_argument('--update-baseline', action='store_true')
+
+    def handle(self, *args, **options):
+        size = {
+            'dishes': options['dishes'],
+            'cooks': options['cooks'],
+            'dish_types': options['dish_types'],
+        }
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Seeding {size}...")
+            seed_kitchen(**size)
+            user = Cook.objects.create_user(username='bench', password='bench')
+            # 4xx responses such as GET /accounts/logout/ are expected here.
+            logging.disable(logging.WARNING)
+            results = measure_routes(build_routes(), iterations=options['iterations'], user=user)
+        finally:
+            logging.disable(logging.NOTSET)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'route':40} {'status':>6} {'queries':>7} {'p50 ms':>8} {'p95 ms':>8} {'KiB':>9}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:40} {result['status']:>6} {result['queries']:>7} "
+                f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['memory_kb']:>9}"
+            )
+
+        if options['update_baseline']:
+            save_baseline(results, size, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        failures = compare_to_baseline(results, load_baseline(options['baseline']), size, options['tolerance'])
+        if failures:
+            raise CommandError("Benchmark regressions:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
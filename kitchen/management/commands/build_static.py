@@ -0,0 +1,73 @@
+import base64
+import gzip
+import hashlib
+from pathlib import Path
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen.assets import (
+    BUNDLE_CSS, BUNDLE_JS, LOCAL_CSS, LOCAL_JS, VENDOR_CSS, VENDOR_JS, template_tokens, trim_css,
+)
+
+
+def integrity(content):
+    return 'sha384-' + base64.b64encode(hashlib.sha384(content).digest()).decode()
+
+
+class Command(BaseCommand):
+    help = (
+        "Vendor Bootstrap and jQuery into static/vendor/, then write "
+        "static/dist/kitchen.css (Bootstrap trimmed to the classes the "
+        "templates use, plus the project CSS) and static/dist/kitchen.js "
+        "(vendored plus project scripts). "
+        "Run before collectstatic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offline', action='store_true', help="Fail instead of downloading missing vendor files.")
+        parser.add_argument('--no-trim', action='store_true', help="Bundle the full Bootstrap stylesheet.")
+
+    def handle(self, *args, **options):
+        root = Path(settings.STATICFILES_DIRS[0])
+        for path, url, expected in VENDOR_CSS + VENDOR_JS:
+            self.vendor(root / path, url, expected, options['offline'])
+
+        bootstrap = ''.join((root / path).read_text(encoding='utf-8') for path, _, _ in VENDOR_CSS)
+        if not options['no_trim']:
+            bootstrap = trim_css(bootstrap, template_tokens())
+        css = '\n'.join([bootstrap] + [(root / path).read_text(encoding='utf-8') for path in LOCAL_CSS])
+        js = ';\n'.join(
+            [(root / path).read_text(encoding='utf-8') for path, _, _ in VENDOR_JS]
+            + [(root / path).read_text(encoding='utf-8') for path in LOCAL_JS]
+        )
+
+        for path, content in ((BUNDLE_CSS, css), (BUNDLE_JS, js)):
+            target = root / path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(content, encoding='utf-8')
+        self.report(root)
+
+    def vendor(self, target, url, expected, offline):
+        if target.exists() and integrity(target.read_bytes()) == expected:
+            return
+        if offline:
+            raise CommandError(f"{target} is missing or does not match {expected}.")
+        self.stdout.write(f"Downloading {url}")
+        try:
+            with urlopen(url, timeout=30) as response:
+                content = response.read()
+        except OSError as e:
+            raise CommandError(f"Could not download {url}: {e}")
+        if integrity(content) != expected:
+            raise CommandError(f"{url} does not match its pinned integrity hash {expected}.")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+
+    def report(self, root):
+        before = [path for path, _, _ in VENDOR_CSS + VENDOR_JS] + LOCAL_CSS + LOCAL_JS
+        for label, paths in (("Separate files", before), ("Bundles", [BUNDLE_CSS, BUNDLE_JS])):
+            raw = sum((root / path).stat().st_size for path in paths)
+            packed = sum(len(gzip.compress((root / path).read_bytes())) for path in paths)
+            self.stdout.write(f"{label}: {len(paths)} requests, {raw / 1024:.1f} KiB, {packed / 1024:.1f} KiB gzipped")
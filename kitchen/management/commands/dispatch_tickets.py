@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from kitchen.dispatch import DispatchLoop
+
+
+class Command(BaseCommand):
+    help = (
+        "Assign queued ticket lines to the least loaded cook who can prepare "
+        "them, polling until stopped. Run exactly one of these per database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help="Seconds between polls.")
+        parser.add_argument('--once', action='store_true', help="Poll once and exit.")
+
+    def handle(self, *args, **options):
+        loop = DispatchLoop()
+        if options['once']:
+            assigned = loop.poll()
+            self.stdout.write(f"Assigned {assigned} lines, {loop.dispatcher.queued} waiting")
+            return
+        loop.run(options['interval'])
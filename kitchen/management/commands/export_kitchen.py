@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen.exports import EXPORTS, FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream dishes, dish types or cooks as CSV or JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', help="File to write; defaults to stdout.")
+        parser.add_argument('-q', '--query', default='', help="Same filter as the list page's search box.")
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] is not None and options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        chunks = stream_export(options['kind'], options['format'], options['query'], options['chunk_size'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+            f.writelines(chunks)
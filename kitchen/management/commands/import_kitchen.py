@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from kitchen.importers import import_cooks, import_dishes, iter_records
+
+IMPORTERS = {
+    'dishes': import_dishes,
+    'cooks': import_cooks,
+}
+
+
+class Command(BaseCommand):
+    help = "Bulk-import dishes or cooks from a .json array or .jsonl file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        def progress(result):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  {result}")
+
+        try:
+            result = IMPORTERS[options['kind']](
+                iter_records(options['path']),
+                batch_size=options['batch_size'],
+                progress=progress,
+            )
+        except (OSError, ValueError, KeyError, IntegrityError) as e:
+            raise CommandError(f"Import failed: {e!r}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {options['kind']}: {result}"))
@@ -0,0 +1,29 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from kitchen.loadtest import run_load_test
+
+
+class Command(BaseCommand):
+    help = (
+        "HTTP load test against one or more running servers, e.g. the WSGI and "
+        "ASGI profiles from gunicorn.conf.py, reporting throughput relative to "
+        "the first URL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        baseline = None
+        for url in options['urls']:
+            result = asyncio.run(run_load_test(url, options['requests'], options['concurrency']))
+            line = str(result)
+            if baseline is None:
+                baseline = result.requests_per_second
+            elif baseline:
+                line += f" ({result.requests_per_second / baseline:.2f}x)"
+            self.stdout.write(line)
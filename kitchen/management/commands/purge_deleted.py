@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from kitchen.deletion import requeue_stale, run_pending
+from kitchen.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Run pending background deletions in this process, first requeueing "
+        "running ones that stopped making progress (e.g. their worker was "
+        "restarted). With --list, only report progress."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-minutes', type=int, default=10)
+        parser.add_argument('--list', action='store_true', help="Show unfinished jobs and exit.")
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for job in DeletionJob.objects.exclude(status=DeletionJob.Status.DONE).order_by('id'):
+                self.stdout.write(f"#{job.pk} {job}")
+            return
+        requeued = requeue_stale(options['stale_minutes'])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stalled jobs")
+        self.stdout.write(f"Finished {run_pending()} jobs")
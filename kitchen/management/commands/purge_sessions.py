@@ -0,0 +1,33 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions from django_session in small batches, each "
+        "its own short transaction, instead of clearsessions' single DELETE. "
+        "Safe to run from cron while the site is up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0, help="Seconds to pause between batches.")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        db = router.db_for_write(Session)
+        expired = Session.objects.using(db).filter(expire_date__lt=timezone.now())
+        deleted = 0
+        while True:
+            keys = list(expired.order_by('expire_date').values_list('session_key', flat=True)[:options['chunk_size']])
+            if not keys:
+                break
+            deleted += Session.objects.using(db).filter(session_key__in=keys).delete()[0]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(f"Deleted {deleted} expired sessions")
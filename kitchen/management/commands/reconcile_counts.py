@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from kitchen.cache import bump_menu_version
+from kitchen.counters import reconcile_dish_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute DishType.dish_count and Cook.dish_count from the dishes "
+        "and fix the rows that drifted (e.g. after raw SQL or bulk updates "
+        "that bypass signals)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report stale rows without fixing them.")
+
+    def handle(self, *args, **options):
+        stale = reconcile_dish_counts(dry_run=options['dry_run'])
+        verb = "stale" if options['dry_run'] else "fixed"
+        for model, count in stale.items():
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {count} {verb}")
+        if not options['dry_run'] and any(stale.values()):
+            bump_menu_version()
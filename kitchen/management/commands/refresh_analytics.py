@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from kitchen.analytics import refresh_price_summaries
+from kitchen.cache import bump_menu_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the per dish type price summaries behind /api/v1/analytics/ "
+        "from scratch. Dish changes keep them current; run this after raw "
+        "SQL or bulk updates, or from cron as a safety net."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = refresh_price_summaries()
+        bump_menu_version()
+        self.stdout.write(f"Refreshed {count} dish type summaries in {time.perf_counter() - started:.2f}s")
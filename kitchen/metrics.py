@@ -0,0 +1,101 @@
+import threading
+from bisect import bisect_left
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the shape Prometheus expects. Buckets are
+    stored non-cumulatively so observe() touches a single slot.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._help = {}
+        self._gauges = []
+
+    def describe(self, name, help_text, buckets):
+        self._help[name] = (help_text, buckets)
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._metrics.get(key)
+            if histogram is None:
+                histogram = self._metrics[key] = Histogram(self._help[name][1])
+            histogram.observe(value)
+
+    def register_gauges(self, collect):
+        """
+        Register a callable returning [(name, help, labels, value), ...]
+        that is evaluated on every scrape.
+        """
+        self._gauges.append(collect)
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def render(self):
+        with self._lock:
+            snapshot = {
+                key: (list(histogram.cumulative()), histogram.sum, histogram.count)
+                for key, histogram in self._metrics.items()
+            }
+        lines = []
+        for name, (help_text, _) in self._help.items():
+            series = [(labels, data) for (metric, labels), data in sorted(snapshot.items()) if metric == name]
+            if not series:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, (buckets, total, count) in series:
+                label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in labels)
+                for bound, cumulative in buckets:
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{label_text}}} {total}')
+                lines.append(f'{name}_count{{{label_text}}} {count}')
+        for collect in self._gauges:
+            described = set()
+            for name, help_text, labels, value in collect():
+                if name not in described:
+                    lines.append(f'# HELP {name} {help_text}')
+                    lines.append(f'# TYPE {name} gauge')
+                    described.add(name)
+                label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+                lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+registry.describe('kitchen_request_duration_seconds', "Wall time per request.", DURATION_BUCKETS)
+registry.describe('kitchen_sql_duration_seconds', "Time spent in SQL per request.", DURATION_BUCKETS)
+registry.describe('kitchen_sql_queries', "SQL queries per request.", COUNT_BUCKETS)
+registry.describe('kitchen_template_render_seconds', "Template render time per request.", DURATION_BUCKETS)
@@ -0,0 +1,154 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from kitchen.metrics import registry
+from kitchen.routers import RoutingState, current_routing
+
+# Stats of the request being handled. Context variables follow the request
+# into sync_to_async threads, where async views run their queries.
+current_stats = ContextVar('kitchen_request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+
+    def render_finished(self, response):
+        if self.render_started is not None:
+            self.render_time = time.perf_counter() - self.render_started
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_time += time.perf_counter() - started
+        stats.queries += 1
+
+
+@receiver(connection_created)
+def install_sql_wrapper(sender, connection, **kwargs):
+    # Outermost position, so execute_wrapper() blocks that pop their own
+    # wrapper off the end of the list never remove this one.
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, sql_wrapper)
+
+
+class PerformanceMiddleware:
+    """
+    Record per-view SQL count, SQL time, template render time and wall time
+    into the in-process histograms served by MetricsView, and optionally
+    expose them to the browser as a Server-Timing header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'KITCHEN_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'KITCHEN_SERVER_TIMING', False)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = request._performance_stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.record(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats = request._performance_stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.record(request, response, stats, time.perf_counter() - started)
+
+    def record(self, request, response, stats, total):
+        match = getattr(request, 'resolver_match', None)
+        labels = {'view': match.view_name if match else 'unmatched'}
+        registry.observe('kitchen_request_duration_seconds', labels, total)
+        registry.observe('kitchen_sql_duration_seconds', labels, stats.sql_time)
+        registry.observe('kitchen_sql_queries', labels, stats.queries)
+        registry.observe('kitchen_template_render_seconds', labels, stats.render_time)
+
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'sql;dur={stats.sql_time * 1000:.1f};desc="{stats.queries} queries", '
+                f'tpl;dur={stats.render_time * 1000:.1f}, '
+                f'total;dur={total * 1000:.1f}'
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # Listed first in MIDDLEWARE, this runs last, right before render().
+        stats = request._performance_stats
+        stats.render_started = time.perf_counter()
+        response.add_post_render_callback(stats.render_finished)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Track whether the request wrote to the database so ReplicaRouter can
+    route its reads, and pin a client that wrote to the primary for
+    KITCHEN_DB_REPLICA_PIN_SECONDS so it reads its own edits.
+    """
+    sync_capable = True
+    async_capable = True
+    cookie_name = 'kitchen_primary_pin'
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'KITCHEN_DB_REPLICAS', None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'KITCHEN_DB_REPLICA_PIN_SECONDS', 10)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(pinned=self.cookie_name in request.COOKIES)
+        token = current_routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=self.cookie_name in request.COOKIES)
+        token = current_routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.pin(response, state)
+
+    def pin(self, response, state):
+        if state.wrote:
+            response.set_cookie(self.cookie_name, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
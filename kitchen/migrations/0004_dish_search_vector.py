@@ -0,0 +1,65 @@
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# The search vector, its trigger and the GIN indexes only exist on
+# PostgreSQL. Other backends keep a plain nullable column and
+# kitchen.search falls back to icontains.
+
+FORWARD_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION kitchen_dish_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER kitchen_dish_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON kitchen_dish
+    FOR EACH ROW EXECUTE FUNCTION kitchen_dish_search_vector_update()
+    """,
+    """
+    UPDATE kitchen_dish SET search_vector =
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    """,
+    "CREATE INDEX kitchen_dish_search_vector_gin ON kitchen_dish USING gin (search_vector)",
+    "CREATE INDEX kitchen_dish_name_trgm ON kitchen_dish USING gin (name gin_trgm_ops)",
+]
+
+BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS kitchen_dish_name_trgm",
+    "DROP INDEX IF EXISTS kitchen_dish_search_vector_gin",
+    "DROP TRIGGER IF EXISTS kitchen_dish_search_vector_trigger ON kitchen_dish",
+    "DROP FUNCTION IF EXISTS kitchen_dish_search_vector_update()",
+]
+
+
+def run_postgres_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen', '0003_alter_cook_years_of_experience'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='dish',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_postgres_sql(FORWARD_SQL), run_postgres_sql(BACKWARD_SQL)),
+    ]
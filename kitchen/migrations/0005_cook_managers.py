@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:59
+
+import kitchen.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen', '0004_dish_search_vector'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='cook',
+            managers=[
+                ('objects', kitchen.models.CookManager()),
+            ],
+        ),
+    ]
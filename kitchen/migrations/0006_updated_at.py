@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen', '0005_cook_managers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cook',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='dish',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='dishtype',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:07
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def merge_duplicate_dish_types(apps, schema_editor):
+    # Uniqueness used to be checked case-sensitively in DishTypeForm only,
+    # so fold duplicates into the oldest row before adding the constraint.
+    DishType = apps.get_model('kitchen', 'DishType')
+    Dish = apps.get_model('kitchen', 'Dish')
+    keep = {}
+    for dish_type_id, name in DishType.objects.order_by('id').values_list('id', 'name'):
+        original = keep.setdefault(name.lower(), dish_type_id)
+        if original != dish_type_id:
+            Dish.objects.filter(dish_type_id=dish_type_id).update(dish_type_id=original)
+            DishType.objects.filter(id=dish_type_id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('kitchen', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cook',
+            index=models.Index(fields=['username', 'id'], name='kitchen_cook_username_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cook',
+            index=models.Index(fields=['years_of_experience'], name='kitchen_cook_experience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(fields=['name', 'id'], name='kitchen_dish_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(fields=['dish_type', 'name'], name='kitchen_dish_type_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dishtype',
+            index=models.Index(fields=['name', 'id'], name='kitchen_dishtype_name_id_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_dish_types, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dish',
+            constraint=models.CheckConstraint(condition=models.Q(('price__gte', 0)), name='kitchen_dish_price_gte_0', violation_error_message='Price must be greater than or equal to 0.'),
+        ),
+        migrations.AddConstraint(
+            model_name='dishtype',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='kitchen_dishtype_name_ci_unique', violation_error_message='This dish type already exists'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:29
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_dishes(apps, schema_editor):
+    DishType = apps.get_model('kitchen', 'DishType')
+    Cook = apps.get_model('kitchen', 'Cook')
+    Dish = apps.get_model('kitchen', 'Dish')
+    for model, rows in (
+        (DishType, Dish.objects.filter(dish_type=OuterRef('pk')).values('dish_type')),
+        (Cook, Dish.cooks.through.objects.filter(cook=OuterRef('pk')).values('cook')),
+    ):
+        count = rows.order_by().annotate(count=Count('pk')).values('count')
+        model.objects.update(dish_count=Coalesce(Subquery(count, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('kitchen', '0007_indexes_and_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cook',
+            name='dish_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='dishtype',
+            name='dish_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='cook',
+            index=models.Index(fields=['-dish_count', 'id'], name='kitchen_cook_dish_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dishtype',
+            index=models.Index(fields=['-dish_count', 'id'], name='kitchen_dishtype_count_idx'),
+        ),
+        migrations.RunPython(count_dishes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen', '0008_dish_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceSummary',
+            fields=[
+                ('dish_type', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='price_summary', serialize=False, to='kitchen.dishtype')),
+                ('dishes', models.IntegerField()),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('avg_price', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('median_price', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('histogram', models.JSONField(default=list)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(fields=['dish_type', 'price'], name='kitchen_dish_type_price_idx'),
+        ),
+    ]
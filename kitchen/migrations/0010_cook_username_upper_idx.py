@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# istartswith and iexact compile to UPPER("username"::text) LIKE/= UPPER(...)
+# on PostgreSQL; this expression index with text_pattern_ops serves both.
+# Other backends have no equivalent and keep scanning.
+
+FORWARD_SQL = [
+    "CREATE INDEX kitchen_cook_username_upper_idx ON kitchen_cook (UPPER(username::text) text_pattern_ops)",
+]
+
+BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS kitchen_cook_username_upper_idx",
+]
+
+
+def run_postgres_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen', '0009_price_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_postgres_sql(FORWARD_SQL), run_postgres_sql(BACKWARD_SQL)),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:49
+
+import django.db.models.manager
+import kitchen.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen', '0010_cook_username_upper_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='cook',
+            managers=[
+                ('objects', django.db.models.manager.Manager()),
+                ('all_objects', kitchen.models.CookManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cook',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='dishtype',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('object_repr', models.CharField(max_length=200)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('total', models.IntegerField(default=0)),
+                ('done', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='kitchen_deletionjob_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('kitchen', '0012_tickets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cook',
+            index=models.Index(fields=['updated_at'], name='kitchen_cook_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(fields=['updated_at'], name='kitchen_dish_updated_at_idx'),
+        ),
+    ]
@@ -1,10 +1,46 @@
-from django.contrib.auth.models import AbstractUser, Permission, Group
+from django.contrib.auth.models import AbstractUser, Permission, Group, UserManager
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Lower
+
+
+class CookQuerySet(models.QuerySet):
+    def for_list(self):
+        return self.only('id', 'username', 'first_name', 'last_name', 'years_of_experience', 'dish_count')
+
+    def with_menu_details(self):
+        return self.for_list().prefetch_related(
+            models.Prefetch('dishes', queryset=Dish.objects.for_list().order_by('name', 'id'))
+        )
+
+
+class CookManager(UserManager.from_queryset(CookQuerySet)):
+    pass
+
+
+class ActiveCookManager(CookManager):
+    # Cooks marked for deletion are hidden everywhere, including login;
+    # Cook.all_objects still sees them. See kitchen.deletion. Migrations
+    # keep the unfiltered manager.
+    use_in_migrations = False
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class DishTypeManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 
 class Cook(AbstractUser):
     years_of_experience = models.IntegerField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized, see kitchen.counters.
+    dish_count = models.IntegerField(default=0, editable=False)
+    # Set when the cook is queued for deletion, see kitchen.deletion.
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     groups = models.ManyToManyField(
         Group,
@@ -17,9 +53,18 @@ class Cook(AbstractUser):
         blank=True,
     )
 
+    objects = ActiveCookManager()
+    all_objects = CookManager()
+
     class Meta:
         verbose_name = "Cook"
         verbose_name_plural = "Cooks"
+        indexes = [
+            models.Index(fields=['username', 'id'], name='kitchen_cook_username_id_idx'),
+            models.Index(fields=['years_of_experience'], name='kitchen_cook_experience_idx'),
+            models.Index(fields=['-dish_count', 'id'], name='kitchen_cook_dish_count_idx'),
+            models.Index(fields=['updated_at'], name='kitchen_cook_updated_at_idx'),
+        ]
 
     def clean(self):
         super().clean()
@@ -29,6 +74,27 @@ class Cook(AbstractUser):
 
 class DishType(models.Model):
     name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized, see kitchen.counters.
+    dish_count = models.IntegerField(default=0, editable=False)
+    # Set when the dish type is queued for deletion, see kitchen.deletion.
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = DishTypeManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id'], name='kitchen_dishtype_name_id_idx'),
+            models.Index(fields=['-dish_count', 'id'], name='kitchen_dishtype_count_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                Lower('name'),
+                name='kitchen_dishtype_name_ci_unique',
+                violation_error_message="This dish type already exists",
+            ),
+        ]
 
     def clean(self):
         super().clean()
@@ -36,14 +102,140 @@ class DishType(models.Model):
             raise ValidationError("Name is required.")
 
 
+class DishQuerySet(models.QuerySet):
+    def for_list(self):
+        return self.only('id', 'name')
+
+    def with_menu_details(self):
+        return self.select_related('dish_type').only(
+            'id', 'name', 'description', 'price', 'dish_type', 'dish_type__name'
+        ).prefetch_related(
+            models.Prefetch('cooks', queryset=Cook.objects.for_list().order_by('username', 'id'))
+        )
+
+
+class DishManager(models.Manager.from_queryset(DishQuerySet)):
+    # Dishes of a dish type marked for deletion are hidden with it until
+    # the purge removes them; Dish.all_objects still sees them.
+
+    def get_queryset(self):
+        return super().get_queryset().filter(dish_type__deleted_at__isnull=True)
+
+
 class Dish(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
     price = models.DecimalField(max_digits=6, decimal_places=2)
     dish_type = models.ForeignKey(DishType, on_delete=models.CASCADE)
     cooks = models.ManyToManyField(Cook, related_name="dishes")
+    updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL, see migration 0004.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = DishManager()
+    all_objects = DishQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id'], name='kitchen_dish_name_id_idx'),
+            models.Index(fields=['dish_type', 'name'], name='kitchen_dish_type_name_idx'),
+            models.Index(fields=['dish_type', 'price'], name='kitchen_dish_type_price_idx'),
+            models.Index(fields=['updated_at'], name='kitchen_dish_updated_at_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(price__gte=0),
+                name='kitchen_dish_price_gte_0',
+                violation_error_message="Price must be greater than or equal to 0.",
+            ),
+        ]
 
     def clean(self):
         super().clean()
         if self.price < 0:
             raise ValidationError("Price must be greater than or equal to 0.")
+
+
+class PriceSummary(models.Model):
+    """
+    Price statistics of one dish type, refreshed by kitchen.analytics.
+    Dish types without dishes have no row.
+    """
+    dish_type = models.OneToOneField(
+        DishType, on_delete=models.CASCADE, primary_key=True, related_name='price_summary'
+    )
+    dishes = models.IntegerField()
+    min_price = models.DecimalField(max_digits=6, decimal_places=2)
+    max_price = models.DecimalField(max_digits=6, decimal_places=2)
+    avg_price = models.DecimalField(max_digits=6, decimal_places=2)
+    median_price = models.DecimalField(max_digits=6, decimal_places=2)
+    # Dishes per equal-width price bucket between min_price and max_price.
+    histogram = models.JSONField(default=list)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+
+class DeletionJob(models.Model):
+    """
+    Background purge of a dish type or cook that was marked deleted, with
+    its progress. Run by kitchen.deletion.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        RUNNING = 'running'
+        DONE = 'done'
+        FAILED = 'failed'
+
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    object_repr = models.CharField(max_length=200)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    # Dependent rows (dishes or dish assignments) to remove, and removed so far.
+    total = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='kitchen_deletionjob_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Delete {self.object_repr}: {self.status}, {self.done}/{self.total}"
+
+
+class Ticket(models.Model):
+    """
+    A kitchen order: one TicketLine per dish to prepare.
+    """
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+class TicketLine(models.Model):
+    """
+    One dish of a ticket. Queued lines are handed to a cook who can
+    prepare the dish by kitchen.dispatch; the cook marks them done.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued'
+        ASSIGNED = 'assigned'
+        DONE = 'done'
+        CANCELLED = 'cancelled'
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='lines')
+    # Null once the dish or cook is deleted; open lines are then cancelled
+    # or requeued by the dispatcher.
+    dish = models.ForeignKey(Dish, on_delete=models.SET_NULL, null=True, related_name='ticket_lines')
+    cook = models.ForeignKey(Cook, on_delete=models.SET_NULL, null=True, blank=True, related_name='ticket_lines')
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    assigned_at = models.DateTimeField(null=True, blank=True)
+    done_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'cook'], name='kitchen_ticketline_status_idx'),
+        ]
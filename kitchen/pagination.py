@@ -0,0 +1,205 @@
+import base64
+import hashlib
+import json
+from decimal import InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+
+from kitchen.cache import menu_version
+
+
+def encode_cursor(values, direction='next'):
+    payload = json.dumps([direction, list(values)], separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise Http404("Invalid cursor.")
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        raise Http404("Invalid cursor.")
+    return direction, values
+
+
+class KeysetPage:
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Seek pagination over a queryset ordered by a unique key such as
+    ('name', 'id') or ('-dish_count', 'id'). Every page costs one indexed range scan of
+    per_page + 1 rows no matter how deep the client has paged.
+    """
+
+    def __init__(self, queryset, per_page, ordering, count_mode='cached', count_timeout=60):
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.count_mode = count_mode
+        self.count_timeout = count_timeout
+        self._count = None
+
+    def _seek_filter(self, values, forward):
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            # A '-field' is walked downwards, so its comparison flips.
+            lookup = 'gt' if forward != field.startswith('-') else 'lt'
+            step = Q(**{f'{field.lstrip("-")}__{lookup}': values[i]})
+            for previous, value in zip(self.ordering[:i], values[:i]):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def _clean_values(self, values):
+        """
+        Convert the cursor's values with the model fields they seek on, so
+        a tampered cursor is a 404 rather than an error from the database.
+        """
+        if len(values) != len(self.ordering):
+            raise Http404("Invalid cursor.")
+        cleaned = []
+        for field, value in zip(self.ordering, values):
+            try:
+                model_field = self.queryset.model._meta.get_field(field.lstrip('-'))
+            except FieldDoesNotExist:
+                cleaned.append(value)
+                continue
+            try:
+                if value is None:
+                    raise ValueError
+                value = model_field.to_python(value)
+                model_field.run_validators(value)
+            except (ValidationError, ValueError, TypeError, OverflowError, InvalidOperation):
+                raise Http404("Invalid cursor.")
+            cleaned.append(value)
+        return cleaned
+
+    def _key(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.ordering]
+
+    def _page_queryset(self, cursor):
+        direction, values = decode_cursor(cursor) if cursor else ('next', None)
+        if values is not None:
+            values = self._clean_values(values)
+
+        forward = direction == 'next'
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, forward))
+        if not forward:
+            queryset = queryset.reverse()
+        return queryset[:self.per_page + 1], forward, values
+
+    def page(self, cursor=None):
+        queryset, forward, values = self._page_queryset(cursor)
+        return self._build_page(list(queryset), forward, values)
+
+    async def apage(self, cursor=None):
+        queryset, forward, values = self._page_queryset(cursor)
+        return self._build_page([row async for row in queryset], forward, values)
+
+    def _build_page(self, rows, forward, values):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or not forward:
+                next_cursor = encode_cursor(self._key(rows[-1]), 'next')
+            if values is not None and (has_more or forward):
+                previous_cursor = encode_cursor(self._key(rows[0]), 'prev')
+        return KeysetPage(rows, self, next_cursor, previous_cursor)
+
+    @property
+    def count(self):
+        if self._count is None:
+            if self.count_mode == 'approximate':
+                self._count = self._approximate_count()
+            elif self.count_mode == 'cached':
+                self._count = self._cached_count()
+        return self._count
+
+    def _cached_count(self):
+        query = self.queryset.order_by()
+        digest = hashlib.md5(str(query.query).encode()).hexdigest()
+        key = f'kitchen:count:{menu_version()}:{query.model._meta.label_lower}:{digest}'
+        return cache.get_or_set(key, query.count, self.count_timeout)
+
+    def _approximate_count(self):
+        # Planner statistics are only meaningful for the whole table.
+        connection = connections[self.queryset.db]
+        if connection.vendor != 'postgresql' or self.queryset.query.where:
+            return self._cached_count()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [self.queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < 0:
+            return self._cached_count()
+        return row[0]
+
+
+class KeysetPaginationMixin:
+    """
+    Opt-in keyset pagination for ListViews, enabled with
+    KITCHEN_PAGINATION_MODE = 'keyset'. Views declare keyset_ordering, or
+    override get_keyset_ordering() when it depends on the request.
+    """
+    keyset_ordering = ('id',)
+    cursor_kwarg = 'cursor'
+
+    def use_keyset_pagination(self):
+        return getattr(settings, 'KITCHEN_PAGINATION_MODE', 'offset') == 'keyset'
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def get_keyset_paginator(self, queryset, page_size):
+        return KeysetPaginator(
+            queryset,
+            page_size,
+            self.get_keyset_ordering(),
+            count_mode=getattr(settings, 'KITCHEN_PAGINATION_COUNT', 'cached'),
+            count_timeout=getattr(settings, 'KITCHEN_PAGINATION_COUNT_TIMEOUT', 60),
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_keyset_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = self.get_keyset_paginator(queryset, page_size)
+        page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,67 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Routing state of the request being handled, set by ReplicaRoutingMiddleware.
+# Like the performance stats it is a mutable object, so a write made inside a
+# sync_to_async thread is still seen when the response goes out.
+current_routing = ContextVar('kitchen_db_routing', default=None)
+
+# Set by primary_reads() for a block of code, per thread or task.
+_primary_only = ContextVar('kitchen_db_primary_only', default=False)
+
+
+class RoutingState:
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.read_only = False
+        self.wrote = False
+
+    @property
+    def use_replica(self):
+        return self.read_only and not (self.pinned or self.wrote)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Read from the primary inside this block, e.g. when the result is cached
+    under a key that a write has just invalidated.
+    """
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Send reads made by read-only kitchen views (ReplicaReadMixin) to a
+    random alias from KITCHEN_DB_REPLICAS. Writes, reads from every other
+    view, and reads by a client that wrote within the last
+    KITCHEN_DB_REPLICA_PIN_SECONDS all go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = current_routing.get()
+        replicas = settings.KITCHEN_DB_REPLICAS
+        if replicas and state is not None and state.use_replica and not _primary_only.get():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = current_routing.get()
+        if state is not None:
+            state.wrote = True
+        # Explicit, so instances loaded from a replica are saved to the primary.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.KITCHEN_DB_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
@@ -0,0 +1,114 @@
+import re
+
+from django.db import connections
+from django.db.models import Case, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Coalesce
+
+# Must match the configuration used by the trigger in migration 0004.
+SEARCH_CONFIG = 'simple'
+
+
+def search_dishes(queryset, query, ranked=True):
+    """
+    Filter dishes by a free-text query. On PostgreSQL this hits the GIN
+    index on Dish.search_vector and the trigram index on Dish.name; other
+    databases fall back to icontains so the test suite runs on SQLite.
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+    if connections[queryset.db].vendor == 'postgresql':
+        return _postgres_search(queryset, query, ranked)
+    return _fallback_search(queryset, query, ranked)
+
+
+def _postgres_search(queryset, query, ranked):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    queryset = queryset.filter(Q(search_vector=search_query) | Q(name__trigram_word_similar=query))
+    if not ranked:
+        return queryset
+    return queryset.annotate(
+        rank=Coalesce(SearchRank(F('search_vector'), search_query), Value(0.0), output_field=FloatField())
+        + TrigramWordSimilarity(query, 'name')
+    ).order_by('-rank', 'name', 'id')
+
+
+def _fallback_search(queryset, query, ranked):
+    queryset = queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
+    if not ranked:
+        return queryset
+    return queryset.annotate(
+        rank=Case(When(name__icontains=query, then=Value(1)), default=Value(0), output_field=IntegerField())
+    ).order_by('-rank', 'name', 'id')
+
+
+def search_dish_types(queryset, query):
+    query = query.strip()
+    if not query:
+        return queryset
+    return queryset.filter(name__icontains=query)
+
+
+# Field names accepted in the cook search box, e.g. `exp:>=5 name:ann*`.
+COOK_QUERY_FIELDS = {
+    'name': 'username',
+    'username': 'username',
+    'exp': 'years_of_experience',
+    'experience': 'years_of_experience',
+}
+COMPARISONS = {'>=': 'gte', '<=': 'lte', '>': 'gt', '<': 'lt', '=': 'exact', '': 'exact'}
+
+_TERM = re.compile(r'^(\w+):(.+)$')
+_COMPARISON = re.compile(r'^(>=|<=|>|<|=|)(\d+)$')
+_RANGE = re.compile(r'^(\d+)\.\.(\d+)$')
+
+
+def _cook_term(field, value):
+    if field == 'username':
+        if value.endswith('*'):
+            prefix = value.rstrip('*')
+            return Q(username__istartswith=prefix) if prefix else Q()
+        return Q(username__iexact=value)
+    match = _RANGE.match(value)
+    if match:
+        return Q(years_of_experience__range=(int(match[1]), int(match[2])))
+    match = _COMPARISON.match(value)
+    if match:
+        return Q(**{f'years_of_experience__{COMPARISONS[match[1]]}': int(match[2])})
+    return None
+
+
+def parse_cook_query(query):
+    """
+    Compile the cook search box into a Q of typed filters, ANDed together:
+
+        name:ann*           username starts with "ann"
+        name:ann            username is "ann"
+        exp:5  exp:>=5      years of experience (=, >, >=, <, <=)
+        exp:2..5            years of experience between 2 and 5
+
+    Case is ignored. Any other word, including a malformed term, falls
+    back to a plain text match on the username.
+    """
+    condition = Q()
+    for word in query.split():
+        term = None
+        match = _TERM.match(word)
+        if match and match[1].lower() in COOK_QUERY_FIELDS:
+            term = _cook_term(COOK_QUERY_FIELDS[match[1].lower()], match[2])
+        condition &= term if term is not None else Q(username__icontains=word)
+    return condition
+
+
+def search_cooks(queryset, query):
+    """
+    Filter cooks with parse_cook_query(). Prefix and exact username terms
+    use the UPPER(username) text_pattern_ops index from migration 0010 on
+    PostgreSQL, and experience terms use kitchen_cook_experience_idx.
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+    return queryset.filter(parse_cook_query(query))
@@ -0,0 +1,185 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from kitchen import autocomplete, events
+from kitchen.auth import invalidate_cook
+from kitchen.analytics import refresh_price_summaries
+from kitchen.cache import bump_menu_version
+from kitchen.counters import adjust_dish_counts
+from kitchen.models import Cook, Dish, DishType, Ticket
+
+
+@receiver(post_save, sender=Dish)
+@receiver(post_save, sender=DishType)
+@receiver(post_delete, sender=Dish)
+@receiver(post_delete, sender=DishType)
+@receiver(post_delete, sender=Cook)
+def invalidate_menu(sender, **kwargs):
+    # After commit: a read in between would cache pre-commit data under the
+    # new version.
+    transaction.on_commit(bump_menu_version)
+
+
+@receiver(post_save, sender=Cook)
+def invalidate_menu_on_cook_save(sender, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which no cached page shows.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    transaction.on_commit(bump_menu_version)
+
+
+@receiver(m2m_changed, sender=Dish.cooks.through)
+def invalidate_menu_on_cooks_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(bump_menu_version)
+
+
+def touch(dish_ids=(), cook_ids=()):
+    # Assignments live in the through table, so bump updated_at on both
+    # sides explicitly; the API's ETags are computed from it.
+    now = timezone.now()
+    if dish_ids:
+        Dish.all_objects.filter(pk__in=dish_ids).update(updated_at=now)
+    if cook_ids:
+        Cook.objects.filter(pk__in=cook_ids).update(updated_at=now)
+
+
+@receiver(m2m_changed, sender=Dish.cooks.through)
+def touch_cook_assignments(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        related = instance.dishes if reverse else instance.cooks
+        pk_set = set(related.values_list('pk', flat=True))
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if reverse:
+        touch(dish_ids=pk_set, cook_ids=[instance.pk])
+    else:
+        touch(dish_ids=[instance.pk], cook_ids=pk_set)
+
+
+@receiver(pre_delete, sender=Dish)
+def touch_cooks_of_deleted_dish(sender, instance, **kwargs):
+    # The through rows go with the dish without an m2m_changed signal.
+    cook_ids = list(instance.cooks.values_list('pk', flat=True))
+    touch(cook_ids=cook_ids)
+    adjust_dish_counts(Cook, dict.fromkeys(cook_ids, -1))
+
+
+@receiver(pre_delete, sender=Cook)
+def touch_dishes_of_deleted_cook(sender, instance, **kwargs):
+    touch(dish_ids=list(instance.dishes.values_list('pk', flat=True)))
+
+
+@receiver(pre_save, sender=Dish)
+def remember_dish_type_and_price(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not {'dish_type', 'dish_type_id', 'price'} & set(update_fields):
+        return
+    instance._previous_type_and_price = (
+        Dish.all_objects.filter(pk=instance.pk).values_list('dish_type_id', 'price').first()
+    )
+
+
+@receiver(post_save, sender=Dish)
+def count_dish_type(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.dish_type_id, instance.price)
+    previous = None if created else getattr(instance, '_previous_type_and_price', current)
+    previous_type = previous and previous[0]
+    if previous_type != instance.dish_type_id:
+        deltas = {instance.dish_type_id: 1}
+        if previous_type is not None:
+            deltas[previous_type] = -1
+        adjust_dish_counts(DishType, deltas)
+    if previous is None or previous_type != instance.dish_type_id or previous[1] != instance.price:
+        refresh_price_summaries({instance.dish_type_id, previous_type} - {None})
+
+
+@receiver(post_delete, sender=Dish)
+def uncount_deleted_dish(sender, instance, origin=None, **kwargs):
+    # Deleting a dish type cascades to its dishes and its summary.
+    if isinstance(origin, DishType) and origin.pk == instance.dish_type_id:
+        return
+    adjust_dish_counts(DishType, {instance.dish_type_id: -1})
+    refresh_price_summaries([instance.dish_type_id])
+
+
+@receiver(m2m_changed, sender=Dish.cooks.through)
+def count_cook_assignments(sender, instance, action, reverse, pk_set, **kwargs):
+    # add() reports only the rows it created. Removals are counted before
+    # the rows go, against the assignments that actually exist.
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    if reverse:
+        if action == 'post_add':
+            delta = len(pk_set)
+        else:
+            assignments = sender.objects.filter(cook_id=instance.pk)
+            if action == 'pre_remove':
+                assignments = assignments.filter(dish_id__in=pk_set)
+            delta = -assignments.count()
+        adjust_dish_counts(Cook, {instance.pk: delta})
+    elif action == 'post_add':
+        Cook.objects.filter(pk__in=pk_set).update(dish_count=F('dish_count') + 1)
+    else:
+        cooks = Cook.objects.filter(dishes=instance)
+        if action == 'pre_remove':
+            cooks = cooks.filter(pk__in=pk_set)
+        cooks.update(dish_count=F('dish_count') - 1)
+
+
+@receiver(post_save, sender=Dish)
+@receiver(post_save, sender=DishType)
+@receiver(post_save, sender=Cook)
+def update_autocomplete(sender, instance, raw=False, update_fields=None, **kwargs):
+    kind = AUTOCOMPLETE_KINDS[sender]
+    _, field = autocomplete.SOURCES[kind]
+    if raw or (update_fields is not None and field not in update_fields):
+        return
+    text = getattr(instance, field)
+    transaction.on_commit(lambda: autocomplete.update(kind, instance.pk, text))
+
+
+@receiver(post_delete, sender=Dish)
+@receiver(post_delete, sender=DishType)
+@receiver(post_delete, sender=Cook)
+def discard_from_autocomplete(sender, instance, **kwargs):
+    kind, pk = AUTOCOMPLETE_KINDS[sender], instance.pk
+    transaction.on_commit(lambda: autocomplete.discard(kind, pk))
+
+
+AUTOCOMPLETE_KINDS = {model: kind for kind, (model, _) in autocomplete.SOURCES.items()}
+
+
+@receiver(post_save, sender=Cook)
+@receiver(post_delete, sender=Cook)
+def invalidate_cached_cook(sender, instance, **kwargs):
+    # Any save may change the password, and with it the session hash. After
+    # commit, or a request in between would cache the old row again.
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_cook(pk))
+
+
+EVENT_KINDS = {Dish: 'dish', DishType: 'dish_type', Cook: 'cook', Ticket: 'ticket'}
+
+
+@receiver(post_save, sender=Dish)
+@receiver(post_save, sender=DishType)
+@receiver(post_save, sender=Cook)
+@receiver(post_save, sender=Ticket)
+def publish_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    events.publish(EVENT_KINDS[sender], id=instance.pk, action='created' if created else 'saved')
+
+
+@receiver(post_delete, sender=Dish)
+@receiver(post_delete, sender=DishType)
+@receiver(post_delete, sender=Cook)
+def publish_deleted(sender, instance, **kwargs):
+    events.publish(EVENT_KINDS[sender], id=instance.pk, action='deleted')
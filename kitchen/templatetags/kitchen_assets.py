@@ -0,0 +1,41 @@
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from kitchen.assets import BUNDLE_CSS, BUNDLE_JS, LOCAL_CSS, LOCAL_JS, VENDOR_CSS, VENDOR_JS
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def bundles_built():
+    return finders.find(BUNDLE_CSS) is not None and finders.find(BUNDLE_JS) is not None
+
+
+@register.simple_tag
+def kitchen_stylesheets():
+    if bundles_built():
+        return format_html('<link rel="stylesheet" href="{}">', static(BUNDLE_CSS))
+    # Until `manage.py build_static` has run, fall back to the CDN copies.
+    links = [
+        format_html('<link rel="stylesheet" href="{}" integrity="{}" crossorigin="anonymous">', url, sri)
+        for _, url, sri in VENDOR_CSS
+    ]
+    links += [format_html('<link rel="stylesheet" href="{}">', static(path)) for path in LOCAL_CSS]
+    return mark_safe('\n'.join(links))
+
+
+@register.simple_tag
+def kitchen_scripts():
+    if bundles_built():
+        return format_html('<script src="{}" defer></script>', static(BUNDLE_JS))
+    scripts = [
+        format_html('<script src="{}" integrity="{}" crossorigin="anonymous" defer></script>', url, sri)
+        for _, url, sri in VENDOR_JS
+    ]
+    scripts += [format_html('<script src="{}" defer></script>', static(path)) for path in LOCAL_JS]
+    return mark_safe('\n'.join(scripts))
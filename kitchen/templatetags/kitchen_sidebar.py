@@ -0,0 +1,20 @@
+from django import template
+from django.conf import settings
+
+from kitchen.cache import cached_menu
+from kitchen.models import DishType
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/sidebar.html')
+def dish_type_sidebar():
+    limit = settings.KITCHEN_SIDEBAR_LIMIT
+    dish_types = cached_menu(
+        f'sidebar:{limit}',
+        lambda: list(DishType.objects.order_by('name', 'id').values('id', 'name')[:limit + 1]),
+    )
+    return {
+        'dishtypes': dish_types[:limit],
+        'has_more': len(dish_types) > limit,
+    }
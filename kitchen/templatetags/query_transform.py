@@ -10,5 +10,5 @@ def query_transform(request, **kwargs):
         if v is not None:
             update[k] = v
         else:
-            update.pop(k)
+            update.pop(k, None)
     return update.urlencode()
@@ -1,10 +1,57 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http import Http404
 from django.urls import reverse
+from django.utils import timezone
 
+from kitchen.async_views import (
+    AsyncCookDetailView,
+    AsyncCookListView,
+    AsyncDishDetailView,
+    AsyncDishListView,
+    AsyncHomeView,
+)
+from kitchen import auth, autocomplete
+from kitchen.analytics import refresh_price_summaries
+from kitchen.assets import template_tokens, trim_css
+from kitchen.benchmarks import (
+    bench_dispatcher, build_routes, compare_to_baseline, load_baseline, measure_routes, seed_kitchen,
+)
+from kitchen.cache import menu_version
+from kitchen.bulk import assign_cooks, change_prices, move_dishes, unassign_cooks
+from kitchen.counters import reconcile_dish_counts
+from kitchen.deletion import run_pending, soft_delete
+from kitchen.dispatch import Dispatcher, DispatchLoop, finish_line, place_ticket
+from kitchen.events import CacheBackend, Event, Hub
+from kitchen.exports import export_rows
 from kitchen.forms import UserRegistrationForm, CookForm, DishTypeForm, DishForm
-from kitchen.models import Cook, Dish, DishType
+from kitchen.importers import import_cooks, import_dishes, iter_json_array
+from kitchen.loadtest import run_load_test
+from kitchen.lookups import lookup
+from kitchen.metrics import Histogram, registry
+from kitchen.models import Cook, DeletionJob, Dish, DishType, PriceSummary, Ticket, TicketLine
+from kitchen.pagination import KeysetPaginator, decode_cursor, encode_cursor
+from kitchen.routers import ReplicaRouter, RoutingState, current_routing, primary_reads
+from kitchen.search import parse_cook_query, search_cooks, search_dishes
 
 
 class CookModelTests(TestCase):
@@ -257,3 +304,1461 @@ class DishViewTests(TestCase):
         self.assertIn('__all__', form.errors)
         self.assertEqual(form.errors['__all__'],
                          ['Price must be greater than or equal to 0', 'Price must be greater than or equal to 0.'])
+
+
+@override_settings(KITCHEN_PAGINATION_MODE='keyset', KITCHEN_PAGINATION_COUNT='none')
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.dish_type = DishType.objects.create(name='Main Course')
+        for i in range(25):
+            Dish.objects.create(
+                name=f'Dish {i:02d}',
+                description='A dish.',
+                price=10,
+                dish_type=self.dish_type
+            )
+
+    def test_cursor_round_trip(self):
+        token = encode_cursor(['Dish 03', 4])
+        self.assertEqual(decode_cursor(token), ('next', ['Dish 03', 4]))
+
+    def test_pages_walk_forward_and_back(self):
+        paginator = KeysetPaginator(Dish.objects.all(), 10, ('name', 'id'), count_mode='none')
+        first = paginator.page()
+        self.assertEqual([d.name for d in first][0], 'Dish 00')
+        self.assertFalse(first.has_previous())
+
+        second = paginator.page(first.next_cursor)
+        self.assertEqual(second.object_list[0].name, 'Dish 10')
+
+        third = paginator.page(second.next_cursor)
+        self.assertEqual(len(third), 5)
+        self.assertFalse(third.has_next())
+
+        back = paginator.page(third.previous_cursor)
+        self.assertEqual([d.name for d in back], [d.name for d in second])
+        self.assertTrue(back.has_previous())
+
+    def test_duplicate_names_are_not_skipped(self):
+        Dish.objects.update(name='Same')
+        paginator = KeysetPaginator(Dish.objects.all(), 10, ('name', 'id'), count_mode='none')
+        seen = []
+        page = paginator.page()
+        seen.extend(page)
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            seen.extend(page)
+        self.assertEqual(len({d.id for d in seen}), 25)
+
+    def test_list_view_uses_cursor(self):
+        response = self.client.get(reverse('kitchen:dish-list'))
+        page = response.context['page_obj']
+        self.assertTrue(page.is_keyset)
+        response = self.client.get(reverse('kitchen:dish-list'), {'cursor': page.next_cursor})
+        self.assertContains(response, 'Dish 10')
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('kitchen:cook-list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_wrong_value_types_is_404(self):
+        paginator = KeysetPaginator(Dish.objects.all(), 10, ('price', 'id'), count_mode='none')
+        for values in (['10', 'x'], ['ten', 1], [None, 1], ['10', 2 ** 70], [{'a': 1}, 1], ['10']):
+            with self.subTest(values=values), self.assertRaises(Http404):
+                paginator.page(encode_cursor(values))
+        self.assertEqual(len(paginator.page(encode_cursor(['10', 3]))), 10)
+        response = self.client.get(reverse('kitchen:cook-list'), {'cursor': encode_cursor(['alice', '1; drop'])})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cached_count(self):
+        paginator = KeysetPaginator(Dish.objects.all(), 10, ('name', 'id'), count_mode='cached')
+        self.assertEqual(paginator.count, 25)
+
+
+class DishSearchTests(TestCase):
+    def setUp(self):
+        dish_type = DishType.objects.create(name='Main Course')
+        Dish.objects.create(name='Margherita', description='Pizza with basil', price=9, dish_type=dish_type)
+        Dish.objects.create(name='Pizza Diavola', description='Spicy salami', price=11, dish_type=dish_type)
+        Dish.objects.create(name='Caesar', description='Salad', price=7, dish_type=dish_type)
+
+    def test_name_matches_rank_first(self):
+        results = list(search_dishes(Dish.objects.all(), 'pizza'))
+        self.assertEqual([d.name for d in results], ['Pizza Diavola', 'Margherita'])
+
+    def test_blank_query_returns_everything(self):
+        self.assertEqual(search_dishes(Dish.objects.all(), '  ').count(), 3)
+
+    def test_list_view_search(self):
+        response = self.client.get(reverse('kitchen:dish-list'), {'q': 'salami'})
+        self.assertContains(response, 'Pizza Diavola')
+        self.assertNotContains(response, 'Caesar')
+
+
+class ImporterTests(TestCase):
+    def write_file(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_json_array_is_streamed_across_chunks(self):
+        records = [{'name': f'Dish {i}', 'nested': {'list': [1, 2, ']']}} for i in range(50)]
+        stream = io.StringIO(json.dumps(records, indent=2))
+        self.assertEqual(list(iter_json_array(stream, chunk_size=7)), records)
+
+    def test_truncated_array_raises(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('[{"name": "Pizza"}, {"na'), chunk_size=4))
+
+    def test_import_dishes_resolves_types_and_cooks(self):
+        Cook.objects.create(username='chef1')
+        DishType.objects.create(name='Main Course')
+        records = [
+            {'name': 'Pizza', 'description': 'Cheese', 'price': 100, 'dish_type': 'Main Course', 'cooks': ['chef1']},
+            {'name': 'Salad', 'description': 'Fresh', 'price': 50.5, 'dish_type': 'Starter'},
+            {'name': 'Soup', 'description': 'Hot', 'price': 40, 'dish_type': 'Starter', 'cooks': ['ghost']},
+        ]
+        result = import_dishes(records, batch_size=2)
+        self.assertEqual(result.rows, 3)
+        self.assertEqual(DishType.objects.count(), 2)
+        self.assertEqual(Dish.objects.get(name='Salad').dish_type.name, 'Starter')
+        self.assertEqual(list(Dish.objects.get(name='Pizza').cooks.values_list('username', flat=True)), ['chef1'])
+
+    def test_import_dishes_matches_dish_types_case_insensitively(self):
+        main = DishType.objects.create(name='Main Course')
+        records = [
+            {'name': 'Pizza', 'price': 100, 'dish_type': 'main course'},
+            {'name': 'Salad', 'price': 50, 'dish_type': 'Starter'},
+            {'name': 'Soup', 'price': 40, 'dish_type': 'STARTER'},
+        ]
+        import_dishes(records, batch_size=2)
+        self.assertEqual(DishType.objects.count(), 2)
+        self.assertEqual(Dish.objects.get(name='Pizza').dish_type, main)
+        self.assertEqual(Dish.objects.get(name='Soup').dish_type.name, 'Starter')
+
+    def test_import_dishes_without_bulk_returning(self):
+        Cook.objects.create(username='chef1')
+        records = [
+            {'name': 'Pizza', 'price': 10, 'dish_type': 'Main Course', 'cooks': ['chef1']},
+            {'name': 'Pasta', 'price': 8, 'dish_type': 'Main Course'},
+        ]
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            path = self.write_file('.json', json.dumps(records))
+            call_command('import_kitchen', 'dishes', path, stdout=io.StringIO())
+        self.assertEqual(list(Dish.objects.get(name='Pizza').cooks.values_list('username', flat=True)), ['chef1'])
+        self.assertEqual(DishType.objects.get().dish_count, 2)
+        self.assertEqual(Cook.objects.get(username='chef1').dish_count, 1)
+        self.assertEqual(PriceSummary.objects.get().dishes, 2)
+
+    def test_import_cooks_upserts_by_username(self):
+        Cook.objects.create(username='chef1', years_of_experience=1)
+        import_cooks([{'username': 'chef1', 'years_of_experience': 5}, {'username': 'chef2'}])
+        self.assertEqual(Cook.objects.get(username='chef1').years_of_experience, 5)
+        self.assertFalse(Cook.objects.get(username='chef2').has_usable_password())
+
+    def test_management_command_reads_jsonl(self):
+        path = self.write_file('.jsonl', '{"username": "chef1"}\n\n{"username": "chef2"}\n')
+        out = io.StringIO()
+        call_command('import_kitchen', 'cooks', path, stdout=out)
+        self.assertIn('2 rows', out.getvalue())
+        self.assertEqual(Cook.objects.count(), 2)
+
+
+class QueryCountTests(TestCase):
+    def setUp(self):
+        self.dish_type = DishType.objects.create(name='Main Course')
+        self.cooks = [Cook.objects.create(username=f'chef{i}', years_of_experience=i) for i in range(5)]
+        self.dishes = []
+        for i in range(5):
+            dish = Dish.objects.create(name=f'Dish {i}', description='A dish.', price=10, dish_type=self.dish_type)
+            dish.cooks.set(self.cooks)
+            self.dishes.append(dish)
+
+    def test_dish_detail_query_count(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('kitchen:dish-detail', args=[self.dishes[0].id]))
+        self.assertContains(response, 'Main Course')
+        self.assertContains(response, 'Experience: 4 years')
+
+    def test_cook_detail_query_count(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('kitchen:cook-detail', args=[self.cooks[0].id]))
+        self.assertContains(response, 'Dish 4')
+
+    def test_list_query_counts(self):
+        with self.assertNumQueries(2):
+            self.client.get(reverse('kitchen:dish-list'))
+        with self.assertNumQueries(2):
+            self.client.get(reverse('kitchen:cook-list'))
+
+    @override_settings(KITCHEN_USER_CACHE_SECONDS=30)
+    def test_cook_form_pages_load_no_choice_lists(self):
+        self.client.force_login(self.cooks[0])
+        # The session is read from the cache and the logged-in cook is
+        # loaded once, then kept by CachedModelBackend.
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('kitchen:cook-create'))
+        self.assertNotContains(response, 'user_permissions')
+        self.assertNotContains(response, 'name="password"')
+        # Only the cook being edited.
+        with self.assertNumQueries(1):
+            self.client.get(reverse('kitchen:cook-update', args=[self.cooks[1].id]))
+
+    def test_cook_form_creates_cook_without_usable_password(self):
+        form = CookForm(data={'username': 'newcook', 'years_of_experience': 2})
+        self.assertTrue(form.is_valid(), msg=form.errors)
+        cook = form.save()
+        self.assertFalse(cook.has_usable_password())
+        self.assertEqual(cook.years_of_experience, 2)
+
+
+class BenchmarkBaselineTests(TestCase):
+    def test_query_counts_within_baseline(self):
+        seed_kitchen(dishes=30, cooks=10, dish_types=3, tickets=5)
+        user = Cook.objects.create_user(username='bench', password='bench')
+        routes = build_routes()
+        self.assertIn('kitchen:dish-detail', routes)
+        results = measure_routes(routes, iterations=1, user=user)
+        self.assertEqual(compare_to_baseline(results, load_baseline()), [])
+
+    def test_routes_missing_from_baseline_fail(self):
+        result = {'queries': 1, 'p95_ms': 1.0, 'memory_kb': 1.0}
+        self.assertEqual(
+            compare_to_baseline({'kitchen:new': result}, {'routes': {}}),
+            ['kitchen:new: not in the baseline, run bench_kitchen --update-baseline'],
+        )
+
+
+class PerformanceMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        DishType.objects.create(name='Main Course')
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram((1, 5))
+        for value in (0.5, 3, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.cumulative()), [(1, 1), (5, 3), (float('inf'), 4)])
+        self.assertEqual(histogram.sum, 16.5)
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get(reverse('kitchen:dish-list'))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('kitchen_sql_queries_count{view="kitchen:dish-list"} 1', body)
+        self.assertIn('kitchen_template_render_seconds_bucket{view="kitchen:dish-list",le="+Inf"} 1', body)
+
+    @override_settings(KITCHEN_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('kitchen:dish-type-list'))
+        self.assertRegex(response['Server-Timing'], r'sql;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, total;dur=')
+
+    def test_connection_gauges(self):
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE kitchen_db_connections_opened gauge', body)
+        self.assertRegex(body, r'kitchen_db_connections_opened\{alias="default"\} [1-9]')
+        self.assertNotIn('kitchen_db_pool_size', body)
+
+    @override_settings(KITCHEN_METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_metrics_endpoint_is_internal(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+    @override_settings(KITCHEN_METRICS_TOKEN='s3cret')
+    def test_metrics_token_replaces_address_check(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(KITCHEN_CACHE_TIMEOUT=300)
+class MenuCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.dish_type = DishType.objects.create(name='Main Course')
+        self.dish = Dish.objects.create(name='Pizza', description='Cheese', price=10, dish_type=self.dish_type)
+        self.cook = Cook.objects.create(username='chef1')
+
+    def test_warm_home_page_runs_no_sql(self):
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Pizza')
+        self.assertContains(response, 'Main Course')
+
+    @override_settings(KITCHEN_CACHE_TIMEOUT=0)
+    def test_zero_timeout_disables_menu_cache(self):
+        self.client.get(reverse('home'))
+        self.dish_type.name = 'Dessert'
+        self.dish_type.save()
+        self.assertContains(self.client.get(reverse('home')), 'Dessert')
+        self.assertNotIn('ETag', self.client.get(reverse('api:analytics')))
+
+    def test_model_changes_invalidate_home_page(self):
+        self.client.get(reverse('home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dish.name = 'Calzone'
+            self.dish.save()
+            DishType.objects.create(name='Dessert')
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Calzone')
+        self.assertContains(response, 'Dessert')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cook.delete()
+        self.assertNotContains(self.client.get(reverse('home')), 'chef1')
+
+    def test_m2m_changes_bump_version(self):
+        version = menu_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dish.cooks.add(self.cook)
+        self.assertGreater(menu_version(), version)
+
+    def test_version_is_bumped_on_commit(self):
+        version = menu_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.dish.name = 'Calzone'
+            self.dish.save()
+            self.assertEqual(menu_version(), version)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(menu_version(), version)
+
+    def test_login_does_not_invalidate(self):
+        self.cook.set_password('password')
+        self.cook.save()
+        version = menu_version()
+        self.client.login(username='chef1', password='password')
+        self.assertEqual(menu_version(), version)
+
+    @override_settings(KITCHEN_SIDEBAR_LIMIT=1)
+    def test_sidebar_is_bounded(self):
+        DishType.objects.create(name='Dessert')
+        response = self.client.get(reverse('home'))
+        self.assertNotContains(response, 'Main Course')
+        self.assertContains(response, 'All dish types')
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.dish_type = DishType.objects.create(name='Main Course')
+        self.cook = Cook.objects.create(username='chef1', years_of_experience=3)
+        self.dishes = []
+        for i in range(5):
+            dish = Dish.objects.create(name=f'Dish {i}', description='A dish.', price='9.50', dish_type=self.dish_type)
+            dish.cooks.add(self.cook)
+            self.dishes.append(dish)
+
+    def get_json(self, url, params=None, **headers):
+        response = self.client.get(url, params or {}, **headers)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, json.loads(content) if content else None
+
+    def test_list_pages_with_cursor(self):
+        url = reverse('api:dish-list')
+        response, body = self.get_json(url, {'limit': 2})
+        self.assertEqual([row['name'] for row in body['results']], ['Dish 0', 'Dish 1'])
+        self.assertEqual(body['results'][0]['cooks'], [self.cook.id])
+        self.assertEqual(body['results'][0]['price'], '9.50')
+
+        names = [row['name'] for row in body['results']]
+        while body['next']:
+            response, body = self.get_json(body['next'])
+            names.extend(row['name'] for row in body['results'])
+        self.assertEqual(names, [f'Dish {i}' for i in range(5)])
+
+    def test_field_selection(self):
+        _, body = self.get_json(reverse('api:cook-list'), {'fields': 'username,dishes'})
+        self.assertEqual(body['results'], [{'username': 'chef1', 'dishes': [d.id for d in self.dishes]}])
+        response, body = self.get_json(reverse('api:cook-list'), {'fields': 'password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unchanged_page_returns_304(self):
+        url = reverse('api:dish-list')
+        response, _ = self.get_json(url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_etag(self):
+        url = reverse('api:dish-list')
+        etag = self.get_json(url)[0]['ETag']
+        self.dishes[2].cooks.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.get_json(url)[0]['ETag']
+        self.dishes[3].delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_conditional_get(self):
+        url = reverse('api:dish-type-detail', args=[self.dish_type.id])
+        response, body = self.get_json(url)
+        self.assertEqual(body['name'], 'Main Course')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(reverse('api:dish-type-detail', args=[0])).status_code, 404)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('api:dish-list'), {'cursor': encode_cursor(['x'])})
+        self.assertEqual(response.status_code, 400)
+
+
+class ConstraintTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        self.dish_type = DishType.objects.create(name='Main Course')
+
+    def test_dish_type_form_validation_runs_no_queries(self):
+        form = DishTypeForm(data={'name': 'main course'})
+        with self.assertNumQueries(0):
+            self.assertTrue(form.is_valid())
+
+    def test_duplicate_dish_type_is_a_form_error(self):
+        response = self.client.post(reverse('kitchen:dish-type-create'), {'name': 'MAIN COURSE'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].errors['name'], ['This dish type already exists'])
+        self.assertEqual(DishType.objects.count(), 1)
+
+    def test_dish_type_can_be_saved_under_its_own_name(self):
+        response = self.client.post(
+            reverse('kitchen:dish-type-update', args=[self.dish_type.id]), {'name': 'Main Course'}
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_database_rejects_negative_price(self):
+        dish = Dish.objects.create(name='Pizza', description='Cheese', price=10, dish_type=self.dish_type)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Dish.objects.filter(pk=dish.pk).update(price=-1)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.dish_type = DishType.objects.create(name='Main Course')
+        self.cook = Cook.objects.create(username='chef1', years_of_experience=4)
+        for i in range(12):
+            dish = Dish.objects.create(name=f'Dish {i:02d}', description='A dish.', price=10, dish_type=self.dish_type)
+            dish.cooks.add(self.cook)
+
+    async def render(self, view, path, **kwargs):
+        response = await view.as_view()(self.factory.get(path), **kwargs)
+        await sync_to_async(response.render)()
+        return response
+
+    async def test_dish_list_paginates(self):
+        response = await self.render(AsyncDishListView, '/kitchen/dish/?page=2')
+        self.assertEqual([d.name for d in response.context_data['dishes']], ['Dish 10', 'Dish 11'])
+        self.assertEqual(response.context_data['paginator'].count, 12)
+
+    async def test_dish_list_invalid_page(self):
+        with self.assertRaises(Http404):
+            await AsyncDishListView.as_view()(self.factory.get('/kitchen/dish/?page=9'))
+
+    @override_settings(KITCHEN_PAGINATION_MODE='keyset', KITCHEN_PAGINATION_COUNT='none')
+    async def test_cook_list_keyset(self):
+        response = await self.render(AsyncCookListView, '/kitchen/cook/')
+        self.assertTrue(response.context_data['page_obj'].is_keyset)
+        self.assertContains(response, 'chef1')
+
+    async def test_detail_views(self):
+        dish = await Dish.objects.afirst()
+        response = await self.render(AsyncDishDetailView, '/', pk=dish.pk)
+        self.assertContains(response, 'Main Course')
+        response = await self.render(AsyncCookDetailView, '/', pk=self.cook.pk)
+        self.assertContains(response, 'Dish 11')
+        with self.assertRaises(Http404):
+            await AsyncCookDetailView.as_view()(self.factory.get('/'), pk=0)
+
+    async def test_home(self):
+        response = await self.render(AsyncHomeView, '/')
+        self.assertContains(response, 'chef1')
+        self.assertContains(response, 'Main Course')
+
+
+class LoadTestClientTests(SimpleTestCase):
+    async def test_keep_alive_and_chunked_responses(self):
+        connections = []
+
+        async def handle(reader, writer):
+            connections.append(writer)
+            served = 0
+            while not reader.at_eof():
+                try:
+                    await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                served += 1
+                if served % 2:
+                    writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok')
+                else:
+                    writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n2\r\nok\r\n0\r\n\r\n')
+                await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            result = await run_load_test(f'http://127.0.0.1:{port}/', requests=20, concurrency=2)
+        self.assertEqual(len(result.latencies), 20)
+        self.assertEqual(result.errors, 0)
+        self.assertEqual(len(connections), 2)
+
+
+@override_settings(KITCHEN_DB_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    def route(self, state):
+        router = ReplicaRouter()
+        token = current_routing.set(state)
+        try:
+            return router.db_for_read(Dish)
+        finally:
+            current_routing.reset(token)
+
+    def test_read_only_views_use_the_replica(self):
+        state = RoutingState()
+        self.assertEqual(self.route(state), 'default')
+        state.read_only = True
+        self.assertEqual(self.route(state), 'replica')
+        with primary_reads():
+            self.assertEqual(self.route(state), 'default')
+        self.assertEqual(self.route(None), 'default')
+
+    def test_writes_pin_to_the_primary(self):
+        state = RoutingState()
+        state.read_only = True
+        token = current_routing.set(state)
+        try:
+            self.assertEqual(ReplicaRouter().db_for_write(Dish), 'default')
+        finally:
+            current_routing.reset(token)
+        self.assertEqual(self.route(state), 'default')
+
+        pinned = RoutingState(pinned=True)
+        pinned.read_only = True
+        self.assertEqual(self.route(pinned), 'default')
+
+    @override_settings(DATABASE_ROUTERS=['kitchen.routers.ReplicaRouter'])
+    def test_pin_cookie_is_set_after_a_write(self):
+        get_user_model().objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        response = self.client.post(reverse('kitchen:dish-type-create'), {'name': 'Dessert'})
+        self.assertEqual(response.cookies['kitchen_primary_pin']['max-age'], 10)
+        # The pinned client reads its write from the primary.
+        response = self.client.get(reverse('kitchen:dish-type-list'))
+        self.assertNotIn('kitchen_primary_pin', response.cookies)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        dish_type = DishType.objects.create(name='Main Course')
+        cooks = [Cook.objects.create(username=f'chef{i}') for i in range(3)]
+        for i in range(10):
+            dish = Dish.objects.create(name=f'Dish {i}', description='A dish.', price=i, dish_type=dish_type)
+            dish.cooks.set(cooks[:i % 3 + 1])
+
+    def test_cooks_are_prefetched_per_chunk(self):
+        # One query for the dishes, plus one cook lookup per chunk of 4.
+        with self.assertNumQueries(4):
+            rows = list(export_rows('dishes', chunk_size=4))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[2]['cooks'], ['chef0', 'chef1', 'chef2'])
+        self.assertEqual(rows[2]['dish_type'], 'Main Course')
+
+    def test_csv_export_honours_search(self):
+        response = self.client.get(reverse('kitchen:export', args=['dishes', 'csv']), {'q': 'Dish 5'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['id', 'name', 'description', 'price', 'dish_type', 'cooks'])
+        self.assertEqual(rows[1][1:], ['Dish 5', 'A dish.', '5.00', 'Main Course', 'chef0 chef1 chef2'])
+        self.assertEqual(len(rows), 2)
+
+    async def test_asgi_export_is_streamed_in_chunks(self):
+        await Dish.objects.filter(name='Dish 0').aupdate(description='x' * 100 * 1024)
+        await self.async_client.alogin(username='testuser', password='password')
+        response = await self.async_client.get(reverse('kitchen:export', args=['dishes', 'jsonl']))
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), 1)
+        self.assertIn(b'"name": "Dish 0"', chunks[0])
+        self.assertNotIn(b'"name": "Dish 9"', chunks[0])
+        self.assertEqual(b''.join(chunks).count(b'\n'), 10)
+
+        response = await self.async_client.get(reverse('api:dish-list'))
+        self.assertTrue(response.is_async)
+        body = json.loads(b''.join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual(len(body['results']), 10)
+
+    def test_cook_export_leaves_out_emails(self):
+        Cook.objects.filter(username='chef0').update(email='chef0@example.com')
+        response = self.client.get(reverse('kitchen:export', args=['cooks', 'csv']))
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.splitlines()[0], 'id,username,first_name,last_name,years_of_experience')
+        self.assertNotIn('chef0@example.com', body)
+
+    def test_export_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('kitchen:export', args=['cooks', 'csv']))
+        self.assertEqual(response.status_code, 302)
+        self.client.login(username='testuser', password='password')
+        response = self.client.get(reverse('kitchen:export', args=['cooks', 'xml']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_jsonl_export_round_trips_through_import(self):
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command('export_kitchen', 'dishes', format='jsonl', output=path)
+        Dish.objects.all().delete()
+        call_command('import_kitchen', 'dishes', path, stdout=io.StringIO())
+        self.assertEqual(Dish.objects.count(), 10)
+        self.assertEqual(Dish.objects.get(name='Dish 4').cooks.count(), 2)
+
+
+class StaticAssetTests(TestCase):
+    def test_trim_css_keeps_only_used_selectors(self):
+        css = (
+            '/*! Bootstrap */:root{--blue:#007bff}body{margin:0}.btn,.carousel{display:inline-block}'
+            '.btn:not(:disabled):not(.disabled){cursor:pointer}.toast{opacity:0}'
+            '@media (min-width:768px){.col-md-6{flex:0 0 50%}.carousel-item{display:block}}'
+            '@media print{.popover{display:none}}@keyframes progress-bar-stripes{from{background-position:1rem 0}}'
+            '/*# sourceMappingURL=bootstrap.min.css.map */'
+        )
+        self.assertEqual(trim_css(css, {'btn', 'col-md-6', 'disabled'}), '\n'.join([
+            '/*! Bootstrap */',
+            ':root{--blue:#007bff}',
+            'body{margin:0}',
+            '.btn{display:inline-block}',
+            '.btn:not(:disabled):not(.disabled){cursor:pointer}',
+            '@media (min-width:768px){.col-md-6{flex:0 0 50%}}',
+            '@keyframes progress-bar-stripes{from{background-position:1rem 0}}',
+        ]))
+
+    def test_template_tokens_include_crispy_layouts(self):
+        tokens = template_tokens()
+        self.assertIn('page-link', tokens)
+        self.assertIn('invalid-feedback', tokens)
+        # Only set by static/js/lookup.js.
+        self.assertIn('btn-link', tokens)
+
+    def test_cdn_fallback_until_bundles_are_built(self):
+        response = self.client.get(reverse('kitchen:home'))
+        self.assertContains(response, 'bootstrap.min.css" integrity="sha384-')
+        self.assertContains(response, 'jquery-3.5.1.slim.min.js" integrity="sha384-')
+        self.assertContains(response, '/static/css/style.css')
+
+
+class LookupTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        self.dish_type = DishType.objects.create(name='Main Course')
+        self.cooks = [Cook.objects.create(username=f'chef{i:02d}') for i in range(30)]
+
+    def test_prefix_search_pages_with_a_cursor(self):
+        url = reverse('kitchen:lookup', args=['cooks'])
+        first = self.client.get(url, {'q': 'CHEF', 'limit': 20}).json()
+        self.assertEqual([r['text'] for r in first['results']][:2], ['chef00', 'chef01'])
+        self.assertEqual(len(first['results']), 20)
+        second = self.client.get(url, {'q': 'chef', 'limit': 20, 'cursor': first['next']}).json()
+        self.assertEqual(second['results'][0]['text'], 'chef20')
+        self.assertEqual(len(second['results']), 10)
+        self.assertIsNone(second['next'])
+        self.assertEqual(self.client.get(url, {'q': 'chef1', 'limit': 3}).json()['results'][0]['text'], 'chef10')
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(reverse('kitchen:lookup', args=['cooks']), {'limit': 0}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('kitchen:lookup', args=['tickets'])).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('kitchen:lookup', args=['cooks'])).status_code, 302)
+
+    def test_form_renders_only_selected_cooks(self):
+        dish = Dish.objects.create(name='Pizza', description='Cheese', price=10, dish_type=self.dish_type)
+        dish.cooks.set(self.cooks[:2])
+        html = str(DishForm(instance=dish)['cooks'])
+        self.assertIn('data-lookup-url="/kitchen/lookup/cooks/"', html)
+        self.assertEqual(html.count('<option'), 2)
+        self.assertIn('chef01', html)
+        self.assertNotIn('chef02', html)
+        self.assertEqual(str(DishForm()['dish_type']).count('<option'), 1)
+
+    def test_validation_fetches_only_submitted_ids(self):
+        form = DishForm(data={
+            'name': 'Pizza', 'description': 'Cheese', 'price': 10,
+            'dish_type': self.dish_type.id, 'cooks': [self.cooks[3].id, self.cooks[7].id],
+        })
+        # One query for the dish type and one pk__in query for the cooks.
+        with self.assertNumQueries(2):
+            self.assertTrue(form.is_valid(), msg=form.errors)
+        invalid = DishForm(data={
+            'name': 'Pizza', 'description': 'Cheese', 'price': 10,
+            'dish_type': self.dish_type.id, 'cooks': [0],
+        })
+        self.assertIn('cooks', invalid.errors)
+        self.assertEqual(str(invalid['cooks']).count('<option'), 0)
+
+
+class DishCountTests(TestCase):
+    def setUp(self):
+        self.soup = DishType.objects.create(name='Soup')
+        self.salad = DishType.objects.create(name='Salad')
+        self.alice = Cook.objects.create_user(username='alice', password='pass12345')
+        self.bob = Cook.objects.create_user(username='bob', password='pass12345')
+
+    def assertCounts(self, **expected):
+        actual = {
+            name: obj.__class__.objects.values_list('dish_count', flat=True).get(pk=obj.pk)
+            for name, obj in (('soup', self.soup), ('salad', self.salad), ('alice', self.alice), ('bob', self.bob))
+        }
+        self.assertEqual(actual, {**dict.fromkeys(actual, 0), **expected})
+
+    def test_signals_keep_counts_in_step(self):
+        dish = Dish.objects.create(name='Borscht', description='Beet', price=5, dish_type=self.soup)
+        self.assertCounts(soup=1)
+        dish.cooks.add(self.alice, self.bob)
+        dish.cooks.add(self.alice)
+        self.assertCounts(soup=1, alice=1, bob=1)
+        dish.dish_type = self.salad
+        dish.save()
+        dish.save()
+        self.assertCounts(salad=1, alice=1, bob=1)
+        dish.cooks.remove(self.bob, self.bob)
+        self.bob.dishes.remove(dish)
+        self.assertCounts(salad=1, alice=1)
+        self.bob.dishes.add(dish)
+        self.alice.dishes.clear()
+        self.assertCounts(salad=1, bob=1)
+        dish.delete()
+        self.assertCounts()
+
+    def test_import_counts_batches(self):
+        import_dishes([
+            {'name': 'Borscht', 'description': '', 'price': 5, 'dish_type': 'Soup', 'cooks': ['alice', 'alice']},
+            {'name': 'Caesar', 'description': '', 'price': 7, 'dish_type': 'Salad', 'cooks': ['alice', 'bob']},
+            {'name': 'Ramen', 'description': '', 'price': 9, 'dish_type': 'Noodles'},
+        ], batch_size=2)
+        self.assertCounts(soup=1, salad=1, alice=2, bob=1)
+        self.assertEqual(DishType.objects.get(name='Noodles').dish_count, 1)
+
+    def test_reconcile_fixes_drift(self):
+        dish = Dish.objects.create(name='Borscht', description='Beet', price=5, dish_type=self.soup)
+        dish.cooks.add(self.alice)
+        # queryset.update() sends no signals.
+        Dish.objects.filter(pk=dish.pk).update(dish_type=self.salad)
+        Cook.objects.filter(pk=self.bob.pk).update(dish_count=7)
+        stale = reconcile_dish_counts(dry_run=True)
+        self.assertEqual((stale[DishType], stale[Cook]), (2, 1))
+        self.assertCounts(soup=1, alice=1, bob=7)
+        out = io.StringIO()
+        call_command('reconcile_counts', stdout=out)
+        self.assertIn('dish types: 2 fixed', out.getvalue())
+        self.assertCounts(salad=1, alice=1)
+        self.assertEqual(reconcile_dish_counts(), {DishType: 0, Cook: 0})
+
+    def test_lists_sort_and_filter_by_count(self):
+        self.client.force_login(self.alice)
+        for i in range(3):
+            Dish.objects.create(name=f'Soup {i}', description='', price=5, dish_type=self.soup).cooks.add(self.bob)
+        Dish.objects.create(name='Caesar', description='', price=7, dish_type=self.salad).cooks.add(self.alice)
+        response = self.client.get(reverse('kitchen:dish-type-list'), {'sort': 'dishes', 'min_dishes': 1})
+        self.assertEqual([t.name for t in response.context['dish_types']], ['Soup', 'Salad'])
+        self.assertContains(response, '<td>3</td>')
+        response = self.client.get(reverse('kitchen:cook-list'), {'sort': 'dishes'})
+        self.assertEqual([c.username for c in response.context['cooks']], ['bob', 'alice'])
+        response = self.client.get(reverse('kitchen:cook-list'), {'min_dishes': 2})
+        self.assertEqual([c.username for c in response.context['cooks']], ['bob'])
+
+    @override_settings(KITCHEN_PAGINATION_MODE='keyset')
+    def test_keyset_pages_descending_counts(self):
+        self.client.force_login(self.alice)
+        cooks = [Cook.objects.create_user(username=f'chef{i:02}', password='pass12345') for i in range(15)]
+        for i, cook in enumerate(cooks):
+            Cook.objects.filter(pk=cook.pk).update(dish_count=i % 4)
+        expected = list(Cook.objects.order_by('-dish_count', 'id').values_list('username', flat=True))
+        first = self.client.get(reverse('kitchen:cook-list'), {'sort': 'dishes'})
+        seen = [c.username for c in first.context['cooks']]
+        second = self.client.get(
+            reverse('kitchen:cook-list'), {'sort': 'dishes', 'cursor': first.context['page_obj'].next_cursor}
+        )
+        seen += [c.username for c in second.context['cooks']]
+        self.assertEqual(seen, expected)
+
+
+@override_settings(KITCHEN_ANALYTICS_HISTOGRAM_BINS=4, KITCHEN_CACHE_TIMEOUT=300)
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        self.soup = DishType.objects.create(name='Soup')
+        self.salad = DishType.objects.create(name='Salad')
+        for price in ('4.00', '5.00', '6.50', '12.00'):
+            Dish.objects.create(name=f'Soup {price}', description='', price=price, dish_type=self.soup)
+        self.caesar = Dish.objects.create(name='Caesar', description='', price='7.25', dish_type=self.salad)
+
+    def summary(self, dish_type):
+        summary = PriceSummary.objects.get(dish_type=dish_type)
+        fields = ('dishes', 'min_price', 'max_price', 'avg_price', 'median_price', 'histogram')
+        return [getattr(summary, field) for field in fields]
+
+    def test_signals_refresh_summaries(self):
+        self.assertEqual(
+            self.summary(self.soup),
+            [4, Decimal('4.00'), Decimal('12.00'), Decimal('6.88'), Decimal('5.75'), [2, 1, 0, 1]],
+        )
+        price = Decimal('7.25')
+        self.assertEqual(self.summary(self.salad), [1, price, price, price, price, [1, 0, 0, 0]])
+        self.caesar.dish_type = self.soup
+        self.caesar.save()
+        self.assertEqual(self.summary(self.soup)[:2], [5, Decimal('4.00')])
+        self.assertFalse(PriceSummary.objects.filter(dish_type=self.salad).exists())
+        self.caesar.price = Decimal('2.00')
+        self.caesar.save()
+        self.assertEqual(self.summary(self.soup)[1], Decimal('2.00'))
+        self.caesar.delete()
+        self.assertEqual(self.summary(self.soup)[0], 4)
+        self.soup.delete()
+        self.assertFalse(PriceSummary.objects.exists())
+
+    def test_numpy_rebuild_matches_incremental(self):
+        for i in range(40):
+            price = Decimal(i * 37 % 23) + Decimal('0.49')
+            Dish.objects.create(name=f'Salad {i}', description='', price=price, dish_type=self.salad)
+        incremental = {dish_type.pk: self.summary(dish_type) for dish_type in (self.soup, self.salad)}
+        PriceSummary.objects.all().delete()
+        self.assertEqual(refresh_price_summaries(), 2)
+        self.assertEqual({dish_type.pk: self.summary(dish_type) for dish_type in (self.soup, self.salad)}, incremental)
+
+    def test_endpoint(self):
+        alice = Cook.objects.create_user(username='alice', password='pass12345')
+        Cook.objects.create_user(username='bob', password='pass12345')
+        self.caesar.cooks.add(alice)
+        response = self.client.get(reverse('api:analytics'))
+        data = response.json()
+        self.assertEqual([row['name'] for row in data['dish_types']], ['Salad', 'Soup'])
+        self.assertEqual(data['dish_types'][1]['median_price'], '5.75')
+        self.assertEqual(data['cook_workload']['distribution'], [{'dishes': 0, 'cooks': 1}, {'dishes': 1, 'cooks': 1}])
+        self.assertEqual((data['cook_workload']['median'], data['cook_workload']['max']), (0, 1))
+        with self.assertNumQueries(0):
+            cached = self.client.get(reverse('api:analytics'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.caesar.delete()
+        self.assertNotEqual(self.client.get(reverse('api:analytics'))['ETag'], response['ETag'])
+
+    def test_refresh_command(self):
+        PriceSummary.objects.all().delete()
+        out = io.StringIO()
+        call_command('refresh_analytics', stdout=out)
+        self.assertIn('Refreshed 2 dish type summaries', out.getvalue())
+
+
+class CookQueryTests(TestCase):
+    def setUp(self):
+        for username, years in (('ann', 2), ('anna', 5), ('annette', 9), ('joanna', 5), ('bob', None)):
+            Cook.objects.create_user(username=username, password='pass12345', years_of_experience=years)
+
+    def search(self, query):
+        return sorted(search_cooks(Cook.objects.all(), query).values_list('username', flat=True))
+
+    def test_terms(self):
+        self.assertEqual(self.search('name:ann*'), ['ann', 'anna', 'annette'])
+        self.assertEqual(self.search('NAME:Ann'), ['ann'])
+        self.assertEqual(self.search('exp:5'), ['anna', 'joanna'])
+        self.assertEqual(self.search('exp:>=5 name:ann*'), ['anna', 'annette'])
+        self.assertEqual(self.search('exp:<5'), ['ann'])
+        self.assertEqual(self.search('experience:3..9'), ['anna', 'annette', 'joanna'])
+
+    def test_fallback_to_text(self):
+        self.assertEqual(self.search('nna'), ['anna', 'joanna'])
+        self.assertEqual(self.search('exp:lots'), [])
+        self.assertEqual(self.search('name:* anna'), ['anna', 'joanna'])
+        self.assertEqual(parse_cook_query('color:red'), Q(username__icontains='color:red'))
+
+    def test_experience_is_compared_as_integer(self):
+        sql = str(search_cooks(Cook.objects.all(), 'exp:>=5 name:ann*').query)
+        self.assertIn('"years_of_experience" >= 5', sql)
+        self.assertNotIn('"years_of_experience" LIKE', sql)
+
+    def test_list_view(self):
+        self.client.force_login(Cook.objects.get(username='bob'))
+        response = self.client.get(reverse('kitchen:cook-list'), {'q': 'exp:>=5 name:ann*'})
+        self.assertEqual([cook.username for cook in response.context['cooks']], ['anna', 'annette'])
+
+
+@override_settings(KITCHEN_AUTOCOMPLETE_BACKGROUND_BUILD=False)
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        autocomplete.reset()
+        self.addCleanup(autocomplete.reset)
+        self.pasta = DishType.objects.create(name='Pasta')
+        for name in ('Pizza', 'pizza', 'Pizza bianca', 'Penne', 'Pierogi'):
+            Dish.objects.create(name=name, description='', price=5, dish_type=self.pasta)
+
+    def get(self, kind, q, **params):
+        return self.client.get(reverse('kitchen:autocomplete', args=[kind]), {'q': q, **params})
+
+    def test_prefix_index(self):
+        index = autocomplete.PrefixIndex([(1, 'Pizza'), (2, 'pizza'), (3, 'Pizza'), (4, 'Penne'), (5, 'Pita')])
+        self.assertEqual(index.search('PI', 10), ['Pita', 'Pizza', 'pizza'])
+        self.assertEqual(index.search('pi', 1), ['Pita'])
+        self.assertEqual(index.search('x', 10), [])
+        index.update(5, 'Apple')
+        index.discard(4)
+        self.assertEqual(index.search('p', 10), ['Pizza', 'pizza'])
+        self.assertEqual(index.search('a', 10), ['Apple'])
+
+    def test_concurrent_search_and_update(self):
+        index = autocomplete.PrefixIndex([(i, f'dish {i:05}') for i in range(5000)])
+
+        def search(_):
+            return len(index.search('dish 0', 10))
+
+        with ThreadPoolExecutor(8) as pool:
+            results = pool.map(search, range(2000))
+            for i in range(2000):
+                index.update(i, f'renamed {i}')
+            self.assertEqual(set(results), {10})
+        self.assertEqual(len(index), 5000)
+        self.assertEqual(index.search('dish 0', 1), ['dish 02000'])
+
+    def test_endpoint_serves_index(self):
+        with self.assertNumQueries(1):
+            data = self.get('dishes', 'pi', limit=3).json()
+        self.assertEqual(data, {'results': ['Pierogi', 'Pizza', 'pizza'], 'source': 'index'})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get('dishes', 'PIZZA ').json()['results'], ['Pizza', 'pizza', 'Pizza bianca'])
+        self.assertEqual(self.get('dish-types', 'PA').json()['results'], ['Pasta'])
+        self.assertEqual(self.get('dishes', 'pi', limit=0).status_code, 400)
+        self.assertEqual(self.get('recipes', 'pi').status_code, 404)
+
+    def test_signals_update_index(self):
+        self.get('dishes', 'p')
+        with self.captureOnCommitCallbacks(execute=True):
+            dish = Dish.objects.create(name='Panzanella', description='', price=5, dish_type=self.pasta)
+            Dish.objects.filter(name='Penne').get().delete()
+        self.assertEqual(self.get('dishes', 'pa').json()['results'], ['Panzanella'])
+        self.assertEqual(self.get('dishes', 'pe').json()['results'], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            dish.name = 'Orzo'
+            dish.save()
+        self.assertEqual(self.get('dishes', 'o').json()['results'], ['Orzo'])
+        self.assertEqual(self.get('dishes', 'pa').json()['results'], [])
+
+    def test_database_fallback(self):
+        autocomplete._building.add('dishes')
+        self.addCleanup(autocomplete._building.discard, 'dishes')
+        with self.settings(KITCHEN_AUTOCOMPLETE_BACKGROUND_BUILD=True):
+            data = self.get('dishes', 'PIZ').json()
+        self.assertEqual(data['source'], 'database')
+        self.assertEqual(sorted(data['results']), ['Pizza', 'Pizza bianca', 'pizza'])
+        with self.settings(KITCHEN_AUTOCOMPLETE_MAX_ENTRIES=3):
+            self.assertEqual(self.get('dish-types', 'pa').json(), {'results': ['Pasta'], 'source': 'index'})
+            self.assertEqual(self.get('dishes', 'pe').json(), {'results': ['Penne'], 'source': 'database'})
+
+
+@override_settings(KITCHEN_USER_CACHE_SECONDS=30)
+class SessionAndUserCacheTests(TestCase):
+    def setUp(self):
+        auth.clear()
+        self.addCleanup(auth.clear)
+        self.cook = Cook.objects.create_user(username='alice', password='pass12345')
+        self.client.login(username='alice', password='pass12345')
+        self.url = reverse('kitchen:cook-create')
+
+    def test_user_is_cached_between_requests(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.wsgi_request.user, self.cook)
+        self.assertIsNot(response.wsgi_request.user, self.client.get(self.url).wsgi_request.user)
+
+    def test_saving_the_cook_invalidates(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.cook.first_name = 'Alice'
+            self.cook.save()
+            # Not before commit, or this request would cache the old row.
+            with self.assertNumQueries(0):
+                self.client.get(self.url)
+        for callback in callbacks:
+            callback()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.wsgi_request.user.first_name, 'Alice')
+
+    def test_other_processes_see_the_generation_bump(self):
+        self.client.get(self.url)
+        # Another worker saved the cook: only the shared generation moved.
+        key = auth.generation_key(self.cook.pk)
+        cache.set(key, (cache.get(key) or 0) + 1)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_password_change_and_delete_end_sessions(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cook.set_password('another-pass-42')
+            self.cook.save()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        self.client.login(username='alice', password='another-pass-42')
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cook.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    @override_settings(KITCHEN_USER_CACHE_SECONDS=0)
+    def test_cache_can_be_turned_off(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_purge_sessions_in_chunks(self):
+        from django.contrib.sessions.models import Session
+
+        expired = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create(
+            Session(session_key=f'expired{i:04}', session_data='', expire_date=expired) for i in range(25)
+        )
+        live = Session.objects.count() - 25
+        out = io.StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_sessions', chunk_size=10, stdout=out)
+        self.assertIn('Deleted 25 expired sessions', out.getvalue())
+        self.assertEqual(Session.objects.count(), live)
+        self.assertEqual(sum(query['sql'].startswith('DELETE') for query in queries), 3)
+
+
+@override_settings(KITCHEN_DELETION_BACKGROUND=False, KITCHEN_DELETION_BATCH_SIZE=2)
+class BackgroundDeletionTests(TestCase):
+    def setUp(self):
+        self.user = Cook.objects.create_user(username='admin', password='pass12345')
+        self.client.force_login(self.user)
+        self.cooks = [Cook.objects.create_user(username=f'chef{i}', password='pass12345') for i in range(2)]
+        self.soup = DishType.objects.create(name='Soup')
+        self.salad = DishType.objects.create(name='Salad')
+        for i in range(5):
+            dish = Dish.objects.create(name=f'Soup {i}', description='', price=5 + i, dish_type=self.soup)
+            dish.cooks.set(self.cooks)
+        self.caesar = Dish.objects.create(name='Caesar', description='', price=7, dish_type=self.salad)
+        self.caesar.cooks.add(self.cooks[0])
+
+    def delete(self, name, obj, run=False):
+        with self.captureOnCommitCallbacks(execute=run):
+            return self.client.post(reverse(name, args=[obj.pk]))
+
+    def test_dish_type_is_hidden_at_once(self):
+        # Cook, dish type, savepoint, mark, job, release: none of them per dish.
+        with self.assertNumQueries(6):
+            response = self.delete('kitchen:dish-type-delete', self.soup)
+        self.assertRedirects(response, reverse('kitchen:dish-type-list'))
+        job = DeletionJob.objects.get()
+        self.assertEqual((job.status, job.total, job.done), ('pending', 5, 0))
+        self.assertFalse(DishType.objects.filter(pk=self.soup.pk).exists())
+        self.assertTrue(DishType.all_objects.filter(pk=self.soup.pk).exists())
+        self.assertEqual(self.client.get(reverse('kitchen:dish-type-update', args=[self.soup.pk])).status_code, 404)
+        self.assertNotContains(self.client.get(reverse('kitchen:dish-type-list')), 'Soup')
+        dish_types = self.client.get(reverse('api:analytics')).json()['dish_types']
+        self.assertEqual([row['name'] for row in dish_types], ['Salad'])
+        self.assertEqual(self.delete('kitchen:dish-type-delete', self.soup).status_code, 404)
+
+    def test_dish_type_purge(self):
+        self.delete('kitchen:dish-type-delete', self.soup, run=True)
+        job = DeletionJob.objects.get()
+        self.assertEqual((job.status, job.done), ('done', 5))
+        self.assertFalse(DishType.all_objects.filter(pk=self.soup.pk).exists())
+        self.assertEqual(list(Dish.objects.values_list('name', flat=True)), ['Caesar'])
+        self.assertFalse(PriceSummary.objects.filter(dish_type_id=self.soup.pk).exists())
+        cooks = Cook.objects.filter(pk__in=[cook.pk for cook in self.cooks]).order_by('id')
+        self.assertEqual([cook.dish_count for cook in cooks], [1, 0])
+        self.assertEqual(reconcile_dish_counts(dry_run=True), {DishType: 0, Cook: 0})
+        progress = self.client.get(reverse('kitchen:deletion-job', args=[job.pk])).json()
+        self.assertEqual((progress['object_repr'], progress['status'], progress['done']), ('Soup', 'done', 5))
+
+    def test_cook_purge(self):
+        cook = self.cooks[0]
+        self.delete('kitchen:cook-delete', cook)
+        self.assertFalse(self.client.login(username='chef0', password='pass12345'))
+        self.assertEqual(list(self.caesar.cooks.all()), [])
+        self.assertEqual(DeletionJob.objects.get().total, 6)
+        self.assertEqual(run_pending(), 1)
+        self.assertFalse(Cook.all_objects.filter(pk=cook.pk).exists())
+        self.assertEqual(Dish.cooks.through.objects.filter(cook_id=cook.pk).count(), 0)
+        self.assertEqual(Dish.objects.count(), 6)
+
+    def test_dishes_of_a_deleted_dish_type_are_hidden(self):
+        soup = Dish.objects.get(name='Soup 0')
+        self.delete('kitchen:dish-type-delete', self.soup)
+        self.assertNotContains(self.client.get(reverse('kitchen:dish-list')), 'Soup 0')
+        for name in ('kitchen:dish-detail', 'kitchen:dish-update', 'api:dish-detail'):
+            self.assertEqual(self.client.get(reverse(name, args=[soup.pk])).status_code, 404)
+        api = json.loads(b''.join(self.client.get(reverse('api:dish-list')).streaming_content))
+        self.assertEqual([row['name'] for row in api['results']], ['Caesar'])
+        export = b''.join(self.client.get(reverse('kitchen:export', args=['dishes', 'csv'])).streaming_content)
+        self.assertNotIn(b'Soup 0', export)
+        self.assertEqual([row['text'] for row in lookup('dishes', 'so')['results']], [])
+        self.assertEqual(Dish.all_objects.filter(dish_type=self.soup).count(), 5)
+
+    def test_names_pending_deletion_can_be_reused(self):
+        self.delete('kitchen:dish-type-delete', self.soup)
+        self.delete('kitchen:cook-delete', self.cooks[1])
+        self.assertEqual(DishType.all_objects.get(pk=self.soup.pk).name, f'Soup [deleted {self.soup.pk}]')
+        response = self.client.post(reverse('kitchen:dish-type-create'), {'name': 'Soup'})
+        self.assertRedirects(response, reverse('kitchen:dish-type-list'))
+        form = CookForm(data={'username': 'chef1', 'years_of_experience': 1})
+        self.assertTrue(form.is_valid(), msg=form.errors)
+        form.save()
+        import_dishes([{'name': 'Borscht', 'price': 5, 'dish_type': 'Soup'}])
+        self.assertEqual(Dish.objects.get(name='Borscht').dish_type.name, 'Soup')
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(DeletionJob.objects.filter(status='done').count(), 2)
+
+    def test_command_requeues_stalled_jobs(self):
+        self.delete('kitchen:dish-type-delete', self.salad)
+        DeletionJob.objects.update(status='running', updated_at=timezone.now() - timedelta(hours=1))
+        out = io.StringIO()
+        call_command('purge_deleted', '--list', stdout=out)
+        self.assertIn('Delete Salad: running, 0/1', out.getvalue())
+        call_command('purge_deleted', stdout=out)
+        self.assertIn('Requeued 1 stalled jobs', out.getvalue())
+        self.assertIn('Finished 1 jobs', out.getvalue())
+        self.assertFalse(Dish.objects.filter(pk=self.caesar.pk).exists())
+
+
+class BulkDishTests(TestCase):
+    def setUp(self):
+        self.user = Cook.objects.create_user(username='admin', password='pass12345')
+        self.client.force_login(self.user)
+        self.cooks = [Cook.objects.create_user(username=f'chef{i}', password='pass12345') for i in range(3)]
+        self.soup = DishType.objects.create(name='Soup')
+        self.salad = DishType.objects.create(name='Salad')
+        self.soups = [
+            Dish.objects.create(name=f'Soup {i}', description='', price=10 + i, dish_type=self.soup) for i in range(6)
+        ]
+        self.caesar = Dish.objects.create(name='Caesar', description='', price=8, dish_type=self.salad)
+        self.soups[0].cooks.add(self.cooks[0])
+
+    def queries(self, operation, dishes):
+        with CaptureQueriesContext(connection) as context:
+            result = operation(Dish.objects.filter(pk__in=[dish.pk for dish in dishes]))
+        return result, len(context.captured_queries)
+
+    def post(self, **data):
+        return self.client.post(reverse('kitchen:dish-bulk'), data)
+
+    def test_queries_do_not_grow_with_the_selection(self):
+        operations = {
+            'adjust_price': lambda dishes: change_prices(dishes, percent=Decimal('10')),
+            'add_cooks': lambda dishes: assign_cooks(dishes, self.cooks[1:]),
+            'remove_cooks': lambda dishes: unassign_cooks(dishes, self.cooks[1:]),
+            'move': lambda dishes: move_dishes(dishes, self.salad),
+        }
+        more = Dish.objects.bulk_create(
+            Dish(name=f'Stew {i}', description='', price=20, dish_type=self.soup) for i in range(30)
+        )
+        for name, operation in operations.items():
+            _, few = self.queries(operation, self.soups[:2])
+            _, many = self.queries(operation, more)
+            self.assertEqual(few, many, name)
+
+    def test_adjust_price(self):
+        response = self.post(dishes=[dish.pk for dish in self.soups[:2]], action='adjust_price', percent='-12.5')
+        self.assertRedirects(response, reverse('kitchen:dish-list'))
+        self.assertEqual(
+            list(Dish.objects.filter(dish_type=self.soup).order_by('id').values_list('price', flat=True)),
+            [Decimal('8.75'), Decimal('9.63'), Decimal('12'), Decimal('13'), Decimal('14'), Decimal('15')],
+        )
+        self.assertEqual(PriceSummary.objects.get(dish_type=self.soup).min_price, Decimal('8.75'))
+        self.assertEqual(Dish.objects.get(pk=self.caesar.pk).price, 8)
+
+    def test_set_price_of_search_results(self):
+        self.post(q='soup', action='set_price', price='4.50')
+        self.assertEqual(set(Dish.objects.values_list('price', flat=True)), {Decimal('4.5'), Decimal('8')})
+        self.assertEqual(PriceSummary.objects.get(dish_type=self.soup).max_price, Decimal('4.5'))
+
+    def test_price_overflow_is_a_form_error(self):
+        Dish.objects.filter(pk=self.caesar.pk).update(price=9000)
+        response = self.post(dishes=[self.caesar.pk], action='adjust_price', percent='20')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Prices would exceed 9999.99.')
+        self.assertEqual(Dish.objects.get(pk=self.caesar.pk).price, 9000)
+
+    def test_assign_and_unassign_cooks(self):
+        dish_ids = [dish.pk for dish in self.soups]
+        self.post(dishes=dish_ids, action='add_cooks', cooks=[self.cooks[0].pk, self.cooks[1].pk])
+        self.assertEqual(Dish.cooks.through.objects.filter(dish_id__in=dish_ids).count(), 12)
+        self.assertEqual(Cook.objects.get(pk=self.cooks[0].pk).dish_count, 6)
+        self.assertEqual(Cook.objects.get(pk=self.cooks[1].pk).dish_count, 6)
+        self.assertEqual(list(self.caesar.cooks.all()), [])
+
+        self.post(dishes=dish_ids[:4], action='remove_cooks', cooks=[self.cooks[0].pk])
+        self.assertEqual(Cook.objects.get(pk=self.cooks[0].pk).dish_count, 2)
+        self.assertEqual(reconcile_dish_counts(dry_run=True), {DishType: 0, Cook: 0})
+
+    def test_move_dishes(self):
+        dishes = [dish.pk for dish in self.soups[:4]] + [self.caesar.pk]
+        self.post(dishes=dishes, action='move', dish_type=self.salad.pk)
+        self.assertEqual(DishType.objects.get(pk=self.soup.pk).dish_count, 2)
+        self.assertEqual(DishType.objects.get(pk=self.salad.pk).dish_count, 5)
+        self.assertEqual(PriceSummary.objects.get(dish_type=self.salad).dishes, 5)
+        self.assertEqual(PriceSummary.objects.get(dish_type=self.soup).min_price, Decimal('14'))
+        self.assertEqual(reconcile_dish_counts(dry_run=True), {DishType: 0, Cook: 0})
+
+    def test_form(self):
+        response = self.client.get(reverse('kitchen:dish-bulk'), {'dishes': [self.caesar.pk], 'q': 'x'})
+        self.assertContains(response, f'name="dishes" value="{self.caesar.pk}"')
+        response = self.post(dishes=[self.caesar.pk], action='move')
+        self.assertContains(response, 'This field is required for this action.')
+        # Neither ticked dishes nor a search: the whole menu needs confirming.
+        response = self.post(q=' ', action='set_price', price='1')
+        self.assertContains(response, 'No dishes are selected.')
+        self.assertEqual(Dish.objects.filter(price=1).count(), 0)
+        self.assertEqual(self.post(all_dishes='on', action='set_price', price='1').status_code, 302)
+        self.assertEqual(Dish.objects.exclude(price=1).count(), 0)
+        self.client.logout()
+        self.assertEqual(self.post(all_dishes='on', action='set_price', price='2').status_code, 302)
+        self.assertEqual(Dish.objects.get(pk=self.caesar.pk).price, 1)
+
+
+class DispatcherTests(SimpleTestCase):
+    def test_least_loaded_relative_to_experience(self):
+        dispatcher = Dispatcher(experience_weight=0.1)
+        dispatcher.add_cook(1, years=0, dish_ids=[10])
+        dispatcher.add_cook(2, years=10, dish_ids=[10, 20])
+        cooks = [dispatcher.submit(line_id, 10, line_id) for line_id in range(6)]
+        self.assertEqual(cooks.count(2), 4)
+        self.assertEqual(dispatcher.submit(6, 20, 6), 2)
+        self.assertIsNone(dispatcher.submit(7, 30, 7))
+
+    def test_oldest_waiting_line_goes_to_the_cook_who_frees_up(self):
+        dispatcher = Dispatcher(max_load=1)
+        dispatcher.add_cook(1, dish_ids=[10, 20])
+        self.assertEqual(dispatcher.submit(1, 10, 5), 1)
+        self.assertIsNone(dispatcher.submit(2, 10, 9))
+        self.assertIsNone(dispatcher.submit(3, 20, 7))
+        self.assertEqual(dispatcher.queued, 2)
+        self.assertEqual(dispatcher.finish(1), [(3, 1)])
+        self.assertEqual(dispatcher.finish(1), [(2, 1)])
+        self.assertEqual(dispatcher.finish(1), [])
+        self.assertEqual(dispatcher.submit(4, 20, 10), 1)
+
+    def test_matches_a_full_scan(self):
+        rng = random.Random(1)
+        dispatcher = Dispatcher(max_load=3, experience_weight=0.2)
+        qualified = {dish_id: [] for dish_id in range(8)}
+        for cook_id in range(12):
+            dish_ids = rng.sample(range(8), 3)
+            dispatcher.add_cook(cook_id, rng.randint(0, 10), dish_ids)
+            for dish_id in dish_ids:
+                qualified[dish_id].append(cook_id)
+        for line_id in range(2000):
+            if rng.random() < 0.45:
+                dispatcher.finish(rng.randrange(12))
+                continue
+            dish_id = rng.randrange(8)
+            free = [
+                (dispatcher.cooks[c].score(), c) for c in qualified[dish_id] if dispatcher.cooks[c].load < 3
+            ]
+            expected = min(free)[1] if free else None
+            self.assertEqual(dispatcher.submit(line_id, dish_id, line_id), expected)
+
+    def test_benchmark(self):
+        result = bench_dispatcher(cooks=50, dishes=200, lines=2000)
+        self.assertEqual(result['assigned'] + result['waiting'], 2000)
+        self.assertGreater(result['per_second'], 0)
+
+
+class TicketDispatchTests(TestCase):
+    def setUp(self):
+        self.user = Cook.objects.create_user(username='admin', password='pass12345')
+        self.client.force_login(self.user)
+        self.junior = Cook.objects.create_user(username='junior', password='pass12345', years_of_experience=0)
+        self.senior = Cook.objects.create_user(username='senior', password='pass12345', years_of_experience=20)
+        soup = DishType.objects.create(name='Soup')
+        self.borscht = Dish.objects.create(name='Borscht', description='', price=5, dish_type=soup)
+        self.borscht.cooks.set([self.junior, self.senior])
+        self.solyanka = Dish.objects.create(name='Solyanka', description='', price=6, dish_type=soup)
+        self.solyanka.cooks.set([self.junior])
+
+    def lines(self, ticket):
+        return list(ticket.lines.order_by('id').values_list('status', 'cook__username'))
+
+    @override_settings(KITCHEN_DISPATCH_MAX_LOAD=2, KITCHEN_DISPATCH_EXPERIENCE_WEIGHT=0.1)
+    def test_poll(self):
+        loop = DispatchLoop()
+        ticket = place_ticket([self.borscht.pk, self.solyanka.pk, self.solyanka.pk, self.solyanka.pk])
+        self.assertEqual(loop.poll(), 3)
+        self.assertEqual(self.lines(ticket), [
+            ('assigned', 'senior'), ('assigned', 'junior'), ('assigned', 'junior'), ('queued', None),
+        ])
+        self.assertEqual(loop.dispatcher.queued, 1)
+
+        second = place_ticket([self.borscht.pk])
+        with self.assertNumQueries(5):
+            self.assertEqual(loop.poll(), 1)
+        self.assertEqual(self.lines(second), [('assigned', 'senior')])
+
+        line = ticket.lines.filter(cook=self.junior).first()
+        self.assertTrue(finish_line(line.pk))
+        self.assertFalse(finish_line(line.pk))
+        self.assertEqual(loop.poll(), 1)
+        self.assertEqual(self.lines(ticket)[3], ('assigned', 'junior'))
+
+    def test_lines_committed_out_of_order_are_dispatched(self):
+        loop = DispatchLoop()
+        loop.poll()
+        early = place_ticket([self.borscht.pk])
+        late = place_ticket([self.borscht.pk])
+        # The first ticket's transaction is still open during this poll.
+        early.lines.update(status='cancelled')
+        self.assertEqual(loop.poll(), 1)
+        early.lines.update(status='queued')
+        self.assertEqual(loop.poll(), 1)
+        self.assertEqual(self.lines(early), [('assigned', 'senior')])
+        self.assertEqual(self.lines(late), [('assigned', 'senior')])
+
+    def test_edits_are_noticed_without_the_menu_cache(self):
+        loop = DispatchLoop()
+        loop.poll()
+        self.assertFalse(loop.stale())
+        version = menu_version()
+        # Made by a web worker with its own cache: the bump never lands here.
+        with self.captureOnCommitCallbacks():
+            self.solyanka.cooks.add(self.senior)
+        self.assertEqual(menu_version(), version)
+        self.assertTrue(loop.stale())
+
+    def test_rebuild_releases_orphaned_lines(self):
+        loop = DispatchLoop()
+        ticket = place_ticket([self.borscht.pk, self.solyanka.pk])
+        loop.poll()
+        self.solyanka.delete()
+        soft_delete(Cook.objects.get(pk=self.senior.pk))
+        self.assertEqual(loop.poll(), 1)
+        self.assertEqual(self.lines(ticket), [('assigned', 'junior'), ('cancelled', None)])
+
+    def test_views(self):
+        response = self.client.post(reverse('kitchen:ticket-create'), {
+            'dishes': [self.borscht.pk, self.solyanka.pk], 'note': 'Table 4',
+        })
+        ticket = Ticket.objects.get()
+        self.assertRedirects(response, reverse('kitchen:ticket-detail', args=[ticket.pk]))
+        DispatchLoop().poll()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('kitchen:ticket-detail', args=[ticket.pk]))
+        self.assertContains(response, 'Borscht')
+        self.assertContains(response, 'Done', count=2)
+        line = ticket.lines.first()
+        self.client.post(reverse('kitchen:ticket-line-done', args=[line.pk]))
+        self.assertEqual(TicketLine.objects.get(pk=line.pk).status, 'done')
+        self.assertContains(self.client.get(reverse('kitchen:ticket-list')), '1 of 2')
+        response = self.client.get(reverse('kitchen:lookup', args=['dishes']), {'q': 'sol'})
+        self.assertEqual([row['text'] for row in response.json()['results']], ['Solyanka'])
+
+
+@override_settings(KITCHEN_EVENTS_HEARTBEAT=0.05)
+class EventHubTests(SimpleTestCase):
+    async def next_message(self, stream):
+        return await asyncio.wait_for(anext(stream), 1)
+
+    async def test_fan_out(self):
+        hub = Hub(queue_size=10, replay=5)
+        everything = hub.stream()
+        dishes = hub.stream(kinds={'dish'})
+        self.assertEqual(await self.next_message(everything), 'retry: 3000\n\n')
+        self.assertEqual(await self.next_message(dishes), 'retry: 3000\n\n')
+        self.assertEqual(hub.connections(), 2)
+        hub.deliver(Event('1', 'cook', {'id': 3}))
+        hub.deliver(Event('2', 'dish', {'id': 4}))
+        self.assertEqual(await self.next_message(everything), 'id: 1\nevent: cook\ndata: {"id": 3}\n\n')
+        self.assertEqual(await self.next_message(dishes), 'id: 2\nevent: dish\ndata: {"id": 4}\n\n')
+        self.assertEqual(await self.next_message(dishes), ': ping\n\n')
+        await everything.aclose()
+        await dishes.aclose()
+        self.assertEqual(hub.connections(), 0)
+
+    async def test_slow_client_is_dropped(self):
+        hub = Hub(queue_size=2, replay=5)
+        slow = hub.stream()
+        await self.next_message(slow)
+        for number in range(3):
+            hub.deliver(Event(str(number), 'dish', {}))
+        await asyncio.sleep(0)
+        with self.assertRaises(StopAsyncIteration):
+            await self.next_message(slow)
+        self.assertEqual((hub.dropped, hub.connections()), (1, 0))
+
+    async def test_reconnect_replays_missed_events(self):
+        hub = Hub(queue_size=10, replay=2)
+        for number in range(3):
+            hub.deliver(Event(str(number), 'dish', {}))
+        stream = hub.stream(last_event_id='1')
+        await self.next_message(stream)
+        self.assertTrue((await self.next_message(stream)).startswith('id: 2\n'))
+        await stream.aclose()
+        stream = hub.stream(last_event_id='0')
+        await self.next_message(stream)
+        self.assertEqual(await self.next_message(stream), 'id: 0\nevent: reset\ndata: {}\n\n')
+        await stream.aclose()
+
+    async def test_thousands_of_idle_connections(self):
+        hub = Hub(queue_size=10, replay=5)
+        streams = [hub.stream(heartbeat=60) for _ in range(2000)]
+        await asyncio.gather(*(anext(stream) for stream in streams))
+        hub.deliver(Event('1', 'ticket', {}))
+        messages = await asyncio.gather(*(anext(stream) for stream in streams))
+        self.assertEqual(set(messages), {'id: 1\nevent: ticket\ndata: {}\n\n'})
+        await asyncio.gather(*(stream.aclose() for stream in streams))
+        self.assertEqual(hub.connections(), 0)
+
+    @override_settings(KITCHEN_EVENTS_POLL_INTERVAL=0.01)
+    async def test_cache_backend(self):
+        hub = Hub(queue_size=10, replay=5)
+        backend = CacheBackend()
+        stream = hub.stream()
+        await self.next_message(stream)
+        task = asyncio.ensure_future(backend.run(hub))
+        await asyncio.sleep(0.02)
+        await sync_to_async(backend.publish)('dish', {'id': 1})
+        self.assertIn('event: dish\ndata: {"id": 1}', await self.next_message(stream))
+        task.cancel()
+        await stream.aclose()
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = Cook.objects.create_user(username='admin', password='pass12345')
+
+    def test_requires_asgi(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('kitchen:events')).status_code, 204)
+
+    def test_board_rows_carry_event_ids(self):
+        # live.js only refreshes a board for a saved row it shows.
+        dish = Dish.objects.create(name='Borscht', price=5, dish_type=DishType.objects.create(name='Soup'))
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('kitchen:dish-list'))
+        self.assertContains(response, f'data-live-id="dish:{dish.pk}"')
+        self.assertContains(self.client.get(reverse('home')), f'data-live-id="dish_type:{dish.dish_type_id}"')
+
+    async def test_stream(self):
+        self.assertEqual((await self.async_client.get(reverse('kitchen:events'))).status_code, 403)
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('kitchen:events'), {'types': 'dish'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+
+        def create_dish():
+            with self.captureOnCommitCallbacks(execute=True):
+                Cook.objects.create_user(username='chef', password='pass12345')
+                dish_type = DishType.objects.create(name='Soup')
+                return Dish.objects.create(name='Borscht', description='', price=5, dish_type=dish_type)
+
+        dish = await sync_to_async(create_dish)()
+        message = (await asyncio.wait_for(anext(stream), 1)).decode()
+        self.assertIn(f'event: dish\ndata: {{"id": {dish.pk}, "action": "created"}}', message)
+        await stream.aclose()
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 
 from kitchen.views import (
@@ -8,6 +9,7 @@ from kitchen.views import (
     DishCreateView,
     DishUpdateView,
     DishDeleteView,
+    DishBulkView,
     DishTypeListView,
     CookUpdateView,
     DishTypeDeleteView,
@@ -15,25 +17,60 @@ from kitchen.views import (
     HomeView,
     DishDetailView,
     CookDetailView,
-    CookDeleteView
+    CookDeleteView,
+    ExportView,
+    LookupView,
+    AutocompleteView,
+    DeletionJobView,
+    TicketListView,
+    TicketCreateView,
+    TicketDetailView,
+    TicketLineDoneView,
+    EventStreamView,
 )
 
+from kitchen import async_views
+
+# The read-only pages, from kitchen.async_views when KITCHEN_ASYNC_VIEWS is on.
+if settings.KITCHEN_ASYNC_VIEWS:
+    dish_list_view = async_views.AsyncDishListView
+    dish_detail_view = async_views.AsyncDishDetailView
+    cook_list_view = async_views.AsyncCookListView
+    cook_detail_view = async_views.AsyncCookDetailView
+    home_view = async_views.AsyncHomeView
+else:
+    dish_list_view = DishListView
+    dish_detail_view = DishDetailView
+    cook_list_view = CookListView
+    cook_detail_view = CookDetailView
+    home_view = HomeView
+
 app_name = 'kitchen'
 
 urlpatterns = [
-    path('dish/', DishListView.as_view(), name='dish-list'),
+    path('dish/', dish_list_view.as_view(), name='dish-list'),
     path('dish/create/', DishCreateView.as_view(), name='dish-create'),
     path('dish/<int:pk>/update/', DishUpdateView.as_view(), name='dish-update'),
+    path('dish/bulk/', DishBulkView.as_view(), name='dish-bulk'),
     path('dish/<int:pk>/delete/', DishDeleteView.as_view(), name='dish-delete'),
     path('dish_type/', DishTypeListView.as_view(), name='dish-type-list'),
     path('dish_type/create/', DishTypeCreateView.as_view(), name='dish-type-create'),
     path('dish_type/<int:pk>/update/', DishTypeUpdateView.as_view(), name='dish-type-update'),
     path('dish_type/<int:pk>/delete/', DishTypeDeleteView.as_view(), name='dish-type-delete'),
-    path('dish/<int:pk>/', DishDetailView.as_view(), name='dish-detail'),
-    path('cook/<int:pk>/', CookDetailView.as_view(), name='cook-detail'),
-    path('cook/', CookListView.as_view(), name='cook-list'),
+    path('dish/<int:pk>/', dish_detail_view.as_view(), name='dish-detail'),
+    path('cook/<int:pk>/', cook_detail_view.as_view(), name='cook-detail'),
+    path('cook/', cook_list_view.as_view(), name='cook-list'),
     path('cook/create/', CookCreateView.as_view(), name='cook-create'),
     path('cook/<int:pk>/update/', CookUpdateView.as_view(), name='cook-update'),
     path('cook/<int:pk>/delete/', CookDeleteView.as_view(), name='cook-delete'),
-    path('', HomeView.as_view(), name='home'),
+    path('export/<str:kind>.<str:fmt>', ExportView.as_view(), name='export'),
+    path('lookup/<str:kind>/', LookupView.as_view(), name='lookup'),
+    path('autocomplete/<str:kind>/', AutocompleteView.as_view(), name='autocomplete'),
+    path('deletions/<int:pk>/', DeletionJobView.as_view(), name='deletion-job'),
+    path('ticket/', TicketListView.as_view(), name='ticket-list'),
+    path('ticket/create/', TicketCreateView.as_view(), name='ticket-create'),
+    path('ticket/<int:pk>/', TicketDetailView.as_view(), name='ticket-detail'),
+    path('ticket/line/<int:pk>/done/', TicketLineDoneView.as_view(), name='ticket-line-done'),
+    path('events/', EventStreamView.as_view(), name='events'),
+    path('', home_view.as_view(), name='home'),
 ]
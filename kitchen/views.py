@@ -1,34 +1,128 @@
+import hmac
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
-from django.shortcuts import render, redirect
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse_lazy
 from django.views import generic
 from django.views.generic import TemplateView, View
+from kitchen import autocomplete
+from kitchen.events import hub
+from kitchen.cache import cached_menu
+from kitchen.deletion import soft_delete
+from kitchen.dispatch import OPEN, finish_line, place_ticket
+from kitchen.exports import EXPORTS, FORMATS, aiterate, stream_export
 from kitchen.forms import (
+    BulkDishForm,
     DishForm,
     DishTypeForm,
     CookForm,
     UserRegistrationForm,
     DishSearchForm,
     DishTypeSearchForm,
-    CookSearchForm
+    CookSearchForm,
+    TicketForm,
 )
-from kitchen.models import Dish, DishType, Cook
+from kitchen.lookups import LOOKUPS, lookup
+from kitchen.metrics import registry
+from kitchen.models import DeletionJob, Dish, DishType, Cook, Ticket, TicketLine
+from kitchen.pagination import KeysetPaginationMixin
+from kitchen.routers import current_routing
+from kitchen.search import search_cooks, search_dish_types, search_dishes
 import logging
 
 logger = logging.getLogger(__name__)
 
-class DishListView(generic.ListView):
+
+class ConstraintErrorMixin:
+    """
+    Turn an IntegrityError raised by a database constraint while saving
+    into a form error instead of a 500.
+    """
+
+    def form_valid(self, form):
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError as e:
+            if not form.add_constraint_error(e):
+                raise
+            return self.form_invalid(form)
+
+
+class ReplicaReadMixin:
+    """
+    Allow GET requests to this view to read from a replica when
+    KITCHEN_DB_REPLICAS is configured (see kitchen.routers).
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        state = current_routing.get()
+        if state is not None and request.method in ('GET', 'HEAD'):
+            state.read_only = True
+        return super().dispatch(request, *args, **kwargs)
+
+
+class DishCountMixin:
+    """
+    ?sort=dishes orders the list by the denormalized dish_count and
+    ?min_dishes=N hides rows with fewer dishes; both use the
+    (-dish_count, id) index.
+    """
+
+    def sort_by_dishes(self):
+        return self.request.GET.get('sort') == 'dishes'
+
+    def get_keyset_ordering(self):
+        if self.sort_by_dishes():
+            return ('-dish_count', 'id')
+        return super().get_keyset_ordering()
+
+    def filter_dish_count(self, queryset):
+        try:
+            min_dishes = int(self.request.GET.get('min_dishes', ''))
+        except ValueError:
+            min_dishes = None
+        if min_dishes is not None:
+            queryset = queryset.filter(dish_count__gte=min_dishes)
+        if self.sort_by_dishes():
+            queryset = queryset.order_by('-dish_count', 'id')
+        return queryset
+
+
+class BackgroundDeleteMixin:
+    """
+    Hide the object and leave its dependents to kitchen.deletion's
+    background worker, so the request takes the same time whatever the
+    fan-out.
+    """
+
+    def form_valid(self, form):
+        job = soft_delete(self.object)
+        if job is not None:
+            messages.info(
+                self.request, f"{job.object_repr} was deleted; {job.total} related rows are removed in the background."
+            )
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class DishListView(ReplicaReadMixin, KeysetPaginationMixin, generic.ListView):
     model = Dish
     template_name = "kitchen/list_of_dish.html"
     context_object_name = "dishes"
     paginate_by = 10
+    keyset_ordering = ('name', 'id')
 
     def get_queryset(self):
-        queryset = Dish.objects.all().order_by('name')
+        queryset = Dish.objects.for_list().order_by('name')
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
+            queryset = search_dishes(queryset, query, ranked=not self.use_keyset_pagination())
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -37,13 +131,16 @@ class DishListView(generic.ListView):
         return context
 
 
-class DishDetailView(generic.DetailView):
+class DishDetailView(ReplicaReadMixin, generic.DetailView):
     model = Dish
     template_name = "kitchen/dish_detail.html"
     context_object_name = "dish"
 
+    def get_queryset(self):
+        return Dish.objects.with_menu_details()
+
 
-class DishCreateView(LoginRequiredMixin, generic.CreateView):
+class DishCreateView(LoginRequiredMixin, ConstraintErrorMixin, generic.CreateView):
     model = Dish
     form_class = DishForm
     template_name = 'kitchen/form.html'
@@ -53,7 +150,7 @@ class DishCreateView(LoginRequiredMixin, generic.CreateView):
         return reverse_lazy('kitchen:dish-list')
 
 
-class DishUpdateView(LoginRequiredMixin, generic.UpdateView):
+class DishUpdateView(LoginRequiredMixin, ConstraintErrorMixin, generic.UpdateView):
     model = Dish
     form_class = DishForm
     template_name = 'kitchen/form.html'
@@ -69,7 +166,34 @@ class DishDeleteView(LoginRequiredMixin, generic.DeleteView):
     template_name = "kitchen/dish_config_delete.html"
 
 
-class DishTypeListView(generic.ListView):
+class DishBulkView(LoginRequiredMixin, generic.FormView):
+    form_class = BulkDishForm
+    template_name = 'kitchen/form.html'
+    extra_context = {'title': 'Bulk Edit Dishes'}
+    # Action -> message shown with the number changed.
+    success_messages = {
+        'set_price': "Set the price of {} dishes.",
+        'adjust_price': "Changed the price of {} dishes.",
+        'add_cooks': "Added {} cook assignments.",
+        'remove_cooks': "Removed {} cook assignments.",
+        'move': "Moved {} dishes.",
+    }
+
+    def get_initial(self):
+        return {'dishes': self.request.GET.getlist('dishes'), 'q': self.request.GET.get('q', '')}
+
+    def form_valid(self, form):
+        changed = form.save()
+        if changed is None:
+            return self.form_invalid(form)
+        messages.success(self.request, self.success_messages[form.cleaned_data['action']].format(changed))
+        return HttpResponseRedirect(self.get_success_url())
+
+    def get_success_url(self):
+        return reverse_lazy('kitchen:dish-list')
+
+
+class DishTypeListView(ReplicaReadMixin, DishCountMixin, generic.ListView):
     model = DishType
     template_name = "kitchen/list_of_dishtypes.html"
     context_object_name = "dish_types"
@@ -78,8 +202,8 @@ class DishTypeListView(generic.ListView):
         queryset = DishType.objects.all().order_by('name')
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(Q(name__icontains=query))
-        return queryset
+            queryset = search_dish_types(queryset, query)
+        return self.filter_dish_count(queryset)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -87,7 +211,7 @@ class DishTypeListView(generic.ListView):
         return context
 
 
-class DishTypeCreateView(LoginRequiredMixin, generic.CreateView):
+class DishTypeCreateView(LoginRequiredMixin, ConstraintErrorMixin, generic.CreateView):
     model = DishType
     form_class = DishTypeForm
     template_name = 'kitchen/form.html'
@@ -97,7 +221,7 @@ class DishTypeCreateView(LoginRequiredMixin, generic.CreateView):
         return reverse_lazy('kitchen:dish-type-list')
 
 
-class DishTypeUpdateView(LoginRequiredMixin, generic.UpdateView):
+class DishTypeUpdateView(LoginRequiredMixin, ConstraintErrorMixin, generic.UpdateView):
     model = DishType
     form_class = DishTypeForm
     template_name = 'kitchen/form.html'
@@ -106,24 +230,25 @@ class DishTypeUpdateView(LoginRequiredMixin, generic.UpdateView):
         return reverse_lazy('kitchen:dish-type-list')
 
 
-class DishTypeDeleteView(LoginRequiredMixin, generic.DeleteView):
+class DishTypeDeleteView(LoginRequiredMixin, BackgroundDeleteMixin, generic.DeleteView):
     model = DishType
     success_url = reverse_lazy('kitchen:dish-type-list')
     template_name = "kitchen/dishtype_config_delete.html"
 
 
-class CookListView(generic.ListView):
+class CookListView(ReplicaReadMixin, DishCountMixin, KeysetPaginationMixin, generic.ListView):
     model = Cook
     template_name = "kitchen/list_of_cooks.html"
     context_object_name = "cooks"
     paginate_by = 10
+    keyset_ordering = ('username', 'id')
 
     def get_queryset(self):
-        queryset = Cook.objects.all().order_by('username')
+        queryset = Cook.objects.for_list().order_by('username')
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(Q(username__icontains=query) | Q(years_of_experience__icontains=query))
-        return queryset
+            queryset = search_cooks(queryset, query)
+        return self.filter_dish_count(queryset)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -131,10 +256,13 @@ class CookListView(generic.ListView):
         return context
 
 
-class CookDetailView(generic.DetailView):
+class CookDetailView(ReplicaReadMixin, generic.DetailView):
     model = Cook
     template_name = "kitchen/cook_detail.html"
 
+    def get_queryset(self):
+        return Cook.objects.with_menu_details()
+
 
 class CookCreateView(LoginRequiredMixin, generic.CreateView):
     model = Cook
@@ -155,20 +283,63 @@ class CookUpdateView(LoginRequiredMixin, generic.UpdateView):
         return reverse_lazy('kitchen:cook-list')
 
 
-class CookDeleteView(LoginRequiredMixin, generic.DeleteView):
+class CookDeleteView(LoginRequiredMixin, BackgroundDeleteMixin, generic.DeleteView):
     model = Cook
     template_name = 'kitchen/cook_confirm_delete.html'
     success_url = reverse_lazy('kitchen:cook-list')
 
 
-class HomeView(TemplateView):
+class TicketListView(LoginRequiredMixin, KeysetPaginationMixin, generic.ListView):
+    model = Ticket
+    template_name = "kitchen/list_of_tickets.html"
+    context_object_name = "tickets"
+    paginate_by = 20
+    keyset_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        return Ticket.objects.annotate(
+            lines_count=Count('lines'), open_lines=Count('lines', filter=Q(lines__status__in=OPEN))
+        ).order_by('-created_at', '-id')
+
+
+class TicketCreateView(LoginRequiredMixin, generic.FormView):
+    form_class = TicketForm
+    template_name = 'kitchen/form.html'
+    extra_context = {'title': 'New Ticket'}
+
+    def form_valid(self, form):
+        ticket = place_ticket([dish.pk for dish in form.cleaned_data['dishes']], form.cleaned_data['note'])
+        return redirect('kitchen:ticket-detail', pk=ticket.pk)
+
+
+class TicketDetailView(LoginRequiredMixin, generic.DetailView):
+    model = Ticket
+    template_name = "kitchen/ticket_detail.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # ticket stays loaded: the related manager sets it on every line.
+        context['lines'] = self.object.lines.select_related('dish', 'cook').only(
+            'ticket', 'status', 'assigned_at', 'done_at', 'dish__name', 'cook__username'
+        ).order_by('id')
+        return context
+
+
+class TicketLineDoneView(LoginRequiredMixin, View):
+    def post(self, request, pk):
+        line = get_object_or_404(TicketLine.objects.only('ticket_id'), pk=pk)
+        if not finish_line(pk):
+            messages.error(request, "Only lines assigned to a cook can be marked done.")
+        return redirect('kitchen:ticket-detail', pk=line.ticket_id)
+
+
+class HomeView(ReplicaReadMixin, TemplateView):
     template_name = "kitchen/home.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['dishes'] = Dish.objects.all()[:5]
-        context['cooks'] = Cook.objects.all()[:5]
-        context['dishtypes'] = DishType.objects.all()
+        context['dishes'] = cached_menu('home:dishes', lambda: list(Dish.objects.values('id', 'name')[:5]))
+        context['cooks'] = cached_menu('home:cooks', lambda: list(Cook.objects.values('id', 'username')[:5]))
         return context
 
 
@@ -190,3 +361,117 @@ class UserRegistrationView(View):
             logger.warning("Registration failed. Errors: %s", form.errors)
 
         return render(request, 'registration/register.html', {'form': form})
+
+
+class MetricsView(View):
+    def get(self, request):
+        if not self.allowed(request):
+            raise Http404
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    def allowed(self, request):
+        token = settings.KITCHEN_METRICS_TOKEN
+        if token:
+            return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+        return request.META.get('REMOTE_ADDR') in settings.KITCHEN_METRICS_ALLOWED_IPS
+
+
+class ExportView(LoginRequiredMixin, View):
+    """
+    Stream every dish, dish type or cook matching the list page's ?q= filter
+    as CSV or JSON Lines.
+    """
+
+    def get(self, request, kind, fmt):
+        if kind not in EXPORTS or fmt not in FORMATS:
+            raise Http404
+        chunks = stream_export(kind, fmt, request.GET.get('q', ''))
+        if isinstance(request, ASGIRequest):
+            chunks = aiterate(chunks)
+        response = StreamingHttpResponse(chunks, content_type=FORMATS[fmt])
+        response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+        return response
+
+
+class LookupView(LoginRequiredMixin, View):
+    """
+    JSON search behind the cook and dish type pickers on DishForm:
+    ?q= prefix, ?limit= page size and ?cursor= for the next page.
+    """
+
+    def get(self, request, kind):
+        if kind not in LOOKUPS:
+            raise Http404
+        try:
+            limit = int(request.GET.get('limit', settings.KITCHEN_LOOKUP_PAGE_SIZE))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= settings.KITCHEN_LOOKUP_MAX_PAGE_SIZE:
+            return JsonResponse(
+                {'error': f"limit must be between 1 and {settings.KITCHEN_LOOKUP_MAX_PAGE_SIZE}."}, status=400
+            )
+        return JsonResponse(lookup(kind, request.GET.get('q', '').strip(), request.GET.get('cursor'), limit))
+
+
+class AutocompleteView(ReplicaReadMixin, View):
+    """
+    Top ?limit= distinct dish names, dish type names or cook usernames
+    starting with ?q=, for the list pages' search boxes. Served from an
+    in-process index (see kitchen.autocomplete).
+    """
+
+    def get(self, request, kind):
+        if kind not in autocomplete.SOURCES:
+            raise Http404
+        try:
+            limit = int(request.GET.get('limit', settings.KITCHEN_AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= settings.KITCHEN_AUTOCOMPLETE_MAX_LIMIT:
+            return JsonResponse(
+                {'error': f"limit must be between 1 and {settings.KITCHEN_AUTOCOMPLETE_MAX_LIMIT}."}, status=400
+            )
+        prefix = request.GET.get('q', '').strip()
+        if not prefix:
+            return JsonResponse({'results': [], 'source': None})
+        results, source = autocomplete.suggest(kind, prefix, limit)
+        return JsonResponse({'results': results, 'source': source})
+
+
+class DeletionJobView(LoginRequiredMixin, View):
+    """
+    Progress of a background deletion as JSON.
+    """
+
+    def get(self, request, pk):
+        job = DeletionJob.objects.filter(pk=pk).values(
+            'id', 'object_repr', 'status', 'done', 'total', 'error', 'created_at', 'updated_at'
+        ).first()
+        if job is None:
+            raise Http404
+        return JsonResponse(job)
+
+
+class EventStreamView(View):
+    """
+    Server-Sent Events for the live boards (static/js/live.js): dish, cook,
+    dish type and ticket changes from kitchen.events, optionally only the
+    ?types= listed. An idle connection is one coroutine waiting on its
+    queue, so it needs ASGI; under WSGI it would hold a worker thread, and
+    the view answers 204, which stops EventSource from reconnecting.
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=403)
+        kinds = {kind for kind in request.GET.get('types', '').split(',') if kind} or None
+        response = StreamingHttpResponse(
+            hub.stream(kinds, request.headers.get('Last-Event-ID')), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -0,0 +1,39 @@
+// Suggestions for <input data-autocomplete-url> search boxes, shown through
+// a <datalist>. Terms of the cook query language (name:, exp:) are left
+// alone; only plain text is completed.
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('input[data-autocomplete-url]').forEach(function (input, i) {
+    var list = document.createElement('datalist');
+    list.id = 'autocomplete-' + i;
+    input.setAttribute('list', list.id);
+    input.setAttribute('autocomplete', 'off');
+    input.parentNode.appendChild(list);
+
+    var timer = null;
+    var latest = 0;
+
+    function load() {
+      var prefix = input.value.trim();
+      if (!prefix || prefix.indexOf(':') !== -1) {
+        list.replaceChildren();
+        return;
+      }
+      var url = new URL(input.dataset.autocompleteUrl, window.location.href);
+      url.searchParams.set('q', prefix);
+      var request = ++latest;
+      fetch(url, {credentials: 'same-origin', headers: {'Accept': 'application/json'}})
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+          if (request !== latest) {
+            return;
+          }
+          list.replaceChildren.apply(list, data.results.map(function (text) { return new Option(text); }));
+        });
+    }
+
+    input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(load, 150);
+    });
+  });
+});
@@ -0,0 +1,95 @@
+// Live boards: elements with an id and data-live="dish,cook,..." are
+// refreshed from the server when kitchen.events reports a change of one of
+// those kinds, instead of the page being polled. The stream comes from
+// <body data-events-url>, which is only set for signed-in users.
+//
+// Every open page hears every event, so refreshes are kept rare: a change
+// to a single row only refreshes boards showing that row (rows carry
+// data-live-id="kind:id"), bursts within a window cost one refresh, the
+// refresh lands at a random point of that window so clients do not all
+// reload at once, and hidden tabs wait until they are shown again.
+document.addEventListener('DOMContentLoaded', function () {
+  var url = document.body.dataset.eventsUrl;
+  var regions = Array.prototype.slice.call(document.querySelectorAll('[data-live][id]'));
+  if (!url || !regions.length || !window.EventSource) {
+    return;
+  }
+
+  var WINDOW_MS = 2000;
+
+  var kinds = {};
+  regions.forEach(function (region) {
+    region.dataset.live.split(',').forEach(function (kind) { kinds[kind.trim()] = true; });
+  });
+
+  var stale = {};
+  var timer = null;
+
+  function refresh() {
+    timer = null;
+    if (document.hidden) {
+      return;
+    }
+    var targets = regions.filter(function (region) { return stale[region.id]; });
+    stale = {};
+    if (!targets.length) {
+      return;
+    }
+    fetch(window.location.href, {credentials: 'same-origin'})
+      .then(function (response) { return response.text(); })
+      .then(function (html) {
+        var page = new DOMParser().parseFromString(html, 'text/html');
+        targets.forEach(function (region) {
+          var fresh = page.getElementById(region.id);
+          if (fresh) {
+            region.innerHTML = fresh.innerHTML;
+          }
+        });
+      });
+  }
+
+  function schedule() {
+    if (timer === null && !document.hidden) {
+      timer = setTimeout(refresh, 250 + Math.random() * WINDOW_MS);
+    }
+  }
+
+  function shows(region, kind, data) {
+    // Edits and deletions of rows the board does not show are skipped; a
+    // row renamed onto a board turns up with its next refresh. Creations
+    // and bulk changes carry no row of the board, so they always refresh.
+    if (data.id === undefined || data.action === 'created') {
+      return true;
+    }
+    return region.querySelector('[data-live-id="' + kind + ':' + data.id + '"]') !== null;
+  }
+
+  function changed(kind, data) {
+    regions.forEach(function (region) {
+      if (kind === 'reset' ||
+          (region.dataset.live.split(',').indexOf(kind) !== -1 && shows(region, kind, data))) {
+        stale[region.id] = true;
+      }
+    });
+    if (Object.keys(stale).length) {
+      schedule();
+    }
+  }
+
+  document.addEventListener('visibilitychange', function () {
+    if (Object.keys(stale).length) {
+      schedule();
+    }
+  });
+
+  var stream = new EventSource(url + '?types=' + Object.keys(kinds).join(','));
+  Object.keys(kinds).concat(['reset']).forEach(function (kind) {
+    stream.addEventListener(kind, function (event) {
+      var data = {};
+      try {
+        data = JSON.parse(event.data) || {};
+      } catch (e) {}
+      changed(kind, data);
+    });
+  });
+});
@@ -0,0 +1,60 @@
+// Search box for <select data-lookup-url> pickers. The server renders only
+// the selected options; matching ones are fetched from the lookup endpoint
+// page by page as the user types.
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('select[data-lookup-url]').forEach(function (select) {
+    var search = document.createElement('input');
+    search.type = 'search';
+    search.className = 'form-control mb-1';
+    search.placeholder = 'Type to search...';
+    var more = document.createElement('button');
+    more.type = 'button';
+    more.className = 'btn btn-link btn-sm';
+    more.textContent = 'More results';
+    more.hidden = true;
+    select.parentNode.insertBefore(search, select);
+    select.parentNode.insertBefore(more, select.nextSibling);
+
+    var next = null;
+    var timer = null;
+    var latest = 0;
+
+    function load(reset) {
+      var url = new URL(select.dataset.lookupUrl, window.location.href);
+      url.searchParams.set('q', search.value);
+      if (!reset && next) {
+        url.searchParams.set('cursor', next);
+      }
+      var request = ++latest;
+      fetch(url, {credentials: 'same-origin', headers: {'Accept': 'application/json'}})
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+          if (request !== latest) {
+            return;
+          }
+          if (reset) {
+            Array.from(select.options).forEach(function (option) {
+              if (option.value && !option.selected) {
+                option.remove();
+              }
+            });
+          }
+          var present = new Set(Array.from(select.options, function (option) { return option.value; }));
+          data.results.forEach(function (item) {
+            if (!present.has(String(item.id))) {
+              select.add(new Option(item.text, item.id));
+            }
+          });
+          next = data.next;
+          more.hidden = !next;
+        });
+    }
+
+    search.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () { load(true); }, 250);
+    });
+    more.addEventListener('click', function () { load(false); });
+    load(true);
+  });
+});